@@ -0,0 +1,69 @@
+"""Benchmark of a busy asyncio event loop with and without type checking.
+
+Run with `python benchmarks/bench_asyncio.py`.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydytype.check import TraceTypeChecker  # noqa: E402
+
+
+async def handle(request_id: int, payload: list[int]) -> int:
+    total: int = 0
+    for value in payload:
+        await asyncio.sleep(0)
+        total += value
+    response: dict[str, int] = {"id": request_id, "total": total}
+    return response["total"]
+
+
+async def serve(task_count: int, await_count: int):
+    payload = list(range(await_count))
+    await asyncio.gather(*(handle(i, payload) for i in range(task_count)))
+
+
+def run(task_count: int, await_count: int, backend: str | None) -> float:
+    checker = None
+    if backend is not None:
+        checker = TraceTypeChecker(
+            path_prefix=os.path.abspath(__file__), backend=backend
+        )
+        checker.start_trace()
+    start = time.perf_counter()
+    try:
+        asyncio.run(serve(task_count, await_count))
+    finally:
+        if checker is not None:
+            checker.stop_trace()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--awaits", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = [None, "settrace"]
+    if hasattr(sys, "monitoring"):
+        backends.append("monitoring")
+    baseline = None
+    for backend in backends:
+        elapsed = min(run(args.tasks, args.awaits, backend) for _ in range(args.repeat))
+        baseline = baseline or elapsed
+        name = backend or "no checker"
+        print(f"{name:12} {elapsed * 1000:9.1f} ms  {elapsed / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
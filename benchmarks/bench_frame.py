@@ -0,0 +1,115 @@
+"""Micro-benchmark of the per-event cost of inspecting frames with many locals.
+
+Compares the former inspection of a frame (inspect.getframeinfo and iterating all
+local variables) with the direct one (reading the location from the code object and
+fetching only the annotated variables), and measures the cost of a checked call of
+a function with many locals under each tracing backend.
+
+Run with `python benchmarks/bench_frame.py`.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydytype.check import TraceTypeChecker  # noqa: E402
+
+
+def make_source(local_count: int) -> str:
+    """Make source of a function with an annotated argument and many locals."""
+    lines = ["def wide(a: int, measure):"]
+    lines += [f"    v{i} = a + {i}" for i in range(local_count)]
+    lines += ["    b: int = a * 2", "    return measure(b)", ""]
+    return "\n".join(lines)
+
+
+def inspect_before(frame, varnames):
+    """Inspect a frame the way the checker did before."""
+    frameinfo = inspect.getframeinfo(frame)
+    values = {
+        varname: varvalue
+        for varname, varvalue in frame.f_locals.items()
+        if varname in varnames
+    }
+    return frameinfo.filename, frameinfo.lineno, values
+
+
+def inspect_after(frame, varnames):
+    """Inspect a frame the way the checker does now."""
+    f_locals = frame.f_locals
+    values = {varname: f_locals[varname] for varname in varnames if varname in f_locals}
+    return frame.f_code.co_filename, frame.f_lineno, values
+
+
+def time_inspection(wide, inspect_frame, count: int) -> float:
+    """Time inspection of the frame of the function, in seconds per event."""
+    varnames = ("a", "b")
+
+    def measure(b):
+        frame = sys._getframe(1)
+        start = time.perf_counter()
+        for _ in range(count):
+            inspect_frame(frame, varnames)
+        return time.perf_counter() - start
+
+    return wide(1, measure) / count
+
+
+def time_calls(wide, module_path: str, backend: str | None, count: int) -> float:
+    """Time checked calls of the function, in seconds per call."""
+    checker = None
+    if backend is not None:
+        checker = TraceTypeChecker(path_prefix=module_path, backend=backend)
+        checker.start_trace()
+    start = time.perf_counter()
+    try:
+        for i in range(count):
+            wide(i, abs)
+    finally:
+        if checker is not None:
+            checker.stop_trace()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--locals", type=int, default=200)
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        module_path = os.path.join(workdir, "wide.py")
+        with open(module_path, "w") as f:
+            f.write(make_source(args.locals))
+        namespace: dict = {}
+        with open(module_path) as f:
+            exec(compile(f.read(), module_path, "exec"), namespace)
+        wide = namespace["wide"]
+
+        print(f"frame with {args.locals} locals, per event:")
+        for name, inspect_frame in (
+            ("before", inspect_before),
+            ("after", inspect_after),
+        ):
+            elapsed = time_inspection(wide, inspect_frame, args.count)
+            print(f"  {name:10} {elapsed * 1e6:9.2f} us")
+
+        print("checked call, per call:")
+        backends = [None, "settrace"]
+        if hasattr(sys, "monitoring"):
+            backends.append("monitoring")
+        for backend in backends:
+            elapsed = time_calls(wide, module_path, backend, args.count)
+            print(f"  {backend or 'no checker':10} {elapsed * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Benchmark suite measuring the overhead of the type checkers.
+
+Runs each workload of benchmarks/workloads.py natively and under each available
+checking engine, and measures wall time (minimum of the repeats) and peak memory
+(traced with tracemalloc in a separate run). The results are written as JSON and
+can be compared with a saved baseline:
+
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --baseline baseline.json --threshold 0.2
+
+The exit code is 1 if the time or peak memory of any workload and engine grew by
+more than the threshold compared with the baseline. Time differences under
+--min-time-delta are ignored, they are within the noise of short workloads. The
+suite needs no network access.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydytype.check import TraceTypeChecker  # noqa: E402
+from pydytype.hook import ImportHookTypeChecker  # noqa: E402
+
+_WORKLOADS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "workloads.py"
+)
+WORKLOADS = ("numeric_loop", "call_chain", "nested_containers", "threads", "cold_start")
+ENGINES = (
+    ("native", "settrace")
+    + (("monitoring",) if hasattr(sys, "monitoring") else ())
+    + ("import_hook",)
+)
+
+
+def run_workload(
+    engine: str, workload: str, size: int, workdir: str, trace_memory: bool = False
+) -> tuple[float, int]:
+    """Run a workload once under an engine.
+
+    Args:
+        engine: Name of the engine, "native" runs without a checker.
+        workload: Name of the workload.
+        size: Size of the workload.
+        workdir: Directory with the copy of the workloads module.
+        trace_memory: If True, peak memory is traced with tracemalloc.
+
+    Returns:
+        Wall time in seconds and peak memory in bytes (0 if not traced).
+
+    """
+    sys.modules.pop("workloads", None)
+    checker: Any = None
+    if engine == "import_hook":
+        checker = ImportHookTypeChecker(path_prefix=workdir)
+        checker.install()
+    elif engine != "native":
+        checker = TraceTypeChecker(path_prefix=workdir, backend=engine)
+        checker.warm_up(workdir, max_workers=1)
+    function = importlib.import_module("workloads").WORKLOADS[workload]
+
+    if trace_memory:
+        tracemalloc.start()
+    if isinstance(checker, TraceTypeChecker):
+        checker.start_trace()
+    start = time.perf_counter()
+    try:
+        function(size)
+    finally:
+        elapsed = time.perf_counter() - start
+        if isinstance(checker, TraceTypeChecker):
+            checker.stop_trace()
+        elif checker is not None:
+            checker.uninstall()
+    peak_memory = 0
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak_memory
+
+
+def run_suite(
+    workloads: list[str], engines: list[str], size: int, repeat: int
+) -> dict[str, Any]:
+    """Run all workloads under all engines.
+
+    Returns:
+        Results as a JSON-serializable dict.
+
+    """
+    workdir = tempfile.mkdtemp(prefix="pydytype-bench-")
+    shutil.copy(_WORKLOADS_PATH, workdir)
+    sys.path.insert(0, workdir)
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    try:
+        for workload in workloads:
+            for engine in engines:
+                elapsed = min(
+                    run_workload(engine, workload, size, workdir)[0]
+                    for _ in range(repeat)
+                )
+                _, peak_memory = run_workload(
+                    engine, workload, size, workdir, trace_memory=True
+                )
+                results.setdefault(workload, {})[engine] = {
+                    "time_s": elapsed,
+                    "peak_memory_bytes": peak_memory,
+                }
+    finally:
+        sys.path.remove(workdir)
+        sys.modules.pop("workloads", None)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": size,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float,
+    min_time_delta: float = 0.001,
+) -> list[str]:
+    """Compare results with a baseline.
+
+    Args:
+        baseline: Results of a previous run.
+        current: Results of this run.
+        threshold: Allowed relative growth, e.g. 0.2 for 20 %.
+        min_time_delta: Smallest time growth in seconds reported as a regression.
+
+    Returns:
+        Descriptions of the regressions.
+
+    """
+    regressions = []
+    for workload, engines in current["results"].items():
+        for engine, metrics in engines.items():
+            old_metrics = baseline["results"].get(workload, {}).get(engine)
+            if old_metrics is None:
+                continue
+            for metric, value in metrics.items():
+                old_value = old_metrics.get(metric)
+                if metric == "time_s" and value - (old_value or 0) < min_time_delta:
+                    continue
+                if old_value and value > old_value * (1 + threshold):
+                    regressions.append(
+                        f"{workload}/{engine} {metric}: {old_value:.6g} -> "
+                        f"{value:.6g} (+{(value / old_value - 1) * 100:.0f} %)"
+                    )
+    return regressions
+
+
+def format_results(
+    current: dict[str, Any], baseline: Optional[dict[str, Any]] = None
+) -> str:
+    """Format results as a table with overhead relative to the native run."""
+    lines = [
+        f"{'workload':18} {'engine':12} {'time':>10} {'overhead':>9} "
+        f"{'peak memory':>12} {'vs baseline':>12}"
+    ]
+    for workload, engines in current["results"].items():
+        native = engines.get("native", {}).get("time_s")
+        for engine, metrics in engines.items():
+            elapsed = metrics["time_s"]
+            overhead = f"{elapsed / native:8.2f}x" if native else ""
+            vs_baseline = ""
+            if baseline is not None:
+                old = baseline["results"].get(workload, {}).get(engine)
+                if old and old["time_s"]:
+                    vs_baseline = f"{elapsed / old['time_s']:11.2f}x"
+            lines.append(
+                f"{workload:18} {engine:12} {elapsed * 1000:8.1f}ms {overhead:>9} "
+                f"{metrics['peak_memory_bytes'] / 1024:10.0f}KB {vs_baseline:>12}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--quick", action="store_true", help="use size 5000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="path of the JSON results")
+    parser.add_argument("--baseline", help="path of JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-time-delta", type=float, default=0.001)
+    args = parser.parse_args(argv)
+
+    size = 5000 if args.quick else args.size
+    current = run_suite(list(args.workloads), list(args.engines), size, args.repeat)
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_results(current, baseline))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = compare(baseline, current, args.threshold, args.min_time_delta)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
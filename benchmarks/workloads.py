@@ -0,0 +1,100 @@
+"""Annotated workloads measured by the benchmark suite.
+
+Each workload is a function taking a size and returning nothing. The runner copies
+this module to a temporary directory, which is the path prefix of the checkers, so
+only the workloads are checked.
+
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import threading
+
+
+def numeric_loop(size: int):
+    total: float = 0.0
+    for i in range(size):
+        x: float = i * 0.5
+        total += x * x
+
+
+def _chain(depth: int, value: int) -> int:
+    if depth == 0:
+        return value
+    result: int = _chain(depth - 1, value + 1)
+    return result
+
+
+def call_chain(size: int):
+    for i in range(size // 100):
+        _chain(100, i)
+
+
+def _consume(data: dict[str, dict[str, list[int]]]) -> int:
+    count: int = len(data)
+    return count
+
+
+def nested_containers(size: int):
+    data = {
+        f"key{i}": {f"inner{j}": list(range(20)) for j in range(10)}
+        for i in range(size // 200)
+    }
+    for _ in range(10):
+        _consume(data)
+
+
+def _handle(request: dict[str, int]) -> int:
+    response: int = request["id"] * 2
+    return response
+
+
+def _serve(count: int):
+    for i in range(count):
+        _handle({"id": i})
+
+
+def threads(size: int):
+    workers = [threading.Thread(target=_serve, args=(size // 8,)) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+_cold_start_count = 0
+
+
+def cold_start(size: int):
+    """Import a new module with many annotated functions and call all of them."""
+    global _cold_start_count
+    _cold_start_count += 1
+    name = f"_cold_start_{os.getpid()}_{_cold_start_count}"
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name + ".py")
+    functions = [
+        f"def f{i}(a: int, b: list[str]) -> int:\n"
+        f"    c: dict[str, int] = {{'a': a}}\n"
+        f"    return c['a']\n"
+        for i in range(size // 100)
+    ]
+    calls = [f"    f{i}(1, ['a'])\n" for i in range(size // 100)]
+    with open(path, "w") as f:
+        f.write("\n\n".join(functions) + "\n\ndef main():\n" + "".join(calls))
+    importlib.invalidate_caches()
+    try:
+        importlib.import_module(name).main()
+    finally:
+        sys.modules.pop(name, None)
+        os.remove(path)
+
+
+WORKLOADS = {
+    "numeric_loop": numeric_loop,
+    "call_chain": call_chain,
+    "nested_containers": nested_containers,
+    "threads": threads,
+    "cold_start": cold_start,
+}
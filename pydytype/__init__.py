@@ -0,0 +1,5 @@
+"""Runtime checker of variable type annotations."""
+
+__version__ = "0.1.0"
+
+from pydytype.decorator import checked, instrument  # noqa: E402
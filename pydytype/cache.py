@@ -0,0 +1,213 @@
+"""Module for caching parsed module type annotations on disk."""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pydytype import __version__
+from pydytype.parse import (
+    AssignmentSite,
+    ModuleTypes,
+    ModuleTypesIntermediateStore,
+    ModuleTypesParser,
+    TypesIndex,
+)
+
+_MAGIC = b"PDYT"
+_FORMAT_VERSION = 3
+# magic, format version, source mtime in ns, source size, sha256 of source
+_HEADER = struct.Struct("<4sHqq32s")
+
+
+@dataclass
+class CacheStats:
+    """Counts on-disk cache hits and misses.
+
+    Each miss parses the module source and writes a new cache entry, each hit loads
+        the annotations parsed before, possibly by another process.
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+
+class ModuleTypesCache:
+    """Persistent cache of type annotations parsed from modules.
+
+    Each module has one entry file in the cache directory, named by a hash of the
+        module path and the pydytype version. The entry starts with a header with
+        the modification time, size and sha256 hash of the source it was parsed
+        from, followed by the annotations serialized with marshal. An entry is used
+        if the modification time and size of the source still match, or else if the
+        hash of its content does, so touching a file does not invalidate its entry.
+
+    Entries are read through mmap and written to a temporary file which then
+        atomically replaces the entry, so any number of processes can share the
+        directory and fill it concurrently. A reader sees either a complete old entry
+        or a complete new one. Unreadable or corrupted entries are treated as misses,
+        and errors writing the cache are ignored.
+
+    Attributes:
+        directory: Path of the cache directory.
+        stats: Cache hit and miss counters.
+
+    """
+
+    def __init__(self, directory: str):
+        """Initialize.
+
+        Args:
+            directory: Path of the cache directory, created if it does not exist.
+
+        """
+        self.directory = directory
+        self.stats = CacheStats()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_module_types(self, module_path: str) -> ModuleTypes:
+        """Get type annotations of a module, from the cache or by parsing it.
+
+        Args:
+            module_path: Path of the module.
+
+        Returns:
+            Type annotations for each line, function arguments and assignments.
+
+        """
+        module_path = os.path.abspath(module_path)
+        stat = os.stat(module_path)
+        entry_path = self._get_entry_path(module_path)
+        module_types = self._load(entry_path, module_path, stat)
+        if module_types is not None:
+            self.stats.hits += 1
+            return module_types
+
+        self.stats.misses += 1
+        with open(module_path, "rb") as f:
+            source = f.read()
+        types_store = ModuleTypesIntermediateStore()
+        parser = ModuleTypesParser(types_store)
+        parser.parse_source(importlib.util.decode_source(source), module_path)
+        module_types = types_store.get_module_types()
+
+        header = _HEADER.pack(
+            _MAGIC,
+            _FORMAT_VERSION,
+            stat.st_mtime_ns,
+            len(source),
+            hashlib.sha256(source).digest(),
+        )
+        self._store(entry_path, header + marshal.dumps(_to_data(module_types)))
+        return module_types
+
+    def clear(self):
+        """Remove all cache entries."""
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".pdt"):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+    def _get_entry_path(self, module_path: str) -> str:
+        """Get path of the cache entry of a module."""
+        key = hashlib.sha256(f"{__version__}\0{module_path}".encode()).hexdigest()
+        return os.path.join(self.directory, key + ".pdt")
+
+    def _load(
+        self, entry_path: str, module_path: str, stat: os.stat_result
+    ) -> Optional[ModuleTypes]:
+        """Load cache entry, or return None if it is missing, stale or corrupted."""
+        try:
+            with open(entry_path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                magic, version, mtime_ns, size, digest = _HEADER.unpack_from(data)
+                if magic != _MAGIC or version != _FORMAT_VERSION:
+                    return None
+                if size != stat.st_size:
+                    return None
+                if mtime_ns != stat.st_mtime_ns and digest != _hash_file(module_path):
+                    return None
+                with memoryview(data)[_HEADER.size :] as payload:
+                    return _from_data(marshal.loads(payload))
+        except (OSError, ValueError, EOFError, TypeError, struct.error):
+            return None
+
+    def _store(self, entry_path: str, data: bytes):
+        """Atomically write cache entry."""
+        try:
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=".", suffix=".tmp"
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def _hash_file(path: str) -> bytes:
+    """Get sha256 hash of file content."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def _to_data(module_types: ModuleTypes) -> tuple[Any, ...]:
+    """Convert module types to builtin objects which marshal can serialize."""
+    types = module_types.types
+    assignments = {
+        line: (site.line_end, site.varnames, site.attributes)
+        for line, site in module_types.assignments.items()
+    }
+    return (
+        types.segment_starts,
+        types.segment_types,
+        types.line_end,
+        module_types.arguments,
+        assignments,
+        module_types.returns,
+        module_types.attributes,
+        module_types.methods,
+    )
+
+
+def _from_data(data: tuple[Any, ...]) -> ModuleTypes:
+    """Convert builtin objects loaded by marshal back to module types."""
+    (
+        segment_starts,
+        segment_types,
+        line_end,
+        arguments,
+        assignments,
+        returns,
+        attributes,
+        methods,
+    ) = data
+    return ModuleTypes(
+        types=TypesIndex(segment_starts, segment_types, line_end),
+        arguments=arguments,
+        assignments={
+            line: AssignmentSite(site_line_end, varnames, site_attributes)
+            for line, (site_line_end, varnames, site_attributes) in assignments.items()
+        },
+        returns=returns,
+        attributes=attributes,
+        methods=methods,
+    )
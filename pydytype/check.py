@@ -2,174 +2,1936 @@
 
 from __future__ import annotations
 
+import array
+import collections.abc
+import dis
 import inspect
+import itertools
+import operator
 import os
+import random
 import sys
 import threading
+import time
 import types
 import typing
 
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+)
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Optional
 
-from pydytype.parse import parse_module
+from pydytype import overhead
+from pydytype.cache import ModuleTypesCache
+from pydytype.overhead import CheckProfiler
+from pydytype.parse import AssignmentSite, ModuleTypes, parse_module
+from pydytype.resolve import AnnotationResolver
+from pydytype.results import Result, ResultStore
+from pydytype.sink import ResultSink
+from pydytype.subprocesses import SubprocessTracer
+from pydytype.warmup import WarmupReport, parse_package
 
 
-@dataclass
-class Result:
-    """Holds variable type check results."""
+@dataclass(frozen=True)
+class Sampling:
+    """Strategy for checking values of large containers.
 
-    module_path: str
-    line: int
-    varname: str
-    varvalue: Any
-    vartype_str: str
-    vartype: Any
-    type_is_correct: bool
+    Strategies:
+        full: Check all values.
+        first: Check only the first k values of each container.
+        random: Check k randomly chosen values of each container.
+        time: Check values until the time budget of the whole check is spent.
+
+    Attributes:
+        strategy: Name of the strategy.
+        k: Number of values checked in each container by "first" and "random".
+        seed: Seed of the random number generator used by "random".
+        time_budget: Time budget of one check in seconds used by "time".
+
+    """
+
+    strategy: str = "full"
+    k: int = 100
+    seed: Optional[int] = None
+    time_budget: float = 0.001
+
+    def __post_init__(self):
+        """Validate the strategy."""
+        if self.strategy not in ("full", "first", "random", "time"):
+            raise ValueError(f"Unknown sampling strategy: {self.strategy}.")
+
+
+@dataclass(frozen=True)
+class Throttling:
+    """Adaptive throttling of checks on hot lines and cap of the checking overhead.
+
+    Checks are counted per code object and line. After a number of consecutive
+        passing checks of a line, the line is checked only every 2nd time, then every
+        4th time and so on, up to every max_interval-th time. A failed check resets
+        the line to be checked every time.
+
+    If max_overhead is set, the checker stops checking entirely once the time spent
+        in its trace callbacks, including the callbacks of line events which check
+        nothing, exceeds this fraction of the CPU time of the process since tracing
+        started.
+
+    Attributes:
+        passes: Number of consecutive passing checks of a line before backing off.
+        max_interval: Maximum number of occurrences of a line per check.
+        max_overhead: Maximum fraction of the process CPU time spent in checks, or
+            None for no limit.
+        min_cpu_time: CPU time of the process in seconds before the overhead is
+            limited, so that the start of the program does not stop checking.
+
+    """
+
+    passes: int = 100
+    max_interval: int = 1024
+    max_overhead: Optional[float] = None
+    min_cpu_time: float = 0.1
+
+    def __post_init__(self):
+        """Validate the parameters."""
+        if self.passes < 1 or self.max_interval < 1:
+            raise ValueError("Throttling passes and max_interval must be positive.")
+        if self.max_overhead is not None and not 0 < self.max_overhead <= 1:
+            raise ValueError("Throttling max_overhead must be in (0, 1].")
+
+
+class LineStats:
+    """Check counts and costs of one line of a code object.
+
+    Attributes:
+        checks: Number of checks of the line.
+        skipped: Number of occurrences of the line skipped by throttling.
+        failures: Number of checks with at least one incorrect type.
+        cost_ns: Time spent checking the line in nanoseconds.
+        consecutive_passes: Number of passing checks since the last failure.
+        interval: The line is checked once in this many occurrences.
+
+    """
+
+    __slots__ = (
+        "checks",
+        "skipped",
+        "failures",
+        "cost_ns",
+        "consecutive_passes",
+        "interval",
+        "countdown",
+    )
+
+    def __init__(self):
+        """Initialize with no checks."""
+        self.checks = 0
+        self.skipped = 0
+        self.failures = 0
+        self.cost_ns = 0
+        self.consecutive_passes = 0
+        self.interval = 1
+        self.countdown = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"LineStats(checks={self.checks}, skipped={self.skipped}, "
+            f"failures={self.failures}, cost_ns={self.cost_ns}, "
+            f"interval={self.interval})"
+        )
+
+
+class CheckContext:
+    """State of one type check which samples values of large containers.
+
+    Attributes:
+        sampling: Sampling strategy.
+        sampled: Whether some values were skipped, i.e. the verdict is not
+            exhaustive.
+
+    """
+
+    __slots__ = ("sampling", "sampled", "_rng", "_deadline")
+
+    def __init__(self, sampling: Sampling, rng: Optional[random.Random] = None):
+        """Initialize.
+
+        Args:
+            sampling: Sampling strategy.
+            rng: Random number generator for the "random" strategy, a new one seeded
+                with sampling.seed is created if not given.
+
+        """
+        self.sampling = sampling
+        self.sampled = False
+        self._rng = rng if rng is not None else random.Random(sampling.seed)
+        self._deadline = time.perf_counter() + sampling.time_budget
+
+    def select(self, varvalues: Collection) -> Iterable:
+        """Select the values of a container which should be checked."""
+        strategy = self.sampling.strategy
+        if strategy == "time":
+            return self._select_in_time(varvalues)
+        k = self.sampling.k
+        if strategy == "full" or len(varvalues) <= k:
+            return varvalues
+
+        self.sampled = True
+        if strategy == "first":
+            return itertools.islice(varvalues, k)
+        if not isinstance(varvalues, list):
+            varvalues = list(varvalues)
+        return self._rng.sample(varvalues, k)
+
+    def _select_in_time(self, varvalues: Collection) -> Iterator:
+        """Yield values until the deadline, checking the time every 64 values."""
+        deadline = self._deadline
+        for index, varvalue in enumerate(varvalues):
+            if index % 64 == 0 and time.perf_counter() > deadline:
+                self.sampled = True
+                return
+            yield varvalue
 
 
 class TypeCheckError(Exception):
     pass
 
 
-class TraceTypeChecker:
+class TypeChecker:
+    """Base class of type checkers, checks values and collects the results.
+
+    Attributes:
+        path_prefix: Types will be checked only in modules with this prefix.
+        sampling: Strategy for checking values of large containers, or None to check
+            all values.
+        sink: Sink which streams every result while the program runs, or None.
+        profiler: Profiler of the time spent by the checker, or None.
+        results: Store of aggregated type checking results.
+        resolver: Cache of resolved type annotations, see resolver.stats for the
+            number of cache hits and misses.
+        unchecked: Sites whose annotation could not be resolved or is not
+            supported, keyed by module path, line, variable name and type annotation
+            string, with the error message. Values at these sites are not checked.
+
+    """
+
+    def __init__(
+        self,
+        path_prefix: str = "",
+        sampling: Optional[Sampling] = None,
+        sink: Optional[ResultSink] = None,
+        profile: bool = False,
+    ):
+        """Initialize.
+
+        Args:
+            path_prefix: Types will be checked only in modules with this prefix.
+            sampling: Strategy for checking values of large containers, all values
+                are checked by default.
+            sink: Sink which streams every result, results are only aggregated in
+                memory by default.
+            profile: If True, the time spent by the checker is measured per check
+                site and phase, see profiler.
+
+        """
+        self.path_prefix = path_prefix
+        self.sampling = sampling
+        self.sink = sink
+        self.profiler = CheckProfiler() if profile else None
+
+        self.results = ResultStore()
+        self.resolver = AnnotationResolver()
+        self.unchecked: dict[tuple[str, int, str, str], str] = {}
+        self._rng = random.Random(sampling.seed if sampling is not None else None)
+
+    def _check_value(
+        self,
+        module_path: str,
+        line: int,
+        varname: str,
+        varvalue: Any,
+        vartype_str: str,
+        scope: str,
+        f_globals: dict[str, Any],
+        f_locals: Optional[dict[str, Any]],
+        produced: Optional[str] = None,
+    ) -> bool:
+        """Check type of a variable value and save the result.
+
+        Args:
+            module_path: Path of the module.
+            line: Line number of the check.
+            varname: Name of the variable.
+            varvalue: Value of the variable.
+            vartype_str: Type annotation of the variable as a string.
+            scope: Name of the scope of the variable.
+            f_globals: Global variables of the scope.
+            f_locals: Local variables of the scope.
+            produced: Either "yield" or "return" if the value is yielded or returned
+                by a generator whose return type annotation is vartype_str, then
+                the value is checked against the type of the yielded or returned
+                values, e.g. int for Iterator[int].
+
+        Returns:
+            Whether the type is correct. Values produced by generators whose
+                annotation does not specify their type are not checked, and True
+                is returned. Neither are values whose annotation cannot be resolved
+                or is not supported, their sites are saved to self.unchecked.
+
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter_ns()
+        context = self._make_context()
+        # the checked program must never see errors of the checker
+        try:
+            vartype = self.resolver.resolve(
+                module_path, scope, vartype_str, f_globals, f_locals
+            )
+            if produced is not None:
+                vartype = _get_produced_type(vartype, produced)
+                if vartype is None:
+                    return True
+            if profiler is not None:
+                resolved = time.perf_counter_ns()
+            type_is_correct = compile_type_checker(vartype)(varvalue, context)
+        except (TypeCheckError, NameError, AttributeError, TypeError) as error:
+            key = (module_path, line, varname, vartype_str)
+            self.unchecked[key] = f"{type(error).__name__}: {error}"
+            return True
+        if profiler is not None:
+            checked = time.perf_counter_ns()
+
+        self._add_result(
+            module_path,
+            line,
+            varname,
+            varvalue,
+            vartype_str,
+            vartype,
+            type_is_correct,
+            context,
+        )
+        if profiler is not None:
+            profiler.add_check(
+                module_path,
+                line,
+                resolved - start,
+                checked - resolved,
+                time.perf_counter_ns() - checked,
+            )
+        return type_is_correct
+
+    def _make_context(self) -> Optional[CheckContext]:
+        """Make context of a check, or None if all values should be checked."""
+        if self.sampling is None or self.sampling.strategy == "full":
+            return None
+        return CheckContext(self.sampling, self._rng)
+
+    def _add_result(
+        self,
+        module_path: str,
+        line: int,
+        varname: str,
+        varvalue: Any,
+        vartype_str: str,
+        vartype: Any,
+        type_is_correct: bool,
+        context: Optional[CheckContext],
+    ):
+        """Save the result of a check and stream it to the sink."""
+        result = Result(
+            module_path=module_path,
+            line=line,
+            varname=varname,
+            varvalue=varvalue,
+            vartype_str=vartype_str,
+            vartype=vartype,
+            type_is_correct=type_is_correct,
+            sampled=context is not None and context.sampled,
+            thread_id=threading.get_ident(),
+            task_name=_get_task_name(),
+        )
+        self.results.add(result)
+        if self.sink is not None:
+            self.sink.put(result)
+
+
+class TraceTypeChecker(TypeChecker):
     """Checks types while the program is running.
 
-    The checker sets a tracing function and on each frame evaluates variable types.
-        The results are saved to self.results.
+    The checker sets a tracing function and evaluates variable types. Function
+        arguments are checked once when the function is called, other variables
+        are checked once after each assignment to them. The results are saved to
+        self.results.
 
-    Since the checker uses tracing, debugging will not work while the checker is running.
+    With the "settrace" backend, debugging will not work while the checker is running.
+        The "monitoring" backend (Python 3.12+) uses sys.monitoring instead, only
+        receives events from code objects with type annotations and can run
+        alongside debuggers.
 
     Attributes:
         path_prefix: Types will be checked only in modules with this prefix.
-        results: List of type checking results.
+        backend: Tracing backend, either "settrace" or "monitoring".
+        sampling: Strategy for checking values of large containers, or None to check
+            all values.
+        strict: If False, an assignment is not checked again when it assigns the same
+            object as the last checked assignment of the variable in the same frame,
+            and the object is immutable or has the same length. If True, only
+            immutable objects are skipped, so mutations inside containers are seen.
+        cache: Persistent cache of parsed type annotations, or None to parse every
+            module when it is first seen.
+        throttling: Throttling of checks on hot lines and overhead cap, or None to
+            check every time.
+        line_stats: Check counts and costs by code object and line, collected when
+            throttling is enabled.
+        overhead_ns: Time spent in trace callbacks in nanoseconds, measured when
+            throttling has an overhead cap.
+        over_budget: Whether checking stopped because of the overhead cap.
+        sink: Sink which streams every result while the program runs, or None.
+        profiler: Profiler of the time spent by the checker, or None.
+        subprocesses: Tracer of child processes, or None.
+        results: Store of aggregated type checking results, including the results of
+            child processes if they are traced.
+        resolver: Cache of resolved type annotations, see resolver.stats for the
+            number of cache hits and misses.
 
     """
 
-    def __init__(self, path_prefix: str = ""):
-        """Initialize."""
-        self.path_prefix = path_prefix
+    def __init__(
+        self,
+        path_prefix: str = "",
+        backend: str = "settrace",
+        sampling: Optional[Sampling] = None,
+        strict: bool = False,
+        cache_dir: Optional[str] = None,
+        sink: Optional[ResultSink] = None,
+        throttling: Optional[Throttling] = None,
+        profile: bool = False,
+        trace_subprocesses: bool = False,
+    ):
+        """Initialize.
+
+        Args:
+            path_prefix: Types will be checked only in modules with this prefix.
+            backend: Tracing backend, either "settrace" or "monitoring".
+            sampling: Strategy for checking values of large containers, all values
+                are checked by default.
+            strict: If True, containers are checked after every assignment, even if
+                the same unchanged container is assigned again.
+            cache_dir: Directory of the persistent cache of parsed type annotations,
+                which can be shared by many processes. Modules are parsed without
+                a persistent cache by default.
+            sink: Sink which streams every result, results are only aggregated in
+                memory by default.
+            throttling: Throttling of checks on hot lines and overhead cap, every
+                occurrence is checked by default.
+            profile: If True, the time spent by the checker is measured per check
+                site and phase, see profiler.
+            trace_subprocesses: If True, types are also checked in child processes
+                started with multiprocessing while tracing, and their results are
+                merged into results, see SubprocessTracer. Children use the same
+                configuration, except for the sink and profiling.
 
-        self.results: list[Result] = []
-        self._types: dict[str, list[dict[str, str]]] = {}
+        Raises:
+            ValueError: If the backend is unknown or not available.
+
+        """
+        if backend not in ("settrace", "monitoring"):
+            raise ValueError(f"Unknown backend: {backend}.")
+        if backend == "monitoring" and not hasattr(sys, "monitoring"):
+            raise ValueError("Backend 'monitoring' requires Python 3.12 or newer.")
+
+        super().__init__(
+            path_prefix=path_prefix, sampling=sampling, sink=sink, profile=profile
+        )
+        self.backend = backend
+        self.strict = strict
+        self.cache = ModuleTypesCache(cache_dir) if cache_dir is not None else None
+        self.throttling = throttling
+        self.line_stats: dict[tuple[types.CodeType, int], LineStats] = {}
+        self.overhead_ns = 0
+        self.over_budget = False
+        self.subprocesses: Optional[SubprocessTracer] = None
+        if trace_subprocesses:
+            self.subprocesses = SubprocessTracer(
+                type(self),
+                {
+                    "path_prefix": path_prefix,
+                    "backend": backend,
+                    "sampling": sampling,
+                    "strict": strict,
+                    "cache_dir": cache_dir,
+                    "throttling": throttling,
+                },
+                self.results,
+                stop_inherited=self._stop_backend,
+            )
+
+        self._types: dict[str, ModuleTypes] = {}
+        self._parse_locks: dict[str, threading.Lock] = {}
+        self._code_types: dict[types.CodeType, Optional[_CodeTypes]] = {}
+        # keyed by frame id, so that suspended coroutines are not kept alive
+        self._frame_states: dict[int, _FrameState] = {}
+        self._tool_id: Optional[int] = None
+        self._cpu_start_ns = 0
+        self._events_until_budget = 0
+        # trace function installed by start_trace and returned as local trace
+        self._trace_function: Callable[..., Any] = self._trace
+        # depth of the monitored frame from sys.monitoring callbacks, which are
+        # called through _wrap_callback if the overhead is capped
+        self._is_timed = throttling is not None and throttling.max_overhead is not None
+        self._caller_depth = 2 if self._is_timed else 1
 
     def start_trace(self):
         """Start tracing."""
-        threading.settrace(self._trace)
-        sys.settrace(self._trace)
+        self._cpu_start_ns = time.process_time_ns()
+        self.overhead_ns = 0
+        self.over_budget = False
+        self._events_until_budget = 0
+        if self.subprocesses is not None:
+            self.subprocesses.start()
+        if self.backend == "monitoring":
+            self._start_monitoring()
+            return
+        self._trace_function = self._wrap_callback(self._trace)
+        threading.settrace(self._trace_function)
+        sys.settrace(self._trace_function)
 
     def stop_trace(self):
         """Stop tracing."""
+        if self.subprocesses is not None:
+            self.subprocesses.stop()
+        self._stop_backend()
+
+    def preload(self, module_types: dict[str, ModuleTypes]):
+        """Add type annotations of modules parsed ahead of time.
+
+        Modules which are not preloaded are parsed when their code is first traced.
+
+        Args:
+            module_types: Parsed type annotations, keyed by module path.
+
+        """
+        self._types.update(module_types)
+
+    def warm_up(
+        self, root: Optional[str] = None, max_workers: Optional[int] = None
+    ) -> WarmupReport:
+        """Parse all modules of a source tree in parallel and preload them.
+
+        Args:
+            root: Path of the source tree, the path prefix by default.
+            max_workers: Number of worker processes, the number of CPUs by default.
+
+        Returns:
+            Parsed type annotations, parse times and errors.
+
+        """
+        if root is None:
+            root = self.path_prefix
+            if not os.path.isdir(root):
+                root = os.path.dirname(root) or "."
+        report = parse_package(
+            root,
+            max_workers=max_workers,
+            cache_dir=self.cache.directory if self.cache is not None else None,
+        )
+        self.preload(report.module_types)
+        return report
+
+    def _stop_backend(self):
+        """Stop tracing of this process."""
+        if self.backend == "monitoring":
+            self._stop_monitoring()
+            return
         threading.settrace(None)
         sys.settrace(None)
 
+    def _start_monitoring(self):
+        """Register sys.monitoring callbacks and enable the PY_START event."""
+        monitoring = sys.monitoring
+        events = monitoring.events
+        self._tool_id = _get_free_tool_id()
+        monitoring.use_tool_id(self._tool_id, "pydytype")
+        for event, callback in (
+            (events.PY_START, self._monitor_start),
+            (events.LINE, self._monitor_line),
+            (events.PY_RETURN, self._monitor_return),
+            (events.PY_YIELD, self._monitor_yield),
+            (events.PY_UNWIND, self._monitor_unwind),
+        ):
+            monitoring.register_callback(
+                self._tool_id, event, self._wrap_callback(callback)
+            )
+        monitoring.set_events(self._tool_id, events.PY_START | events.PY_UNWIND)
+
+    def _stop_monitoring(self):
+        """Disable all sys.monitoring events and release the tool id.
+
+        Events disabled by callbacks are restarted with sys.monitoring.restart_events,
+            which also re-enables events disabled by other tools, e.g. a debugger or
+            coverage tool running at the same time.
+
+        """
+        if self._tool_id is None:
+            return
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.set_events(self._tool_id, events.NO_EVENTS)
+        for code, code_types in list(self._code_types.items()):
+            if code_types is not None and code_types.is_monitored:
+                monitoring.set_local_events(self._tool_id, code, events.NO_EVENTS)
+                # local events are enabled again at the next start
+                code_types.is_monitored = False
+        for event in (
+            events.PY_START,
+            events.LINE,
+            events.PY_RETURN,
+            events.PY_YIELD,
+            events.PY_UNWIND,
+        ):
+            monitoring.register_callback(self._tool_id, event, None)
+        monitoring.free_tool_id(self._tool_id)
+        # events disabled by returning DISABLE would stay disabled for the next run;
+        # note that restart_events re-enables the events disabled by all tools,
+        # not only by this one
+        monitoring.restart_events()
+        self._tool_id = None
+
+    def _monitor_start(self, code: types.CodeType, instruction_offset: int):
+        """Handle the PY_START event of sys.monitoring."""
+        if self.over_budget:
+            return sys.monitoring.DISABLE
+        if self.profiler is None:
+            code_types = self._get_code_types(code)
+        else:
+            code_types = self._get_code_types_profiled(code)
+        if code_types is None:
+            return sys.monitoring.DISABLE
+        if not code_types.is_monitored:
+            events = sys.monitoring.events
+            local_events = events.NO_EVENTS
+            if code_types.has_assignments:
+                local_events |= events.LINE | events.PY_RETURN
+                module_types = self._types[code.co_filename]
+                code_types.line_checks = _get_line_checks(
+                    code, module_types.assignments
+                )
+            if code_types.returns is not None:
+                local_events |= events.PY_RETURN
+                if code_types.is_generator:
+                    local_events |= events.PY_YIELD
+            if local_events:
+                sys.monitoring.set_local_events(self._tool_id, code, local_events)
+            code_types.is_monitored = True
+        self._start_frame(sys._getframe(self._caller_depth), code_types)
+
+    def _monitor_line(self, code: types.CodeType, line_number: int):
+        """Handle the LINE event of sys.monitoring.
+
+        Line events of lines which neither start an assignment statement nor may
+            follow one are disabled, so only the lines which check assignments pay
+            the callback.
+
+        """
+        if self.over_budget:
+            return sys.monitoring.DISABLE
+        code_types = self._code_types.get(code)
+        if code_types is None or line_number not in code_types.line_checks:
+            return sys.monitoring.DISABLE
+        self._check_line(sys._getframe(self._caller_depth), line_number)
+
+    def _monitor_return(
+        self, code: types.CodeType, instruction_offset: int, retval: Any
+    ):
+        """Handle the PY_RETURN event of sys.monitoring."""
+        if self.over_budget:
+            return sys.monitoring.DISABLE
+        self._check_return(sys._getframe(self._caller_depth), retval, True)
+
+    def _monitor_yield(
+        self, code: types.CodeType, instruction_offset: int, retval: Any
+    ):
+        """Handle the PY_YIELD event of sys.monitoring."""
+        if self.over_budget:
+            return sys.monitoring.DISABLE
+        code_types = self._code_types.get(code)
+        if code_types is not None and code_types.is_generator:
+            self._check_produced(
+                sys._getframe(self._caller_depth),
+                code_types.returns,
+                "yield",
+                retval,
+                "yield",
+            )
+
+    def _monitor_unwind(
+        self, code: types.CodeType, instruction_offset: int, exception: BaseException
+    ):
+        """Handle the PY_UNWIND event of sys.monitoring."""
+        self._frame_states.pop(id(sys._getframe(self._caller_depth)), None)
+
     def _trace(self, frame: types.FrameType, event: str, arg: Any):
-        """Main trace method."""
-        self._check_frame(frame)
-        return self._trace
-
-    def _check_frame(self, frame: types.FrameType):
-        """Check frame for variable types and save the result."""
-        frameinfo = inspect.getframeinfo(frame)
-        if not frameinfo.filename.startswith(self.path_prefix) or not os.path.exists(
-            frameinfo.filename
+        """Main trace method.
+
+        Returns None on the call event of untracked code objects and of code objects
+            without assignments to annotated variables or return annotation, so no
+            local trace function is installed for their frames. Frames which only
+            need the return event get no line events.
+
+        Return values are checked at the return event, unless the frame is unwinding
+            because of an exception, i.e. it did not stop at a return instruction.
+
+        Generators and coroutines get call and return events each time they are
+            resumed and suspended (e.g. at an await). Their arguments are checked only
+            when they start, and their state is kept while they are suspended. Values
+            yielded by generators with an iterator return annotation are checked at
+            the return events of suspensions, unless an exception is unwinding the
+            frame (e.g. raised by generator.close()).
+
+        """
+        if self.over_budget:
+            return None
+        if event == "call":
+            code = frame.f_code
+            if self.profiler is None:
+                code_types = self._get_code_types(code)
+            else:
+                code_types = self._get_code_types_profiled(code)
+            if code_types is None:
+                return None
+            if not (code.co_flags & _GENERATOR_FLAGS and _is_resumed(frame)):
+                self._start_frame(frame, code_types)
+            if not code_types.has_assignments:
+                if code_types.returns is None:
+                    return None
+                if not code_types.is_generator:
+                    frame.f_trace_lines = False
+        elif event == "line":
+            self._check_line(frame, frame.f_lineno)
+        elif event == "return":
+            code = frame.f_code
+            if not (code.co_flags & _GENERATOR_FLAGS and _is_suspended(frame)):
+                self._check_return(frame, arg, _is_returning(frame))
+            else:
+                code_types = self._code_types.get(code)
+                if code_types is not None and code_types.is_generator:
+                    self._check_yield(frame, code_types.returns, arg)
+        elif event == "exception":
+            self._get_frame_state(frame).unwinding = True
+        return self._trace_function
+
+    def _wrap_callback(self, callback: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a trace callback, so that its time is charged to the overhead.
+
+        Callbacks are only wrapped if the overhead is capped. The time of calling the
+            wrapper itself is not measured.
+
+        """
+        if not self._is_timed:
+            return callback
+
+        def timed_callback(*args: Any) -> Any:
+            start = time.perf_counter_ns()
+            result = callback(*args)
+            self._add_overhead(time.perf_counter_ns() - start)
+            return result
+
+        return timed_callback
+
+    def _add_overhead(self, cost_ns: int):
+        """Add time spent in a trace callback and enforce the overhead cap.
+
+        The overhead is compared with the process CPU time every 64 events, so that
+            the CPU time is not queried on every event.
+
+        """
+        self.overhead_ns += cost_ns
+        if self.over_budget:
+            return
+        self._events_until_budget -= 1
+        if self._events_until_budget > 0:
+            return
+        self._events_until_budget = 64
+        cpu_time_ns = time.process_time_ns() - self._cpu_start_ns
+        if (
+            cpu_time_ns >= self.throttling.min_cpu_time * 1e9
+            and self.overhead_ns > self.throttling.max_overhead * cpu_time_ns
         ):
+            self.over_budget = True
+            if self.backend == "settrace":
+                threading.settrace(None)
+                sys.settrace(None)
+
+    def _start_frame(self, frame: types.FrameType, code_types: _CodeTypes):
+        """Forget stale state of a reused frame id and check arguments."""
+        self._frame_states.pop(id(frame), None)
+        self._check_arguments(frame, code_types)
+
+    def _check_arguments(self, frame: types.FrameType, code_types: _CodeTypes):
+        """Check types of function arguments at the start of a frame."""
+        if not code_types.arguments:
             return
+        if self.throttling is not None:
+            stats = self._get_line_stats(frame.f_code, frame.f_code.co_firstlineno)
+            if stats.countdown:
+                stats.countdown -= 1
+                stats.skipped += 1
+                return
+            start = time.perf_counter_ns()
+        profiler = self.profiler
+        if profiler is not None:
+            frame_start = time.perf_counter_ns()
+        # read the location directly, inspect.getframeinfo would read the source
+        module_path = frame.f_code.co_filename
+        line = frame.f_lineno
+        f_locals = frame.f_locals
+        if profiler is not None:
+            profiler.add(
+                module_path, line, overhead.FRAME, time.perf_counter_ns() - frame_start
+            )
+        passed = True
+        for varname, vartype_str in code_types.arguments.items():
+            if varname not in f_locals:
+                continue
+            if varname in code_types.variadic:
+                passed &= self._check_variadic(
+                    frame, f_locals, module_path, line, varname, vartype_str
+                )
+            else:
+                passed &= self._check_variable(
+                    frame, f_locals, module_path, line, varname, vartype_str
+                )
+        if self.throttling is not None:
+            self._update_line_stats(stats, passed, time.perf_counter_ns() - start)
 
-        for varname, varvalue in frame.f_locals.items():
-            vartype_str = self._get_type_str(
-                frameinfo.filename, frameinfo.lineno, varname
+    def _check_variadic(
+        self,
+        frame: types.FrameType,
+        f_locals: dict[str, Any],
+        module_path: str,
+        line: int,
+        varname: str,
+        vartype_str: str,
+    ) -> bool:
+        """Check each value of *args or **kwargs against their annotation."""
+        varvalues = f_locals[varname]
+        if isinstance(varvalues, dict):
+            varvalues = varvalues.values()
+        passed = True
+        for varvalue in varvalues:
+            passed &= self._check_value(
+                module_path,
+                line,
+                varname,
+                varvalue,
+                vartype_str,
+                frame.f_code.co_name,
+                frame.f_globals,
+                f_locals,
             )
-            if vartype_str is None:
+        return passed
+
+    def _check_line(self, frame: types.FrameType, line: int):
+        """Check variables assigned on the previous line and remember the new ones.
+
+        The variables assigned by a statement are checked at the first line event
+            outside of the statement, i.e. once the assignment is done.
+
+        """
+        state = self._get_frame_state(frame)
+        # the exception raised since the last line event, if any, was handled
+        state.unwinding = False
+
+        site = state.pending_site
+        if site is not None:
+            if state.pending_line <= line <= site.line_end:
+                return
+            state.pending_site = None
+            self._check_assignment(frame, state, state.pending_line, site)
+
+        site = self._types[frame.f_code.co_filename].assignments.get(line)
+        if site is not None:
+            state.pending_line = line
+            state.pending_site = site
+
+    def _get_frame_state(self, frame: types.FrameType) -> _FrameState:
+        """Get state of a frame, a new one at the first event of the frame."""
+        state = self._frame_states.get(id(frame))
+        if state is None:
+            state = self._frame_states[id(frame)] = _FrameState()
+        return state
+
+    def _check_return(self, frame: types.FrameType, retval: Any, returning: bool):
+        """Check variables assigned on the last line and the value a frame returns.
+
+        Forgets the state of the frame.
+
+        Args:
+            frame: Returning frame.
+            retval: Returned value.
+            returning: False if the frame is unwinding because of an exception, then
+                the returned value is not checked.
+
+        """
+        state = self._frame_states.pop(id(frame), None)
+        if state is not None and state.pending_site is not None:
+            self._check_assignment(frame, state, state.pending_line, state.pending_site)
+        if not returning:
+            return
+        code_types = self._code_types.get(frame.f_code)
+        if code_types is not None and code_types.returns is not None:
+            produced = "return" if code_types.is_generator else None
+            self._check_produced(frame, code_types.returns, "return", retval, produced)
+
+    def _check_yield(self, frame: types.FrameType, returns: str, varvalue: Any):
+        """Check a value yielded by a generator, unless an exception is unwinding."""
+        state = self._frame_states.get(id(frame))
+        if state is not None and state.unwinding:
+            return
+        self._check_produced(frame, returns, "yield", varvalue, "yield")
+
+    def _check_produced(
+        self,
+        frame: types.FrameType,
+        returns: str,
+        varname: str,
+        varvalue: Any,
+        produced: Optional[str],
+    ):
+        """Check a value returned by a function or yielded by a generator.
+
+        The value is saved as a variable named "yield" or "return" on the line of
+            the yield or return statement.
+
+        Args:
+            frame: Frame which produced the value.
+            returns: Return type annotation of the function.
+            varname: Either "yield" or "return".
+            varvalue: Produced value.
+            produced: None if the value is checked against the return annotation,
+                or "yield" or "return" if the function is a generator, see
+                TypeChecker._check_value.
+
+        """
+        code = frame.f_code
+        line = frame.f_lineno
+        if self.throttling is not None:
+            stats = self._get_line_stats(code, line)
+            if stats.countdown:
+                stats.countdown -= 1
+                stats.skipped += 1
+                return
+            start = time.perf_counter_ns()
+        passed = self._check_value(
+            code.co_filename,
+            line,
+            varname,
+            varvalue,
+            returns,
+            code.co_name,
+            frame.f_globals,
+            # annotations may refer to names of the enclosing function
+            frame.f_locals,
+            produced=produced,
+        )
+        if self.throttling is not None:
+            self._update_line_stats(stats, passed, time.perf_counter_ns() - start)
+
+    def _check_assignment(
+        self,
+        frame: types.FrameType,
+        state: _FrameState,
+        line: int,
+        site: AssignmentSite,
+    ):
+        """Check types of variables and attributes assigned by statements on a line.
+
+        Skips variables whose value did not change since their last check in the
+            frame.
+
+        """
+        if self.throttling is not None:
+            stats = self._get_line_stats(frame.f_code, line)
+            if stats.countdown:
+                stats.countdown -= 1
+                stats.skipped += 1
+                return
+            start = time.perf_counter_ns()
+        profiler = self.profiler
+        if profiler is not None:
+            frame_start = time.perf_counter_ns()
+        module_path = frame.f_code.co_filename
+        f_locals = frame.f_locals
+        if profiler is not None:
+            profiler.add(
+                module_path, line, overhead.FRAME, time.perf_counter_ns() - frame_start
+            )
+        checked_values = state.checked_values
+        passed = True
+        for varname in site.varnames:
+            if profiler is None:
+                vartype_str = self._get_type_str(module_path, line, varname)
+            else:
+                lookup_start = time.perf_counter_ns()
+                vartype_str = self._get_type_str(module_path, line, varname)
+                profiler.add(
+                    module_path,
+                    line,
+                    overhead.LOOKUP,
+                    time.perf_counter_ns() - lookup_start,
+                )
+            if vartype_str is None or varname not in f_locals:
+                continue
+            if self._is_unchanged(
+                checked_values, varname, f_locals[varname], vartype_str
+            ):
                 continue
+            passed &= self._check_variable(
+                frame, f_locals, module_path, line, varname, vartype_str
+            )
+        if site.attributes:
+            passed &= self._check_attributes(
+                frame, f_locals, checked_values, line, site.attributes
+            )
+        if self.throttling is not None:
+            self._update_line_stats(stats, passed, time.perf_counter_ns() - start)
 
-            vartype = eval(vartype_str, frame.f_globals, frame.f_locals)
-            type_is_correct = check_type(varvalue, vartype)
-
-            result = Result(
-                module_path=frameinfo.filename,
-                line=frameinfo.lineno,
-                varname=varname,
-                varvalue=varvalue,
-                vartype_str=vartype_str,
-                vartype=vartype,
-                type_is_correct=type_is_correct,
+    def _check_attributes(
+        self,
+        frame: types.FrameType,
+        f_locals: dict[str, Any],
+        checked_values: dict[str, tuple[Any, Optional[int], str]],
+        line: int,
+        attributes: tuple[str, ...],
+    ) -> bool:
+        """Check types of attributes of self assigned by statements on a line.
+
+        The annotations are found through the class of the method, they are saved
+            as variables named e.g. "self.x".
+
+        """
+        code_types = self._code_types.get(frame.f_code)
+        if code_types is None or code_types.self_name not in f_locals:
+            return True
+        self_name = code_types.self_name
+        obj = f_locals[self_name]
+        passed = True
+        for attribute in attributes:
+            vartype_str = code_types.attributes.get(attribute)
+            try:
+                varvalue = getattr(obj, attribute)
+            except Exception:
+                continue
+            varname = f"{self_name}.{attribute}"
+            if vartype_str is None or self._is_unchanged(
+                checked_values, varname, varvalue, vartype_str
+            ):
+                continue
+            passed &= self._check_value(
+                frame.f_code.co_filename,
+                line,
+                varname,
+                varvalue,
+                vartype_str,
+                frame.f_code.co_name,
+                frame.f_globals,
+                None,
             )
-            self.results.append(result)
+        return passed
+
+    def _is_unchanged(
+        self,
+        checked_values: dict[str, tuple[Any, Optional[int], str]],
+        varname: str,
+        varvalue: Any,
+        vartype_str: str,
+    ) -> bool:
+        """Check whether a variable is unchanged since its last check in a frame.
+
+        Remembers the value if it changed.
+
+        """
+        version = _get_version(varvalue)
+        checked = checked_values.get(varname)
+        if (
+            checked is not None
+            and checked[0] is varvalue
+            and checked[1] == version
+            and checked[2] == vartype_str
+            and (not self.strict or type(varvalue) in _IMMUTABLE_TYPES)
+        ):
+            return True
+        checked_values[varname] = (varvalue, version, vartype_str)
+        return False
+
+    def _get_line_stats(self, code: types.CodeType, line: int) -> LineStats:
+        """Get check counts and costs of a line of a code object."""
+        stats = self.line_stats.get((code, line))
+        if stats is None:
+            stats = self.line_stats[(code, line)] = LineStats()
+        return stats
+
+    def _update_line_stats(self, stats: LineStats, passed: bool, cost_ns: int):
+        """Count a check of a line, and back off or reset."""
+        throttling = self.throttling
+        stats.checks += 1
+        stats.cost_ns += cost_ns
+        if passed:
+            stats.consecutive_passes += 1
+            if stats.consecutive_passes >= throttling.passes:
+                stats.interval = min(stats.interval * 2, throttling.max_interval)
+                stats.countdown = stats.interval - 1
+        else:
+            stats.failures += 1
+            stats.consecutive_passes = 0
+            stats.interval = 1
+
+    def _check_variable(
+        self,
+        frame: types.FrameType,
+        f_locals: dict[str, Any],
+        module_path: str,
+        line: int,
+        varname: str,
+        vartype_str: str,
+    ) -> bool:
+        """Check type of one variable of a frame, save the result and return it."""
+        return self._check_value(
+            module_path,
+            line,
+            varname,
+            f_locals[varname],
+            vartype_str,
+            frame.f_code.co_name,
+            frame.f_globals,
+            f_locals,
+        )
 
-    def _get_type_str(self, module_full_path: str, line: int, varname: str) -> str:
+    def _get_type_str(
+        self, module_full_path: str, line: int, varname: str
+    ) -> Optional[str]:
         """Get type string for a module name, line number and variable name."""
-        if module_full_path not in self._types:
-            module_types = parse_module(module_full_path)
-            self._types[module_full_path] = module_types
-        return self._types[module_full_path][line].get(varname)
+        return self._get_module_types(module_full_path).types.lookup(line, varname)
 
+    def _get_module_types(self, module_full_path: str) -> ModuleTypes:
+        """Get parsed type annotations of a module.
 
-def check_type(varvalue: Any, vartype: Any) -> bool:
-    """Check whether the value fits the type."""
-    origin = typing.get_origin(vartype)
-    if origin is not None:
-        if origin in _type_checker_map:
-            return _type_checker_map[origin](varvalue, vartype)
-        raise TypeCheckError(
-            f"Didn't check type for varvalue: {varvalue}, vartype:{vartype}, "
-            f"origin: {origin}."
+        The module is parsed once, even if several threads need it at the same time.
+
+        """
+        module_types = self._types.get(module_full_path)
+        if module_types is not None:
+            return module_types
+        lock = self._parse_locks.setdefault(module_full_path, threading.Lock())
+        with lock:
+            module_types = self._types.get(module_full_path)
+            if module_types is None:
+                if self.cache is not None:
+                    module_types = self.cache.get_module_types(module_full_path)
+                else:
+                    module_types = parse_module(module_full_path)
+                self._types[module_full_path] = module_types
+        return module_types
+
+    def _get_code_types_profiled(self, code: types.CodeType) -> Optional[_CodeTypes]:
+        """Get type annotations of a code object and measure the time spent.
+
+        The time is added to line 0 of the module, it is spent on all code objects of
+            the module, including the untracked ones.
+
+        """
+        start = time.perf_counter_ns()
+        code_types = self._get_code_types(code)
+        self.profiler.add(
+            code.co_filename, 0, overhead.FILTER, time.perf_counter_ns() - start
         )
-    return isinstance(varvalue, vartype)
+        return code_types
 
+    def _get_code_types(self, code: types.CodeType) -> Optional[_CodeTypes]:
+        """Get type annotations of a code object, or None if it is not tracked.
+
+        The decision is made once per code object from its filename, the path prefix
+            and the parsed annotations of its arguments and assignments.
+
+        """
+        if code in self._code_types:
+            return self._code_types[code]
+
+        code_types = None
+        filename = code.co_filename
+        if filename.startswith(self.path_prefix) and os.path.exists(filename):
+            module_types = self._get_module_types(filename)
+            code_key = (code.co_firstlineno, code.co_name)
+            arguments = module_types.arguments.get(code_key, {})
+            has_assignments = any(
+                line in module_types.assignments
+                for _, _, line in code.co_lines()
+                if line is not None
+            )
+            returns = None
+            # async generators yield and await at the same events, they are skipped
+            if not code.co_flags & inspect.CO_ASYNC_GENERATOR:
+                returns = module_types.returns.get(code_key)
+            if arguments or has_assignments or returns is not None:
+                code_types = _CodeTypes(
+                    arguments,
+                    has_assignments,
+                    returns,
+                    bool(code.co_flags & inspect.CO_GENERATOR),
+                    _get_variadic(code),
+                )
+                method = module_types.methods.get(code_key)
+                if method is not None:
+                    class_key, code_types.self_name = method
+                    code_types.attributes = module_types.attributes.get(class_key, {})
+        self._code_types[code] = code_types
+        return code_types
+
+
+class _CodeTypes:
+    """Type annotations of a tracked code object."""
+
+    __slots__ = (
+        "arguments",
+        "has_assignments",
+        "returns",
+        "is_generator",
+        "variadic",
+        "self_name",
+        "attributes",
+        "is_monitored",
+        "line_checks",
+    )
+
+    def __init__(
+        self,
+        arguments: dict[str, str],
+        has_assignments: bool,
+        returns: Optional[str] = None,
+        is_generator: bool = False,
+        variadic: tuple[str, ...] = (),
+    ):
+        """Initialize.
+
+        Args:
+            arguments: Type annotations of function arguments.
+            has_assignments: Whether there are assignments to annotated variables
+                or attributes.
+            returns: Return type annotation, or None.
+            is_generator: Whether the code is a generator, whose yielded values are
+                checked against the return annotation.
+            variadic: Names of the *args and **kwargs arguments, whose annotations
+                apply to each of their values.
+
+        """
+        self.arguments = arguments
+        self.has_assignments = has_assignments
+        self.returns = returns
+        self.is_generator = is_generator
+        self.variadic = variadic
+        # name of self and annotations of the attributes of its class, for methods
+        self.self_name: Optional[str] = None
+        self.attributes: dict[str, str] = {}
+        self.is_monitored = False
+        # lines whose line events are needed to check assignments, for sys.monitoring
+        self.line_checks: frozenset[int] = frozenset()
+
+
+class _FrameState:
+    """State of a traced frame with assignments to annotated variables.
+
+    Attributes:
+        pending_line: First line number of the pending assignment statement.
+        pending_site: Assignment statement to be checked at the next line event.
+        checked_values: The last checked value, its version and its type string
+            for each variable.
+        unwinding: Whether an exception was raised in the frame since the last
+            line event, i.e. a suspension of a generator would be its unwinding.
+
+    """
+
+    __slots__ = ("pending_line", "pending_site", "checked_values", "unwinding")
+
+    def __init__(self):
+        """Initialize."""
+        self.pending_line: int = 0
+        self.pending_site: Optional[AssignmentSite] = None
+        self.checked_values: dict[str, tuple[Any, Optional[int], str]] = {}
+        self.unwinding = False
+
+
+_GENERATOR_FLAGS = (
+    inspect.CO_GENERATOR
+    | inspect.CO_COROUTINE
+    | inspect.CO_ASYNC_GENERATOR
+    | inspect.CO_ITERABLE_COROUTINE
+)
+_RESUME = dis.opmap.get("RESUME")
+_YIELD_VALUE = dis.opmap["YIELD_VALUE"]
+
+
+def _is_resumed(frame: types.FrameType) -> bool:
+    """Check whether the call event of a generator or coroutine frame is a resume.
+
+    The first call event stops at the RESUME instruction with oparg 0 at the start
+        of the code (Python 3.11+), or before the first instruction.
+
+    """
+    if _RESUME is None:
+        return frame.f_lasti >= 0
+    code = frame.f_code.co_code
+    offset = frame.f_lasti
+    return code[offset] != _RESUME or code[offset + 1] & 3 != 0
+
+
+_RETURN_OPCODES = frozenset(
+    dis.opmap[name] for name in ("RETURN_VALUE", "RETURN_CONST") if name in dis.opmap
+)
 
-def _check_type_list(varvalue, vartype):
-    if not isinstance(varvalue, list):
-        return False
 
+def _is_returning(frame: types.FrameType) -> bool:
+    """Check whether the return event of a frame is a return, not an unwinding.
+
+    A returning frame stops at a return instruction, an unwinding frame at the
+        instruction which raised the exception.
+
+    """
+    return frame.f_code.co_code[frame.f_lasti] in _RETURN_OPCODES
+
+
+def _is_suspended(frame: types.FrameType) -> bool:
+    """Check whether the return event of a generator or coroutine is a suspension.
+
+    A suspended frame stops at YIELD_VALUE, or at the RESUME instruction following
+        it (Python 3.13+).
+
+    """
+    code = frame.f_code.co_code
+    offset = frame.f_lasti
+    opcode = code[offset]
+    return opcode == _YIELD_VALUE or (opcode == _RESUME and code[offset + 1] & 3 != 0)
+
+
+def _get_task_name() -> Optional[str]:
+    """Get name of the running asyncio task, or None outside of tasks."""
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None or asyncio._get_running_loop() is None:
+        return None
+    task = asyncio.current_task()
+    return task.get_name() if task is not None else None
+
+
+_IMMUTABLE_TYPES = frozenset(
+    {int, float, complex, bool, str, bytes, frozenset, type(None)}
+)
+
+
+def _get_version(varvalue: Any) -> Optional[int]:
+    """Get a cheap signal of changes of a value, the length of containers."""
+    if type(varvalue) in _IMMUTABLE_TYPES:
+        return None
+    try:
+        return len(varvalue)
+    except TypeError:
+        return None
+
+
+_JUMPS = frozenset(dis.hasjrel + dis.hasjabs)
+
+
+def _get_line_checks(
+    code: types.CodeType, assignments: dict[int, AssignmentSite]
+) -> frozenset[int]:
+    """Get lines of a code object whose line events are needed to check assignments.
+
+    These are the first lines of the assignment statements, and the lines which may
+        run right after a statement, where its variables are checked. The latter are
+        found from the fall-through, jump and exception handler targets of the
+        instructions of the statement. Instructions without a line are skipped over
+        to their own targets.
+
+    """
+    bytecode = dis.Bytecode(code)
+    instructions = list(bytecode)
+    index_by_offset = {
+        instruction.offset: index for index, instruction in enumerate(instructions)
+    }
+    lines = [instruction.positions.lineno for instruction in instructions]
+    handlers = [
+        (entry.start, entry.end, index_by_offset[entry.target])
+        for entry in bytecode.exception_entries
+    ]
+
+    def get_targets(index: int) -> list[int]:
+        instruction = instructions[index]
+        targets = [index + 1] if index + 1 < len(instructions) else []
+        if instruction.opcode in _JUMPS and instruction.argval in index_by_offset:
+            targets.append(index_by_offset[instruction.argval])
+        targets += [
+            target
+            for start, end, target in handlers
+            if start <= instruction.offset < end
+        ]
+        return targets
+
+    line_checks = set()
+    for line_start in set(lines) & assignments.keys():
+        line_end = assignments[line_start].line_end
+        line_checks.add(line_start)
+        visited = set()
+        indices = [
+            index
+            for index, line in enumerate(lines)
+            if line is not None and line_start <= line <= line_end
+        ]
+        while indices:
+            for target in get_targets(indices.pop()):
+                line = lines[target]
+                if target in visited or (
+                    line is not None and line_start <= line <= line_end
+                ):
+                    continue
+                visited.add(target)
+                if line is None:
+                    indices.append(target)
+                else:
+                    line_checks.add(line)
+    return frozenset(line_checks)
+
+
+def _get_variadic(code: types.CodeType) -> tuple[str, ...]:
+    """Get names of the *args and **kwargs arguments of a code object."""
+    index = code.co_argcount + code.co_kwonlyargcount
+    count = bool(code.co_flags & inspect.CO_VARARGS) + bool(
+        code.co_flags & inspect.CO_VARKEYWORDS
+    )
+    return code.co_varnames[index : index + count]
+
+
+# ids without a reserved use first, the profiler id last; the debugger and coverage
+# ids are never taken, so that debuggers and coverage tools can start later
+_TOOL_IDS = (3, 4, 2)
+
+
+def _get_free_tool_id() -> int:
+    """Get a sys.monitoring tool id which is not used by any other tool."""
+    for tool_id in _TOOL_IDS:
+        if sys.monitoring.get_tool(tool_id) is None:
+            return tool_id
+    raise RuntimeError("No free sys.monitoring tool id.")
+
+
+def check_type(
+    varvalue: Any, vartype: Any, sampling: Optional[Sampling] = None
+) -> bool:
+    """Check whether the value fits the type.
+
+    Args:
+        varvalue: Value to check.
+        vartype: Type annotation.
+        sampling: Strategy for checking values of large containers, all values are
+            checked by default.
+
+    Returns:
+        Whether the value fits the type.
+
+    """
+    if sampling is None or sampling.strategy == "full":
+        context = None
+    else:
+        context = CheckContext(sampling)
+    return compile_type_checker(vartype)(varvalue, context)
+
+
+TypeCheckerFunction = Callable[[Any, Optional[CheckContext]], bool]
+
+
+def compile_type_checker(vartype: Any) -> TypeCheckerFunction:
+    """Compile a type annotation to a specialized checker function.
+
+    The checker functions are cached by the annotation, so each annotation is compiled
+        only once. The checker function is called with the value and a check context,
+        the context is None if all values of containers should be checked.
+
+    Args:
+        vartype: Type annotation, e.g. list[dict[int, set[str]]].
+
+    Returns:
+        Function which checks whether a value fits the type.
+
+    Raises:
+        TypeCheckError: If the type annotation is not supported.
+
+    """
+    try:
+        return _type_checker_cache[vartype]
+    except KeyError:
+        checker = _compile_type_checker(vartype)
+        _type_checker_cache[vartype] = checker
+        return checker
+    except TypeError:
+        # unhashable annotations (e.g. dict[int:int]) are not cached
+        return _compile_type_checker(vartype)
+
+
+def _compile_type_checker(vartype: Any) -> TypeCheckerFunction:
+    """Compile a type annotation to a checker function without using the cache."""
+    expanded_vartype = _expand_type_alias(vartype)
+    if expanded_vartype is not vartype:
+        return compile_type_checker(expanded_vartype)
+
+    if vartype is None:
+        return _compile_class_checker(type(None))
+    if vartype is Any:
+        return _check_always
+    origin = typing.get_origin(vartype)
+    if origin is None:
+        if not isinstance(vartype, type):
+            # e.g. type variables, which isinstance does not accept
+            raise TypeCheckError(f"Didn't check type for vartype: {vartype}.")
+        return _compile_class_checker(vartype)
+    if origin in _type_checker_map:
+        return _type_checker_map[origin](vartype)
+    optional_key = (
+        getattr(origin, "__module__", None),
+        getattr(origin, "__name__", None),
+    )
+    if optional_key in _optional_type_checker_map:
+        return _optional_type_checker_map[optional_key](vartype)
+    raise TypeCheckError(f"Didn't check type for vartype: {vartype}, origin: {origin}.")
+
+
+def _expand_type_alias(vartype: Any) -> Any:
+    """Expand type aliases created by the type statement (Python 3.12+).
+
+    E.g. numpy.typing.NDArray[numpy.int64] is expanded to
+        numpy.ndarray[Any, numpy.dtype[numpy.int64]] in recent NumPy versions.
+
+    """
+    alias_type = getattr(typing, "TypeAliasType", None)
+    if alias_type is None:
+        return vartype
+    if isinstance(vartype, alias_type):
+        return vartype.__value__
+    origin = typing.get_origin(vartype)
+    if isinstance(origin, alias_type):
+        value = origin.__value__
+        if getattr(value, "__parameters__", ()):
+            return value[typing.get_args(vartype)]
+        return value
+    return vartype
+
+
+def _compile_class_checker(vartype):
+    def check(varvalue, context):
+        return type(varvalue) is vartype or isinstance(varvalue, vartype)
+
+    return check
+
+
+def _compile_all_checker(vartype):
+    """Compile a checker of all values in an iterable."""
+    classes = _get_classes(vartype)
+    if classes is not None and len(classes) > 1:
+
+        # unions of classes are checked by isinstance in a C-level loop
+        def check_all(varvalues, context):
+            if context is not None:
+                varvalues = context.select(varvalues)
+            return all(map(isinstance, varvalues, itertools.repeat(classes)))
+
+        return check_all
+
+    if isinstance(vartype, type) and typing.get_origin(vartype) is None:
+        accepted_types = {vartype}
+
+        # inline the leaf check to avoid a function call per value
+        def check_all(varvalues, context):
+            if context is not None:
+                varvalues = context.select(varvalues)
+            if (
+                hasattr(varvalues, "__len__")
+                and len(varvalues) >= _BULK_CHECK_MIN_LENGTH
+            ):
+                return _check_all_bulk(varvalues, vartype, accepted_types)
+            for varvalue in varvalues:
+                if type(varvalue) is not vartype and not isinstance(varvalue, vartype):
+                    return False
+            return True
+
+        return check_all
+
+    checker = compile_type_checker(vartype)
+
+    def check_all(varvalues, context):
+        if context is not None:
+            varvalues = context.select(varvalues)
+        return all(map(checker, varvalues, itertools.repeat(context)))
+
+    return check_all
+
+
+_BULK_CHECK_MIN_LENGTH = 64
+
+
+def _check_all_bulk(varvalues: Collection, vartype: type, accepted_types: set[type]):
+    """Check all values of a container against a class in C-level loops.
+
+    The values are mapped to their types and the types equal to vartype are counted
+        without any Python-level loop. Only if other types are present, the distinct
+        types are collected and checked once each. Types found to be subclasses of
+        vartype are added to accepted_types.
+
+    """
+    if operator.countOf(map(type, varvalues), vartype) == len(varvalues):
+        return True
+    for value_type in set(map(type, varvalues)) - accepted_types:
+        if not issubclass(value_type, vartype):
+            # isinstance may still pass, e.g. for objects overriding __class__
+            return all(isinstance(varvalue, vartype) for varvalue in varvalues)
+        accepted_types.add(value_type)
+    return True
+
+
+def _check_never(varvalue, context):
+    return False
+
+
+def _check_always(varvalue, context):
+    return True
+
+
+def _get_classes(vartype: Any) -> Optional[tuple[type, ...]]:
+    """Get classes of an annotation which is a class or a union of classes.
+
+    Returns:
+        Tuple of the classes for isinstance, None stands for NoneType, or None if
+            the annotation is not a class or some member of the union is not.
+
+    """
+    if vartype is None:
+        return (type(None),)
+    if typing.get_origin(vartype) in _union_origins:
+        members = tuple(_get_classes(arg) for arg in typing.get_args(vartype))
+        if None in members:
+            return None
+        return tuple(dict.fromkeys(itertools.chain.from_iterable(members)))
+    if isinstance(vartype, type) and typing.get_origin(vartype) is None:
+        return (vartype,)
+    return None
+
+
+def _compile_list_checker(vartype):
     args = vartype.__args__
     if len(args) != 1:
-        return False
+        return _check_never
 
-    inner_type = args[0]
-    for inner_value in varvalue:
-        if not check_type(inner_value, inner_type):
+    check_all = _compile_all_checker(args[0])
+
+    def check(varvalue, context):
+        if type(varvalue) is not list and not isinstance(varvalue, list):
             return False
-    return True
+        return check_all(varvalue, context)
 
+    return check
 
-def _check_type_set(varvalue, vartype):
-    if not isinstance(varvalue, set):
-        return False
 
+def _compile_set_checker(vartype):
     args = vartype.__args__
     if len(args) != 1:
-        return False
+        return _check_never
+
+    check_all = _compile_all_checker(args[0])
 
-    inner_type = args[0]
-    for inner_value in varvalue:
-        if not check_type(inner_value, inner_type):
+    def check(varvalue, context):
+        if type(varvalue) is not set and not isinstance(varvalue, set):
             return False
-    return True
+        return check_all(varvalue, context)
 
+    return check
 
-def _check_type_dict(varvalue, vartype):
-    if not isinstance(varvalue, dict):
-        return False
 
+def _compile_dict_checker(vartype):
     args = vartype.__args__
     if len(args) != 2:
-        return False
+        return _check_never
 
     key_type, value_type = args
-    for key_value, value_value in varvalue.items():
-        if not check_type(key_value, key_type) or not check_type(
-            value_value, value_type
-        ):
+    check_all_keys = _compile_all_checker(key_type)
+    check_all_values = _compile_all_checker(value_type)
+
+    def check(varvalue, context):
+        if type(varvalue) is not dict and not isinstance(varvalue, dict):
             return False
-    return True
+        return check_all_keys(varvalue.keys(), context) and check_all_values(
+            varvalue.values(), context
+        )
+
+    return check
+
+
+def _compile_union_checker(vartype):
+    """Compile a checker of unions, e.g. Optional[int] or list[int] | None.
+
+    The classes of the union are checked by a single isinstance call with a tuple,
+        the other members by their checkers in order.
+
+    """
+    args = typing.get_args(vartype)
+    if Any in args:
+        return _check_always
+    classes = tuple(
+        dict.fromkeys(
+            itertools.chain.from_iterable(
+                filter(None, (_get_classes(arg) for arg in args))
+            )
+        )
+    )
+    checkers = tuple(
+        compile_type_checker(arg) for arg in args if _get_classes(arg) is None
+    )
+    if not checkers:
+
+        def check_classes(varvalue, context):
+            return isinstance(varvalue, classes)
+
+        return check_classes
+
+    def check(varvalue, context):
+        if isinstance(varvalue, classes):
+            return True
+        for checker in checkers:
+            if checker(varvalue, context):
+                return True
+        return False
+
+    return check
+
 
+def _compile_literal_checker(vartype):
+    """Compile a checker of literals, e.g. Literal["r", "w"].
+
+    The values are compared together with their types, so that e.g. True does not
+        fit Literal[1]. The type is checked first, so that unhashable values never
+        reach the set.
+
+    """
+    args = typing.get_args(vartype)
+    literal_types = frozenset(type(arg) for arg in args)
+    literals = frozenset((type(arg), arg) for arg in args)
+
+    def check(varvalue, context):
+        value_type = type(varvalue)
+        return value_type in literal_types and (value_type, varvalue) in literals
+
+    return check
+
+
+def _compile_tuple_checker(vartype):
+    """Compile a checker of tuples, e.g. tuple[int, str] or tuple[int, ...].
+
+    Items of fixed-length tuples are checked positionally, inlining isinstance for
+        items annotated with classes.
+
+    """
+    if vartype is typing.Tuple:
+        return _compile_class_checker(tuple)
+    args = typing.get_args(vartype)
+    if len(args) == 2 and args[1] is Ellipsis:
+        check_all = _compile_all_checker(args[0])
+
+        def check_variadic(varvalue, context):
+            if type(varvalue) is not tuple and not isinstance(varvalue, tuple):
+                return False
+            return check_all(varvalue, context)
+
+        return check_variadic
+
+    length = len(args)
+    item_classes = tuple(_get_classes(arg) for arg in args)
+    if None not in item_classes:
+
+        def check_classes(varvalue, context):
+            if type(varvalue) is not tuple and not isinstance(varvalue, tuple):
+                return False
+            if len(varvalue) != length:
+                return False
+            for item, classes in zip(varvalue, item_classes):
+                if not isinstance(item, classes):
+                    return False
+            return True
+
+        return check_classes
+
+    item_checkers = tuple(compile_type_checker(arg) for arg in args)
+
+    def check(varvalue, context):
+        if type(varvalue) is not tuple and not isinstance(varvalue, tuple):
+            return False
+        if len(varvalue) != length:
+            return False
+        for item, checker in zip(varvalue, item_checkers):
+            if not checker(item, context):
+                return False
+        return True
+
+    return check
+
+
+def _compile_callable_checker(vartype):
+    """Compile a checker of callables, the signature is not checked."""
+
+    def check(varvalue, context):
+        return callable(varvalue)
+
+    return check
+
+
+def _compile_array_checker(vartype):
+    args = vartype.__args__
+    if len(args) != 1:
+        return _check_never
+
+    item_type = args[0]
+
+    def check(varvalue, context):
+        if not isinstance(varvalue, array.array):
+            return False
+        return _is_item_type(_array_typecode_types.get(varvalue.typecode), item_type)
+
+    return check
+
+
+def _compile_ndarray_checker(vartype):
+    """Compile a checker of NumPy arrays, e.g. numpy.typing.NDArray[numpy.int64].
+
+    Only the dtype of the array is checked, so the check takes constant time.
+
+    """
+    numpy = sys.modules["numpy"]
+    args = vartype.__args__
+    if len(args) != 2:
+        return _check_never
+
+    dtype_args = typing.get_args(args[1])
+    scalar_type = dtype_args[0] if len(dtype_args) == 1 else None
+    scalar_type = typing.get_origin(scalar_type) or scalar_type
+    if scalar_type is Any or not isinstance(scalar_type, type):
+        scalar_type = None
+
+    def check(varvalue, context):
+        if not isinstance(varvalue, numpy.ndarray):
+            return False
+        return scalar_type is None or numpy.issubdtype(varvalue.dtype, scalar_type)
+
+    return check
+
+
+def _compile_iterable_checker(vartype):
+    """Compile a checker of iterables which never consumes single-pass iterables.
+
+    Values of re-iterable collections, e.g. a list annotated as Iterable[int], are
+        checked like values of lists. Iterators and generators are only checked to
+        implement the protocol of the annotation. Their values are checked lazily
+        where they are produced, i.e. when a traced generator whose return type is
+        annotated yields them, see _get_produced_type.
+
+    """
+    origin = typing.get_origin(vartype)
+    args = typing.get_args(vartype)
+    if origin is not Iterable or not args:
+
+        def check_protocol(varvalue, context):
+            return isinstance(varvalue, origin)
+
+        return check_protocol
+
+    if len(args) != 1:
+        return _check_never
+
+    check_all = _compile_all_checker(args[0])
+
+    def check(varvalue, context):
+        if not isinstance(varvalue, Iterable):
+            return False
+        if isinstance(varvalue, Iterator) or not isinstance(varvalue, Collection):
+            return True
+        return check_all(varvalue, context)
+
+    return check
+
+
+def _get_produced_type(vartype: Any, produced: str) -> Any:
+    """Get type of the values yielded or returned by a generator.
+
+    Args:
+        vartype: Return type annotation of the generator, e.g. Iterator[int] or
+            Generator[int, None, str].
+        produced: Either "yield" or "return".
+
+    Returns:
+        Type of the values, or None if they are not checked, e.g. if the
+            annotation is not parameterized or the type is Any.
+
+    """
+    origin = typing.get_origin(vartype)
+    args = typing.get_args(vartype)
+    if origin in (Iterable, Iterator) and len(args) == 1:
+        produced_types = {"yield": args[0]}
+    elif origin is Generator and len(args) == 3:
+        produced_types = {"yield": args[0], "return": args[2]}
+    else:
+        return None
+    produced_type = produced_types.get(produced)
+    return produced_type if produced_type is not Any else None
+
+
+def _is_item_type(item_type: Optional[type], vartype: Any) -> bool:
+    """Check whether items of a buffer with item_type fit the type."""
+    if item_type is None:
+        return False
+    if vartype is Any:
+        return True
+    return isinstance(vartype, type) and issubclass(item_type, vartype)
+
+
+_array_typecode_types = {
+    **dict.fromkeys("bBhHiIlLqQ", int),
+    **dict.fromkeys("fd", float),
+    **dict.fromkeys("uw", str),
+}
+
+_union_origins = (typing.Union, types.UnionType)
 
 _type_checker_map = {
-    list: _check_type_list,
-    set: _check_type_set,
-    dict: _check_type_dict,
+    typing.Union: _compile_union_checker,
+    types.UnionType: _compile_union_checker,
+    typing.Literal: _compile_literal_checker,
+    tuple: _compile_tuple_checker,
+    collections.abc.Callable: _compile_callable_checker,
+    list: _compile_list_checker,
+    set: _compile_set_checker,
+    dict: _compile_dict_checker,
+    array.array: _compile_array_checker,
+    Iterable: _compile_iterable_checker,
+    Iterator: _compile_iterable_checker,
+    Generator: _compile_iterable_checker,
+    AsyncIterable: _compile_iterable_checker,
+    AsyncIterator: _compile_iterable_checker,
+    AsyncGenerator: _compile_iterable_checker,
+}
+# checkers of optional dependencies, keyed by (module, name) of the origin
+_optional_type_checker_map = {
+    ("numpy", "ndarray"): _compile_ndarray_checker,
 }
+_type_checker_cache: dict[Any, TypeCheckerFunction] = {}
 
 if __name__ == "__main__":
     import runpy
@@ -0,0 +1,337 @@
+"""Module for checking types of decorated functions without tracing."""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import types
+
+from typing import Any, Callable, Optional, TypeVar
+
+from pydytype.check import (
+    Sampling,
+    TypeCheckError,
+    TypeChecker,
+    compile_type_checker,
+)
+from pydytype.sink import ResultSink
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_CHECKED_ATTRIBUTE = "__pydytype_checked__"
+
+
+class DecoratorTypeChecker(TypeChecker):
+    """Checks arguments and return values of decorated functions.
+
+    Functions are wrapped by the checked method. The annotations of the parameters
+        and the return value are read once when the function is decorated, and
+        resolved and compiled to checker functions at the first call, so that they
+        may refer to names defined after the function. Each call then checks the
+        passed arguments and the return value with the compiled checkers, without
+        any tracing, and saves the results to self.results, the same way as the
+        other checkers. Default values of parameters are not checked.
+
+    The results are saved on the first line of the function (the first decorator),
+        return values as a variable named "return". Return values of coroutine
+        functions are checked once they are awaited. Annotations which cannot be
+        resolved or are not supported, e.g. type variables, are not checked, they
+        are saved to self.unchecked once.
+
+    Attributes:
+        sampling: Strategy for checking values of large containers, or None to check
+            all values.
+        sink: Sink which streams every result while the program runs, or None.
+        results: Store of aggregated type checking results.
+        resolver: Cache of resolved type annotations, see resolver.stats for the
+            number of cache hits and misses.
+        unchecked: Annotations which are not checked, keyed by module path, line,
+            variable name and type annotation string, with the error message.
+
+    """
+
+    def __init__(
+        self,
+        sampling: Optional[Sampling] = None,
+        sink: Optional[ResultSink] = None,
+    ):
+        """Initialize.
+
+        Args:
+            sampling: Strategy for checking values of large containers, all values
+                are checked by default.
+            sink: Sink which streams every result, results are only aggregated in
+                memory by default.
+
+        """
+        super().__init__(sampling=sampling, sink=sink)
+
+    def checked(self, function: _F) -> _F:
+        """Wrap a function, so that its arguments and return value are checked.
+
+        Args:
+            function: Function or coroutine function with annotations.
+
+        Returns:
+            Wrapped function, or the function itself if it has no annotations or
+                is already checked.
+
+        """
+        if getattr(function, _CHECKED_ATTRIBUTE, False):
+            return function
+        validator = _Validator(function)
+        if not validator.annotations:
+            return function
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                self._check_arguments(validator, args, kwargs)
+                result = await function(*args, **kwargs)
+                if validator.returns is not None:
+                    self._check(validator, validator.returns, result)
+                return result
+
+            wrapper: Any = async_wrapper
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                self._check_arguments(validator, args, kwargs)
+                result = function(*args, **kwargs)
+                if validator.returns is not None:
+                    self._check(validator, validator.returns, result)
+                return result
+
+        setattr(wrapper, _CHECKED_ATTRIBUTE, True)
+        return wrapper
+
+    def instrument(self, module: types.ModuleType) -> int:
+        """Check all annotated functions and methods defined in a module.
+
+        Functions and classes of the module are replaced by checked functions in
+            the module namespace, methods (including static and class methods) in
+            the class namespace. Functions imported from other modules and
+            references to the original functions kept elsewhere are not checked.
+
+        Args:
+            module: Imported module.
+
+        Returns:
+            Number of checked functions.
+
+        """
+        count = 0
+        for name, obj in list(vars(module).items()):
+            if getattr(obj, "__module__", None) != module.__name__:
+                continue
+            if isinstance(obj, types.FunctionType):
+                checked_function = self.checked(obj)
+                if checked_function is not obj:
+                    setattr(module, name, checked_function)
+                    count += 1
+            elif isinstance(obj, type):
+                count += self._instrument_class(obj)
+        return count
+
+    def _instrument_class(self, cls: type) -> int:
+        """Check all annotated methods defined in a class."""
+        count = 0
+        for name, attribute in list(vars(cls).items()):
+            if isinstance(attribute, (staticmethod, classmethod)):
+                checked_function = self.checked(attribute.__func__)
+                if checked_function is not attribute.__func__:
+                    setattr(cls, name, type(attribute)(checked_function))
+                    count += 1
+            elif isinstance(attribute, types.FunctionType):
+                checked_function = self.checked(attribute)
+                if checked_function is not attribute:
+                    setattr(cls, name, checked_function)
+                    count += 1
+        return count
+
+    def _check_arguments(
+        self,
+        validator: _Validator,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ):
+        """Check arguments of a call of a checked function."""
+        if validator.positional is None:
+            self._compile(validator)
+        positional = validator.positional
+        for index, varvalue in enumerate(args):
+            if index < len(positional):
+                check = positional[index]
+            else:
+                check = validator.var_positional
+            if check is not None:
+                self._check(validator, check, varvalue)
+        keyword = validator.keyword
+        for varname, varvalue in kwargs.items():
+            if varname in keyword:
+                check = keyword[varname]
+            else:
+                check = validator.var_keyword
+            if check is not None:
+                self._check(validator, check, varvalue)
+
+    def _check(self, validator: _Validator, check: _Check, varvalue: Any):
+        """Check a value with a compiled check and save the result."""
+        varname, vartype_str, vartype, checker = check
+        context = self._make_context()
+        try:
+            type_is_correct = checker(varvalue, context)
+        except TypeError as error:
+            # e.g. isinstance of a protocol which is not runtime checkable
+            self._add_unchecked(validator, varname, vartype_str, error)
+            return
+        self._add_result(
+            validator.module_path,
+            validator.line,
+            varname,
+            varvalue,
+            vartype_str,
+            vartype,
+            type_is_correct,
+            context,
+        )
+
+    def _compile(self, validator: _Validator):
+        """Resolve the annotations of a function and compile their checkers.
+
+        Annotations which cannot be resolved or compiled are left unchecked.
+
+        """
+        checks: dict[str, _Check] = {}
+        for varname, annotation in validator.annotations.items():
+            if isinstance(annotation, str):
+                vartype_str = annotation
+            else:
+                vartype_str = inspect.formatannotation(annotation)
+            try:
+                if isinstance(annotation, str):
+                    vartype = self.resolver.resolve(
+                        validator.module_path,
+                        validator.scope,
+                        annotation,
+                        validator.f_globals,
+                    )
+                else:
+                    vartype = annotation
+                checker = compile_type_checker(vartype)
+            except (TypeCheckError, NameError, AttributeError, TypeError) as error:
+                self._add_unchecked(validator, varname, vartype_str, error)
+                continue
+            checks[varname] = (varname, vartype_str, vartype, checker)
+
+        validator.keyword = {
+            varname: checks.get(varname) for varname in validator.keyword_names
+        }
+        validator.var_positional = checks.get(validator.var_positional_name)
+        validator.var_keyword = checks.get(validator.var_keyword_name)
+        validator.returns = checks.get("return")
+        validator.positional = [
+            checks.get(varname) for varname in validator.positional_names
+        ]
+
+    def _add_unchecked(
+        self,
+        validator: _Validator,
+        varname: str,
+        vartype_str: str,
+        error: Exception,
+    ):
+        """Save an annotation which is not checked."""
+        key = (validator.module_path, validator.line, varname, vartype_str)
+        self.unchecked[key] = f"{type(error).__name__}: {error}"
+
+
+# variable name, type annotation string, type annotation and checker function
+_Check = tuple[str, str, Any, Callable[[Any, Any], bool]]
+
+
+class _Validator:
+    """Compiled checks of the parameters and the return value of a function.
+
+    The names of the parameters are read when the function is decorated, the
+        checks are compiled at the first call.
+
+    """
+
+    __slots__ = (
+        "module_path",
+        "line",
+        "scope",
+        "f_globals",
+        "annotations",
+        "positional_names",
+        "keyword_names",
+        "var_positional_name",
+        "var_keyword_name",
+        "positional",
+        "keyword",
+        "var_positional",
+        "var_keyword",
+        "returns",
+    )
+
+    def __init__(self, function: Callable[..., Any]):
+        """Read the parameters and annotations of a function."""
+        code = getattr(inspect.unwrap(function), "__code__", None)
+        self.module_path = code.co_filename if code is not None else ""
+        self.line = code.co_firstlineno if code is not None else 0
+        self.scope = function.__name__
+        self.f_globals: dict[str, Any] = getattr(function, "__globals__", {})
+        self.annotations: dict[str, Any] = dict(
+            getattr(function, "__annotations__", None) or {}
+        )
+        self.positional_names: list[str] = []
+        self.keyword_names: list[str] = []
+        self.var_positional_name: Optional[str] = None
+        self.var_keyword_name: Optional[str] = None
+        for parameter in inspect.signature(function).parameters.values():
+            kind = parameter.kind
+            if kind == parameter.VAR_POSITIONAL:
+                self.var_positional_name = parameter.name
+            elif kind == parameter.VAR_KEYWORD:
+                self.var_keyword_name = parameter.name
+            else:
+                if kind != parameter.KEYWORD_ONLY:
+                    self.positional_names.append(parameter.name)
+                if kind != parameter.POSITIONAL_ONLY:
+                    self.keyword_names.append(parameter.name)
+
+        self.positional: Optional[list[Optional[_Check]]] = None
+        self.keyword: dict[str, Optional[_Check]] = {}
+        self.var_positional: Optional[_Check] = None
+        self.var_keyword: Optional[_Check] = None
+        self.returns: Optional[_Check] = None
+
+
+_default_checker = DecoratorTypeChecker()
+
+
+def get_default_checker() -> DecoratorTypeChecker:
+    """Get the checker used by checked and instrument, which holds their results."""
+    return _default_checker
+
+
+def checked(function: _F) -> _F:
+    """Decorate a function, so that its arguments and return value are checked.
+
+    Results are saved to get_default_checker().results, see
+        DecoratorTypeChecker.checked.
+
+    """
+    return _default_checker.checked(function)
+
+
+def instrument(module: types.ModuleType) -> int:
+    """Check all annotated functions and methods defined in a module.
+
+    Results are saved to get_default_checker().results, see
+        DecoratorTypeChecker.instrument.
+
+    """
+    return _default_checker.instrument(module)
@@ -0,0 +1,500 @@
+"""Module for checking types of variables by instrumenting modules at import time."""
+
+from __future__ import annotations
+
+import ast
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+from typing import Any, Callable, Optional
+
+from pydytype.check import Sampling, TypeChecker
+from pydytype.parse import (
+    ModuleTypes,
+    ModuleTypesIntermediateStore,
+    ModuleTypesParser,
+)
+from pydytype.sink import ResultSink
+
+_CHECK_FUNCTION_NAME = "__pydytype_check__"
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImportHookTypeChecker(TypeChecker):
+    """Checks types by rewriting modules when they are imported.
+
+    The checker installs an import hook (a sys.meta_path finder). Modules imported
+        while the hook is installed are rewritten, so that function arguments are
+        checked at the start of the function and variables are checked right after
+        each assignment to them. The results are saved to self.results, the same way
+        as with TraceTypeChecker.
+
+    Unlike tracing, the checker does not slow down code without annotations, and
+        it can run alongside debuggers and coverage tools. Modules imported before
+        the hook was installed are not checked.
+
+    Attributes:
+        path_prefix: Types will be checked only in modules with this prefix.
+        sampling: Strategy for checking values of large containers, or None to check
+            all values.
+        sink: Sink which streams every result while the program runs, or None.
+        results: Store of aggregated type checking results.
+        resolver: Cache of resolved type annotations, see resolver.stats for the
+            number of cache hits and misses.
+
+    """
+
+    def __init__(
+        self,
+        path_prefix: str = "",
+        sampling: Optional[Sampling] = None,
+        sink: Optional[ResultSink] = None,
+    ):
+        """Initialize.
+
+        Args:
+            path_prefix: Types will be checked only in modules with this prefix.
+            sampling: Strategy for checking values of large containers, all values
+                are checked by default.
+            sink: Sink which streams every result, results are only aggregated in
+                memory by default.
+
+        """
+        super().__init__(path_prefix=path_prefix, sampling=sampling, sink=sink)
+        self._finder = _InstrumentingFinder(self)
+        self._is_installed = False
+
+    def install(self):
+        """Install the import hook."""
+        if not self._is_installed:
+            sys.meta_path.insert(0, self._finder)
+            _installed_checkers[id(self)] = self
+            self._is_installed = True
+
+    def uninstall(self):
+        """Uninstall the import hook and stop checking in instrumented modules."""
+        if self._is_installed:
+            sys.meta_path.remove(self._finder)
+            del _installed_checkers[id(self)]
+            self._is_installed = False
+
+    def instrument(self, source: bytes, module_path: str) -> ast.Module:
+        """Parse module source code and insert type checks.
+
+        Args:
+            source: Source code of the module.
+            module_path: Path of the module.
+
+        Returns:
+            Instrumented module node.
+
+        """
+        types_store = ModuleTypesIntermediateStore()
+        parser = ModuleTypesParser(types_store)
+        node = parser.parse_source(importlib.util.decode_source(source), module_path)
+        module_types = types_store.get_module_types()
+
+        node = _InstrumentingTransformer(module_types).visit(node)
+        node.body[_get_prologue_index(node.body) : 0] = _make_prologue(
+            id(self), module_path
+        )
+        return ast.fix_missing_locations(node)
+
+    def _is_instrumented(self, module_path: str) -> bool:
+        """Decide whether a module should be instrumented."""
+        return module_path.startswith(self.path_prefix) and not module_path.startswith(
+            _PACKAGE_DIR
+        )
+
+
+class _InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """Finds source modules under the path prefix and instruments them."""
+
+    def __init__(self, checker: ImportHookTypeChecker):
+        """Initialize.
+
+        Args:
+            checker: Checker which instruments the modules and collects results.
+
+        """
+        self._checker = checker
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None):
+        """Find module spec with an instrumenting loader."""
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if (
+            spec is None
+            or not isinstance(spec.loader, importlib.machinery.SourceFileLoader)
+            or not self._checker._is_instrumented(spec.origin)
+        ):
+            return None
+        spec.loader = _InstrumentingLoader(fullname, spec.origin, self._checker)
+        return spec
+
+
+class _InstrumentingLoader(importlib.machinery.SourceFileLoader):
+    """Loads source modules with inserted type checks.
+
+    Bytecode cache is neither read nor written, so that instrumented and plain
+        bytecode never get mixed.
+
+    """
+
+    def __init__(self, fullname: str, path: str, checker: ImportHookTypeChecker):
+        """Initialize.
+
+        Args:
+            fullname: Full name of the module.
+            path: Path of the module source.
+            checker: Checker which instruments the module.
+
+        """
+        super().__init__(fullname, path)
+        self._checker = checker
+
+    def get_code(self, fullname: str):
+        """Get code object of the instrumented module."""
+        source_path = self.get_filename(fullname)
+        return self.source_to_code(self.get_data(source_path), source_path)
+
+    def source_to_code(self, data: bytes, path: str, *, _optimize: int = -1):
+        """Compile instrumented module source."""
+        node = self._checker.instrument(data, path)
+        return compile(node, path, "exec", dont_inherit=True, optimize=_optimize)
+
+    def set_data(self, path: str, data: bytes, *, _mode: int = 0o666):
+        """Do not write bytecode cache."""
+        pass
+
+
+class _InstrumentingTransformer(ast.NodeTransformer):
+    """Inserts type check calls after assignments and at the start of functions.
+
+    Which variables are checked is given by the type annotations parsed with
+        ModuleTypesParser, so the checks follow its scope logic.
+
+    In functions with a return type annotation, the values of return statements
+        (and of yield expressions in generator functions) are passed through check
+        calls, so they are checked when the function produces them. Assignments to
+        annotated attributes of self in methods are checked like variables.
+
+    """
+
+    def __init__(self, module_types: ModuleTypes):
+        """Initialize.
+
+        Args:
+            module_types: Type annotations parsed from the module.
+
+        """
+        self._module_types = module_types
+        # return type annotation of the function being visited, whether it is
+        # a generator function, and the name of self and the annotated attributes
+        # of its class if it is a method
+        self._returns: Optional[str] = None
+        self._is_generator = False
+        self._method: Optional[tuple[str, dict[str, str]]] = None
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        """Insert argument checks at the start of the function body."""
+        first_line = min([node.lineno] + [dec.lineno for dec in node.decorator_list])
+        code_key = (first_line, node.name)
+        outer = (self._returns, self._is_generator, self._method)
+        self._returns = self._module_types.returns.get(code_key)
+        self._is_generator = _is_generator(node)
+        if isinstance(node, ast.AsyncFunctionDef) and self._is_generator:
+            self._returns = None
+        self._method = None
+        if code_key in self._module_types.methods:
+            class_key, self_name = self._module_types.methods[code_key]
+            attributes = self._module_types.attributes.get(class_key, {})
+            self._method = (self_name, attributes)
+        self.generic_visit(node)
+        self._returns, self._is_generator, self._method = outer
+        arguments = self._module_types.arguments.get((first_line, node.name), {})
+        variadic = {arg.arg for arg in (node.args.vararg, node.args.kwarg) if arg}
+        checks = [
+            _make_check(
+                node, first_line, varname, vartype_str, variadic=varname in variadic
+            )
+            for varname, vartype_str in arguments.items()
+        ]
+        node.body[_get_prologue_index(node.body) : 0] = checks
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        """Do not check attributes assigned in class bodies within methods."""
+        outer_method = self._method
+        self._method = None
+        self.generic_visit(node)
+        self._method = outer_method
+        return node
+
+    def visit_Lambda(self, node: ast.Lambda):
+        """Do not check yields of lambdas within generators."""
+        outer_returns = self._returns
+        self._returns = None
+        self.generic_visit(node)
+        self._returns = outer_returns
+        return node
+
+    def visit_Yield(self, node: ast.Yield):
+        """Check the yielded value."""
+        self.generic_visit(node)
+        if self._returns is not None and self._is_generator:
+            node.value = self._make_produced_check(node, node.value, "yield", "yield")
+        return node
+
+    def visit_Return(self, node: ast.Return):
+        """Check the returned value."""
+        self.generic_visit(node)
+        if self._returns is not None:
+            produced = "return" if self._is_generator else None
+            node.value = self._make_produced_check(node, node.value, "return", produced)
+        return node
+
+    def visit_Assign(self, node: ast.Assign):
+        """Insert checks after the assignment."""
+        self.generic_visit(node)
+        return [node] + self._make_assignment_checks(node, node.targets)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        """Insert check after the assignment."""
+        self.generic_visit(node)
+        if node.value is None:
+            return node
+        return [node] + self._make_assignment_checks(node, [node.target])
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        """Insert check after the assignment."""
+        self.generic_visit(node)
+        return [node] + self._make_assignment_checks(node, [node.target])
+
+    def visit_For(self, node: ast.For):
+        """Insert checks at the start of the loop body."""
+        self.generic_visit(node)
+        node.body[0:0] = self._make_assignment_checks(node, [node.target])
+        return node
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node: ast.With):
+        """Insert checks at the start of the body."""
+        self.generic_visit(node)
+        targets = [item.optional_vars for item in node.items if item.optional_vars]
+        node.body[0:0] = self._make_assignment_checks(node, targets)
+        return node
+
+    visit_AsyncWith = visit_With
+
+    def visit_NamedExpr(self, node: ast.NamedExpr):
+        """Check the assigned value, which is the value of the expression."""
+        self.generic_visit(node)
+        site = self._module_types.assignments.get(node.lineno)
+        varname = node.target.id
+        if site is None or varname not in site.varnames:
+            return node
+        vartype_str = self._module_types.types.lookup(node.lineno, varname)
+        return _make_check(node, node.lineno, varname, vartype_str, node).value
+
+    def _make_assignment_checks(
+        self, node: ast.stmt, targets: list[ast.expr]
+    ) -> list[ast.stmt]:
+        """Make check statements of variables and attributes assigned by a statement."""
+        site = self._module_types.assignments.get(node.lineno)
+        if site is None:
+            return []
+        targets = _flatten_targets(targets)
+        types = self._module_types.types
+        checks = []
+        varnames = [target.id for target in targets if isinstance(target, ast.Name)]
+        for varname in dict.fromkeys(varnames):
+            if varname in site.varnames:
+                vartype_str = types.lookup(node.lineno, varname)
+                checks.append(_make_check(node, node.lineno, varname, vartype_str))
+        if not site.attributes or self._method is None:
+            return checks
+        self_name, attributes = self._method
+        assigned = [
+            target.attr
+            for target in targets
+            if isinstance(target, ast.Attribute)
+            and isinstance(target.value, ast.Name)
+            and target.value.id == self_name
+        ]
+        for attribute in dict.fromkeys(assigned):
+            if attribute in site.attributes and attribute in attributes:
+                checks.append(
+                    _make_check(
+                        node,
+                        node.lineno,
+                        f"{self_name}.{attribute}",
+                        attributes[attribute],
+                        _make_attribute(self_name, attribute),
+                    )
+                )
+        return checks
+
+    def _make_produced_check(
+        self,
+        node: ast.AST,
+        value: Optional[ast.expr],
+        varname: str,
+        produced: Optional[str],
+    ) -> ast.expr:
+        """Make a check call which returns the checked value of a function."""
+        call = ast.Call(
+            func=ast.Name(id=_CHECK_FUNCTION_NAME, ctx=ast.Load()),
+            args=[
+                ast.Constant(node.lineno),
+                ast.Constant(varname),
+                value if value is not None else ast.Constant(None),
+                ast.Constant(self._returns),
+                ast.Constant(produced),
+            ],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+
+def _is_generator(node: ast.FunctionDef) -> bool:
+    """Check whether a function contains yield expressions outside nested scopes."""
+    nodes = list(ast.iter_child_nodes(node))
+    while nodes:
+        child = nodes.pop()
+        if isinstance(child, (ast.Yield, ast.YieldFrom)):
+            return True
+        if not isinstance(
+            child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+        ):
+            nodes.extend(ast.iter_child_nodes(child))
+    return False
+
+
+def _flatten_targets(targets: list[ast.expr]) -> list[ast.expr]:
+    """Get assignment targets with tuple, list and starred targets unpacked."""
+    flat = []
+    for target in targets:
+        if isinstance(target, (ast.Tuple, ast.List)):
+            flat.extend(_flatten_targets(target.elts))
+        elif isinstance(target, ast.Starred):
+            flat.extend(_flatten_targets([target.value]))
+        else:
+            flat.append(target)
+    return flat
+
+
+def _make_check(
+    node: ast.AST,
+    line: int,
+    varname: str,
+    vartype_str: str,
+    value: Optional[ast.expr] = None,
+    variadic: bool = False,
+) -> ast.stmt:
+    """Make a statement which checks type of a variable.
+
+    The checked value is the variable itself unless another expression is given.
+        Each value of *args and **kwargs arguments (variadic) is checked separately.
+
+    """
+    call = ast.Call(
+        func=ast.Name(id=_CHECK_FUNCTION_NAME, ctx=ast.Load()),
+        args=[
+            ast.Constant(line),
+            ast.Constant(varname),
+            value if value is not None else ast.Name(id=varname, ctx=ast.Load()),
+            ast.Constant(vartype_str),
+        ],
+        keywords=(
+            [ast.keyword(arg="variadic", value=ast.Constant(True))] if variadic else []
+        ),
+    )
+    return ast.copy_location(ast.Expr(call), node)
+
+
+def _make_attribute(name: str, attribute: str) -> ast.expr:
+    """Make an expression which gets an attribute of a variable."""
+    return ast.Attribute(
+        value=ast.Name(id=name, ctx=ast.Load()), attr=attribute, ctx=ast.Load()
+    )
+
+
+def _make_prologue(checker_id: int, module_path: str) -> list[ast.stmt]:
+    """Make module statements which define the check function."""
+    source = (
+        f"{_CHECK_FUNCTION_NAME} = __import__("
+        f"'pydytype.hook', fromlist=['_get_check_function']"
+        f")._get_check_function({checker_id}, {module_path!r})"
+    )
+    return ast.parse(source).body
+
+
+def _get_prologue_index(body: list[ast.stmt]) -> int:
+    """Get index of the first statement after docstring and __future__ imports."""
+    index = 0
+    if (
+        body
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    ):
+        index = 1
+    while (
+        index < len(body)
+        and isinstance(body[index], ast.ImportFrom)
+        and body[index].module == "__future__"
+    ):
+        index += 1
+    return index
+
+
+_installed_checkers: dict[int, ImportHookTypeChecker] = {}
+
+
+def _get_check_function(checker_id: int, module_path: str) -> Callable[..., Any]:
+    """Get function which checks variables of an instrumented module.
+
+    The function returns the checked value, so that it can wrap yielded and
+        returned values. It does nothing once the checker is uninstalled.
+
+    """
+
+    def check(
+        line: int,
+        varname: str,
+        varvalue: Any,
+        vartype_str: str,
+        produced: Optional[str] = None,
+        variadic: bool = False,
+    ) -> Any:
+        checker = _installed_checkers.get(checker_id)
+        if checker is None:
+            return varvalue
+        frame = sys._getframe(1)
+        if not variadic:
+            varvalues = (varvalue,)
+        elif isinstance(varvalue, dict):
+            varvalues = varvalue.values()
+        else:
+            varvalues = varvalue
+        for value in varvalues:
+            checker._check_value(
+                module_path,
+                line,
+                varname,
+                value,
+                vartype_str,
+                frame.f_code.co_name,
+                frame.f_globals,
+                frame.f_locals,
+                produced=produced,
+            )
+        return varvalue
+
+    return check
@@ -1,14 +1,96 @@
+import argparse
 import os
 import runpy
+import sys
 
 from pydytype.check import TraceTypeChecker
+from pydytype.warmup import WarmupReport, parse_package
 
-dirname = os.path.dirname(os.path.abspath(__file__))
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pydytype")
+    subparsers = parser.add_subparsers(dest="command", required=True)
 
-if __name__ == "__main__":
-    checker = TraceTypeChecker()
+    warmup_parser = subparsers.add_parser(
+        "warmup", help="parse type annotations of all modules in a source tree"
+    )
+    warmup_parser.add_argument("root", help="path of the source tree")
+    warmup_parser.add_argument("--workers", type=int, default=None)
+    warmup_parser.add_argument("--cache-dir", default=None)
+
+    script_parser = argparse.ArgumentParser(add_help=False)
+    script_parser.add_argument("--path-prefix", default="")
+    script_parser.add_argument(
+        "--backend", choices=["settrace", "monitoring"], default="settrace"
+    )
+    script_parser.add_argument("--cache-dir", default=None)
+    script_parser.add_argument(
+        "--warm-up",
+        metavar="ROOT",
+        default=None,
+        help="parse all modules in this source tree before running the script",
+    )
+    script_parser.add_argument("--workers", type=int, default=None)
+    script_parser.add_argument(
+        "--trace-subprocesses",
+        action="store_true",
+        help="also check types in processes started with multiprocessing",
+    )
+    script_parser.add_argument("script")
+    script_parser.add_argument("args", nargs=argparse.REMAINDER)
+
+    subparsers.add_parser(
+        "run", parents=[script_parser], help="run a script and check types"
+    )
+    profile_parser = subparsers.add_parser(
+        "profile",
+        parents=[script_parser],
+        help="run a script, check types and print the most expensive check sites",
+    )
+    profile_parser.add_argument(
+        "--top", type=int, default=10, help="number of check sites to print"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "warmup":
+        report = parse_package(
+            args.root, max_workers=args.workers, cache_dir=args.cache_dir
+        )
+        print_report(report)
+        return 1 if report.errors else 0
+
+    checker = TraceTypeChecker(
+        path_prefix=os.path.abspath(args.path_prefix) if args.path_prefix else "",
+        backend=args.backend,
+        cache_dir=args.cache_dir,
+        profile=args.command == "profile",
+        trace_subprocesses=args.trace_subprocesses,
+    )
+    if args.warm_up is not None:
+        print_report(checker.warm_up(args.warm_up, max_workers=args.workers))
+    sys.argv = [args.script] + args.args
     checker.start_trace()
-    runpy.run_path(dirname + "/../tests/examples/list.py", run_name="__main__")
-    for result in checker.results:
+    try:
+        runpy.run_path(os.path.abspath(args.script), run_name="__main__")
+    finally:
+        checker.stop_trace()
+    if args.command == "profile":
+        print(checker.profiler.format_report(args.top))
+        return 0
+    for result in checker.results.failures():
         print(result)
+    return 0
+
+
+def print_report(report: WarmupReport):
+    for path, parse_time in sorted(report.parse_times.items()):
+        status = report.errors.get(path, "ok")
+        print(f"{parse_time * 1000:8.2f} ms  {path}  {status}")
+    print(
+        f"{len(report.module_types)} modules parsed, {len(report.errors)} errors "
+        f"in {report.total_time:.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
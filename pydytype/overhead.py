@@ -0,0 +1,136 @@
+"""Module for profiling the overhead of the type checker itself."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# phases of a check, indices of the time accumulators
+FILTER = 0
+FRAME = 1
+LOOKUP = 2
+RESOLVE = 3
+CHECK = 4
+RECORD = 5
+PHASES = ("filter", "frame", "lookup", "resolve", "check", "record")
+
+
+@dataclass
+class SiteProfile:
+    """Time spent by the checker at one check site.
+
+    Line 0 of a module holds the time spent deciding whether code objects of the
+        module are checked (frame filtering).
+
+    Attributes:
+        module_path: Path of the module.
+        line: Line number of the check site.
+        checks: Number of checked variables.
+        times_ns: Time spent in each phase in nanoseconds, keyed by phase name.
+
+    """
+
+    module_path: str
+    line: int
+    checks: int
+    times_ns: dict[str, int]
+
+    @property
+    def total_ns(self) -> int:
+        """Time spent in all phases in nanoseconds."""
+        return sum(self.times_ns.values())
+
+
+class CheckProfiler:
+    """Accumulates time spent by the checker per check site and phase.
+
+    Phases:
+        filter: Deciding whether a code object is checked, once per call event.
+        frame: Reading frame information and local variables.
+        lookup: Looking up type annotations of assigned variables.
+        resolve: Resolving (evaluating) annotation strings to types.
+        check: Checking values against the types.
+        record: Saving the results.
+
+    The accumulators are plain lists of integers, one per site. Threads update them
+        without locking, so concurrent updates of the same site may rarely be lost.
+
+    """
+
+    def __init__(self):
+        """Initialize with no measurements."""
+        self._sites: dict[tuple[str, int], list[int]] = {}
+
+    def add(self, module_path: str, line: int, phase: int, time_ns: int):
+        """Add time spent in a phase at a site.
+
+        Args:
+            module_path: Path of the module.
+            line: Line number of the check site.
+            phase: Index of the phase, e.g. FILTER.
+            time_ns: Time spent in nanoseconds.
+
+        """
+        accumulators = self._get_accumulators(module_path, line)
+        accumulators[phase + 1] += time_ns
+
+    def add_check(
+        self,
+        module_path: str,
+        line: int,
+        resolve_ns: int,
+        check_ns: int,
+        record_ns: int,
+    ):
+        """Count a checked variable at a site and add the time of its phases."""
+        accumulators = self._get_accumulators(module_path, line)
+        accumulators[0] += 1
+        accumulators[RESOLVE + 1] += resolve_ns
+        accumulators[CHECK + 1] += check_ns
+        accumulators[RECORD + 1] += record_ns
+
+    def report(self, top: int = 10) -> list[SiteProfile]:
+        """Get the most expensive sites.
+
+        Args:
+            top: Number of sites.
+
+        Returns:
+            Profiles of the sites, the most expensive first.
+
+        """
+        profiles = [
+            SiteProfile(
+                module_path, line, accumulators[0], dict(zip(PHASES, accumulators[1:]))
+            )
+            for (module_path, line), accumulators in list(self._sites.items())
+        ]
+        profiles.sort(key=lambda profile: profile.total_ns, reverse=True)
+        return profiles[:top]
+
+    def format_report(self, top: int = 10) -> str:
+        """Format the most expensive sites as a table with times in microseconds."""
+        lines = [
+            f"{'total':>10} {'checks':>8} "
+            + " ".join(f"{phase:>8}" for phase in PHASES)
+            + "  site"
+        ]
+        for profile in self.report(top):
+            lines.append(
+                f"{profile.total_ns / 1000:10.1f} {profile.checks:8} "
+                + " ".join(f"{profile.times_ns[phase] / 1000:8.1f}" for phase in PHASES)
+                + f"  {profile.module_path}:{profile.line}"
+            )
+        return "\n".join(lines)
+
+    def clear(self):
+        """Remove all measurements."""
+        self._sites.clear()
+
+    def _get_accumulators(self, module_path: str, line: int) -> list[int]:
+        """Get check count and time accumulators of a site."""
+        accumulators = self._sites.get((module_path, line))
+        if accumulators is None:
+            accumulators = self._sites.setdefault(
+                (module_path, line), [0] * (len(PHASES) + 1)
+            )
+        return accumulators
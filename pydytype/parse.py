@@ -3,30 +3,128 @@
 from __future__ import annotations
 
 import ast
+import bisect
+from collections.abc import Iterator
+from dataclasses import dataclass
 from typing import Callable, Any, Optional
 
 
-# TODO returns, classes, for block, ...
+@dataclass
+class AssignmentSite:
+    """Annotated variables assigned by statements starting on one line.
 
+    Attributes:
+        line_end: Last line number of the statements.
+        varnames: Names of the assigned variables which have a type annotation.
+        attributes: Names of the assigned attributes of self (the first argument of
+            a method) which have a type annotation in the class of the method.
 
-def parse_module(filename: str) -> list[dict[str, str]]:
-    """Parse module code and get variable type annotations for each line.
+    """
 
-    The result is a list of dicts. Indices of the list are equal to line numbers,
-        index 0 contains value None. The keys in the dicts are variable names, the
-        values are type annotations as strings.
+    line_end: int
+    varnames: tuple[str, ...]
+    attributes: tuple[str, ...] = ()
+
+
+class TypesIndex:
+    """Interval index of variable type annotations visible on each line.
+
+    The lines of a module are split into contiguous segments, each belonging to the
+        innermost scope containing it. Each scope holds, for each variable, the sorted
+        first line numbers of its annotations. Both the segment and the annotation
+        are found by binary search, so a lookup takes O(log n) time and the index
+        takes memory proportional to the number of scopes and annotations, not lines.
+
+    Attributes:
+        segment_starts: Sorted first line numbers of the segments.
+        segment_types: Annotations of the scope of each segment. The keys are
+            variable names, the values are sorted first line numbers of the
+            annotations and the annotations as strings.
+        line_end: Last line number of the module.
+
+    """
+
+    def __init__(
+        self,
+        segment_starts: list[int],
+        segment_types: list[dict[str, tuple[list[int], list[str]]]],
+        line_end: int,
+    ):
+        """Initialize."""
+        self.segment_starts = segment_starts
+        self.segment_types = segment_types
+        self.line_end = line_end
+
+    def lookup(self, line: int, varname: str) -> Optional[str]:
+        """Get type annotation of a variable on a line, or None if not annotated."""
+        annotations = self._get_segment_types(line).get(varname)
+        if annotations is None:
+            return None
+        lines, vartypes = annotations
+        index = bisect.bisect_right(lines, line) - 1
+        return vartypes[index] if index >= 0 else None
+
+    def visible_at(self, line: int) -> Iterator[tuple[str, str]]:
+        """Iterate names and type annotations of variables annotated on a line."""
+        for varname, (lines, vartypes) in self._get_segment_types(line).items():
+            index = bisect.bisect_right(lines, line) - 1
+            if index >= 0:
+                yield varname, vartypes[index]
+
+    def _get_segment_types(self, line: int) -> dict[str, tuple[list[int], list[str]]]:
+        """Get annotations of the innermost scope containing a line."""
+        if line > self.line_end:
+            return {}
+        index = bisect.bisect_right(self.segment_starts, line) - 1
+        return self.segment_types[index] if index >= 0 else {}
+
+
+@dataclass
+class ModuleTypes:
+    """Type annotations parsed from a module.
+
+    Attributes:
+        types: Index of variable type annotations visible on each line.
+        arguments: Type annotations of function arguments. The keys are tuples of
+            the first line number of the function (including decorators) and the
+            function name, i.e. co_firstlineno and co_name of the function code
+            object. The values are dicts of argument names and type annotations.
+        assignments: Assignments of annotated variables, keyed by the first line
+            number of the assignment statement.
+        returns: Return type annotations of functions, keyed the same way as
+            arguments.
+        attributes: Type annotations of instance attributes, from the class body
+            and from annotated assignments to self in methods. The keys are tuples
+            of the first line number and the name of the class, the values are dicts
+            of attribute names and type annotations.
+        methods: Class and name of the self argument of methods, keyed the same
+            way as arguments, so the annotations of the attributes of self can be
+            found from a frame with two dict lookups.
+
+    """
+
+    types: TypesIndex
+    arguments: dict[tuple[int, str], dict[str, str]]
+    assignments: dict[int, AssignmentSite]
+    returns: dict[tuple[int, str], str]
+    attributes: dict[tuple[int, str], dict[str, str]]
+    methods: dict[tuple[int, str], tuple[tuple[int, str], str]]
+
+
+def parse_module(filename: str) -> ModuleTypes:
+    """Parse module code and get variable type annotations.
 
     Args:
         filename: Path to the module.
 
     Returns:
-        Type annotations for each line.
+        Type annotations for each line, function arguments and assignments.
 
     """
     types_store = ModuleTypesIntermediateStore()
     parser = ModuleTypesParser(types_store)
     parser.parse(filename)
-    return types_store.get_types_by_line()
+    return types_store.get_module_types()
 
 
 class ModuleTypesParser(ast.NodeVisitor):
@@ -47,6 +145,9 @@ class ModuleTypesParser(ast.NodeVisitor):
 
         """
         self.types_store = types_store
+        # enclosing classes and functions, with the class key of classes and the
+        # class key and the name of self of methods
+        self._context: list[tuple[str, Any]] = []
 
     def parse(self, filename: str):
         """Parse type annotations from a module.
@@ -59,12 +160,27 @@ class ModuleTypesParser(ast.NodeVisitor):
         """
         with open(filename, "r") as f:
             source = f.read()
+        self.parse_source(source, filename)
 
+    def parse_source(self, source: str, filename: str) -> ast.Module:
+        """Parse type annotations from module source code.
+
+        Stores intermediate results in self.types_store.
+
+        Args:
+            source: Source code of the module.
+            filename: Filepath of the module
+
+        Returns:
+            The parsed module node.
+
+        """
         node = ast.parse(source, filename)
         line_end = max(1, len(source.splitlines()))
         self.types_store.start_scope(line_start=1, line_end=line_end)
         self.visit(node)
         self.types_store.end_scope()
+        return node
 
     def leave(self, node: ast.AST):
         """Called at the end of each node visit."""
@@ -93,11 +209,43 @@ class ModuleTypesParser(ast.NodeVisitor):
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
         """Visit FunctionDef node."""
-        self.types_store.start_scope(line_start=node.lineno, line_end=node.end_lineno)
+        first_line = min([node.lineno] + [dec.lineno for dec in node.decorator_list])
+        self.types_store.start_scope(
+            line_start=node.lineno,
+            line_end=node.end_lineno,
+            code_key=(first_line, node.name),
+        )
+        if node.returns is not None:
+            self.types_store.add_return_type(
+                (first_line, node.name), _unparse_annotation(node.returns)
+            )
+        method = None
+        self_name = _get_self_name(node)
+        if self._context and self._context[-1][0] == "class" and self_name:
+            method = (self._context[-1][1], self_name)
+            self.types_store.add_method((first_line, node.name), *method)
+        self._context.append(("function", method))
         return self.generic_visit(node)
 
     def leave_FunctionDef(self, node: ast.FunctionDef):
         """Leave FunctionDef node."""
+        self._context.pop()
+        self.types_store.end_scope()
+        return self.generic_leave(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        """Visit ClassDef node."""
+        first_line = min([node.lineno] + [dec.lineno for dec in node.decorator_list])
+        self.types_store.start_scope(line_start=node.lineno, line_end=node.end_lineno)
+        self._context.append(("class", (first_line, node.name)))
+        return self.generic_visit(node)
+
+    def leave_ClassDef(self, node: ast.ClassDef):
+        """Leave ClassDef node."""
+        self._context.pop()
         self.types_store.end_scope()
         return self.generic_leave(node)
 
@@ -109,18 +257,85 @@ class ModuleTypesParser(ast.NodeVisitor):
     def visit_Assign(self, node: ast.Assign):
         """Visit Assign node."""
         for target in node.targets:
-            if isinstance(target, ast.Name):
-                self._handle_type(varname=target.id, annotation=None, line=node.lineno)
-            # TODO other node types
+            self._handle_target(
+                target, line_start=node.lineno, line_end=node.end_lineno
+            )
+        self.visit(node.value)
+        return self.generic_leave(node)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        """Visit AugAssign node."""
+        lines = (node.lineno, node.end_lineno)
+        if isinstance(node.target, ast.Name):
+            self._handle_assignment(node.target.id, *lines)
+        else:
+            self._handle_attribute(node.target, annotation=None, lines=lines)
+        self.visit(node.value)
         return self.generic_leave(node)
 
     def visit_AnnAssign(self, node: ast.AnnAssign):
         """Visit AnnAssign node."""
+        lines = (node.lineno, node.end_lineno) if node.value is not None else None
         if isinstance(node.target, ast.Name):
             self._handle_type(
                 varname=node.target.id, annotation=node.annotation, line=node.lineno
             )
-        # TODO other node types
+            if lines is not None:
+                self._handle_assignment(node.target.id, *lines)
+            if self._context and self._context[-1][0] == "class":
+                self.types_store.add_attribute(
+                    self._context[-1][1],
+                    node.target.id,
+                    _unparse_annotation(node.annotation),
+                )
+        else:
+            self._handle_attribute(node.target, annotation=node.annotation, lines=lines)
+        if node.value is not None:
+            self.visit(node.value)
+        return self.generic_leave(node)
+
+    def visit_For(self, node: ast.For):
+        """Visit For node.
+
+        The target is assigned by the header of the loop, which ends with the
+            iterable.
+
+        """
+        self._handle_target(
+            node.target, line_start=node.lineno, line_end=node.iter.end_lineno
+        )
+        return self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node: ast.With):
+        """Visit With node.
+
+        The targets are assigned by the header of the statement, which ends with
+            the last context manager.
+
+        """
+        line_end = max(
+            (item.optional_vars or item.context_expr).end_lineno for item in node.items
+        )
+        for item in node.items:
+            if item.optional_vars is not None:
+                self._handle_target(
+                    item.optional_vars, line_start=node.lineno, line_end=line_end
+                )
+        return self.generic_visit(node)
+
+    visit_AsyncWith = visit_With
+
+    def visit_NamedExpr(self, node: ast.NamedExpr):
+        """Visit NamedExpr node."""
+        self._handle_target(
+            node.target, line_start=node.lineno, line_end=node.end_lineno
+        )
+        return self.generic_visit(node)
+
+    def visit_Lambda(self, node: ast.Lambda):
+        """Skip Lambda node, its arguments and assignments are not annotated."""
         return self.generic_leave(node)
 
     def visit_Global(self, node: ast.Global):
@@ -140,32 +355,117 @@ class ModuleTypesParser(ast.NodeVisitor):
                 the annotation apply to the whole scope.
 
         """
-        vartype = ast.unparse(annotation) if annotation is not None else None
+        vartype = _unparse_annotation(annotation) if annotation is not None else None
         self.types_store.add_type(varname=varname, vartype=vartype, line=line)
 
+    def _handle_target(self, target: ast.expr, line_start: int, line_end: int):
+        """Store information about a target of a statement assigning to variables.
+
+        Variables and attributes nested in tuple, list and starred targets are
+            assigned by the statement as well.
+
+        Args:
+            target: Assignment target.
+            line_start: First line number of the assigning statement.
+            line_end: Last line number of the assigning statement.
+
+        """
+        if isinstance(target, ast.Name):
+            self._handle_type(varname=target.id, annotation=None, line=line_start)
+            self._handle_assignment(target.id, line_start, line_end)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self._handle_target(element, line_start, line_end)
+        elif isinstance(target, ast.Starred):
+            self._handle_target(target.value, line_start, line_end)
+        else:
+            self._handle_attribute(
+                target, annotation=None, lines=(line_start, line_end)
+            )
+
+    def _handle_attribute(
+        self,
+        target: ast.AST,
+        annotation: Optional[ast.AST],
+        lines: Optional[tuple[int, int]],
+    ):
+        """Store information about an annotation or assignment of an attribute.
+
+        Only attributes of self in methods are stored.
+
+        Args:
+            target: Assignment target.
+            annotation: Type annotation of the attribute as AST node, or None in case
+                of assignment without annotation.
+            lines: First and last line numbers of the assignment statement, or None
+                in case of annotation without assignment.
+
+        """
+        if not self._context or self._context[-1][0] != "function":
+            return
+        method = self._context[-1][1]
+        if (
+            method is None
+            or not isinstance(target, ast.Attribute)
+            or not isinstance(target.value, ast.Name)
+            or target.value.id != method[1]
+        ):
+            return
+        class_key = method[0]
+        if annotation is not None:
+            self.types_store.add_attribute(
+                class_key, target.attr, _unparse_annotation(annotation)
+            )
+        if lines is not None:
+            self.types_store.add_attribute_assignment(
+                class_key, target.attr, line_start=lines[0], line_end=lines[1]
+            )
+
+    def _handle_assignment(self, varname: str, line_start: int, line_end: int):
+        """Store information about a statement assigning to a variable.
+
+        Args:
+            varname: Name of variable.
+            line_start: First line number of the assigning statement.
+            line_end: Last line number of the assigning statement.
+
+        """
+        self.types_store.add_assignment(
+            varname=varname, line_start=line_start, line_end=line_end
+        )
+
 
 class ModuleTypesIntermediateStore:
     """Stores type annotation information while it's being parsed.
 
-    Methods start_scope, end_scope, add_type are used to store information about
-        type annotations. Once all the information is stored, method get_types_by_line
-        can be called to get the annotations in a line-by-line list.
+    Methods start_scope, end_scope, add_type and add_assignment are used to store
+        information about type annotations. Once all the information is stored,
+        method get_module_types can be called to get the annotations indexed by
+        line, and method get_types_by_line to get them in a line-by-line list.
 
     """
 
     class _Scope:
         """Container for variable type annotations within one scope."""
 
-        def __init__(self, line_start: int, line_end: int):
+        def __init__(
+            self,
+            line_start: int,
+            line_end: int,
+            code_key: Optional[tuple[int, str]] = None,
+        ):
             """Initialize the scope.
 
             Args:
                 line_start: First line number of the scope.
                 line_end: Last line number of the scope.
+                code_key: First line number and name of the function, or None if
+                    the scope is not a function.
 
             """
             self.line_start: int = line_start
             self.line_end: int = line_end
+            self.code_key: Optional[tuple[int, str]] = code_key
             self._subscopes: list[ModuleTypesIntermediateStore._Scope] = []
             self._types_fifo: list[tuple[str, str, int, int]] = []
 
@@ -185,49 +485,67 @@ class ModuleTypesIntermediateStore:
             """Add subscope within this scope."""
             self._subscopes.append(subscope)
 
-        def get_types_by_line_list(self) -> list[Optional[dict[str, str]]]:
-            """Compile all the type annotations to a line-by-line list.
+        def get_arguments(self) -> dict[tuple[int, str], dict[str, str]]:
+            """Get type annotations of function arguments of this scope and subscopes.
 
-            Includes annotations from subscopes. Does not include variables without
-                a type annotation.
+            Arguments are the annotated types which apply to the whole scope.
 
             """
-            types_list = [None] * (self.line_end + 1)
-            for line, data in self._get_types_by_line_dict().items():
-                types_list[line] = {
+            arguments = {}
+            if self.code_key is not None:
+                arguments[self.code_key] = {
                     varname: vartype
-                    for varname, vartype in data.items()
-                    if vartype is not None
+                    for varname, vartype, line_start, _ in self._types_fifo
+                    if line_start == self.line_start and vartype is not None
                 }
-            return types_list
+            for subscope in self._subscopes:
+                arguments.update(subscope.get_arguments())
+            return arguments
 
-        def _get_types_by_line_dict(self) -> dict[int, dict[str, str]]:
-            """Compile all the type annotations to a line-by-line dict.
+        def get_segments(
+            self,
+        ) -> list[tuple[int, dict[str, tuple[list[int], list[str]]]]]:
+            """Split lines of the scope into segments where the scope is innermost.
 
-            Includes annotations from subscopes.
+            Returns:
+                First line numbers and annotations of the segments of this scope
+                    and subscopes, sorted by line number.
 
             """
-            types = self._get_own_types()
+            own_types = self._get_own_types()
+            segments = []
+            line = self.line_start
             for subscope in self._subscopes:
-                types = {**types, **subscope._get_types_by_line_dict()}
-            return types
-
-        def _get_own_types(self) -> dict[int, dict[str, str]]:
-            """Compile all the type annotations to a line-by-line dict.
-
-            Excludes annotations from subscopes.
+                if line < subscope.line_start:
+                    segments.append((line, own_types))
+                segments.extend(subscope.get_segments())
+                line = subscope.line_end + 1
+            if line <= self.line_end:
+                segments.append((line, own_types))
+            return segments
+
+        def _get_own_types(self) -> dict[str, tuple[list[int], list[str]]]:
+            """Get annotations of variables in this scope, excluding subscopes.
+
+            Returns:
+                Dict of variable names and tuples of sorted first line numbers of
+                    the annotations and the annotations. Assignments without
+                    annotation are not included, they don't change the type.
 
             """
-            types = {}
-            for line in range(self.line_start, self.line_end + 1):
-                types.setdefault(line, {})
-            for varname, vartype, line_start, line_end in self._types_fifo:
-                for line in range(line_start, line_end + 1):
-
-                    if vartype is None:
-                        types[line].setdefault(varname, vartype)
-                    else:
-                        types[line][varname] = vartype
+            annotations = sorted(
+                (
+                    (line_start, varname, vartype)
+                    for varname, vartype, line_start, _ in self._types_fifo
+                    if vartype is not None
+                ),
+                key=lambda annotation: annotation[0],
+            )
+            types: dict[str, tuple[list[int], list[str]]] = {}
+            for line_start, varname, vartype in annotations:
+                lines, vartypes = types.setdefault(varname, ([], []))
+                lines.append(line_start)
+                vartypes.append(vartype)
             return types
 
     class _ScopeLinkedStack:
@@ -258,16 +576,28 @@ class ModuleTypesIntermediateStore:
         """Initialize the store."""
         self._scope_stack = self._ScopeLinkedStack()
         self._bottom_scope = None
-
-    def start_scope(self, line_start: int, line_end: int):
+        self._assignments: list[tuple[str, int, int]] = []
+        self._returns: dict[tuple[int, str], str] = {}
+        self._attributes: dict[tuple[int, str], dict[str, str]] = {}
+        self._attribute_assignments: list[tuple[tuple[int, str], str, int, int]] = []
+        self._methods: dict[tuple[int, str], tuple[tuple[int, str], str]] = {}
+
+    def start_scope(
+        self,
+        line_start: int,
+        line_end: int,
+        code_key: Optional[tuple[int, str]] = None,
+    ):
         """Start a new scope.
 
         Args:
             line_start: First line number of the scope.
             line_end: Last line number of the scope.
+            code_key: First line number and name of the function, or None if the
+                scope is not a function.
 
         """
-        self._scope_stack.push(self._Scope(line_start, line_end))
+        self._scope_stack.push(self._Scope(line_start, line_end, code_key))
         if self._bottom_scope is None:
             self._bottom_scope = self._scope_stack.top()
 
@@ -286,6 +616,65 @@ class ModuleTypesIntermediateStore:
         """
         self._scope_stack.top().add_type(varname, vartype, line)
 
+    def add_assignment(self, varname: str, line_start: int, line_end: int):
+        """Add assignment to a variable.
+
+        Args:
+            varname: Name of variable.
+            line_start: First line number of the assignment statement.
+            line_end: Last line number of the assignment statement.
+
+        """
+        self._assignments.append((varname, line_start, line_end))
+
+    def add_return_type(self, code_key: tuple[int, str], vartype: str):
+        """Add return type annotation of a function.
+
+        Args:
+            code_key: First line number and name of the function.
+            vartype: Return type annotation.
+
+        """
+        self._returns[code_key] = vartype
+
+    def add_attribute(self, class_key: tuple[int, str], attribute: str, vartype: str):
+        """Add type annotation of an instance attribute.
+
+        Args:
+            class_key: First line number and name of the class.
+            attribute: Name of the attribute.
+            vartype: Type annotation of the attribute.
+
+        """
+        self._attributes.setdefault(class_key, {})[attribute] = vartype
+
+    def add_attribute_assignment(
+        self, class_key: tuple[int, str], attribute: str, line_start: int, line_end: int
+    ):
+        """Add assignment to an attribute of self in a method.
+
+        Args:
+            class_key: First line number and name of the class of the method.
+            attribute: Name of the attribute.
+            line_start: First line number of the assignment statement.
+            line_end: Last line number of the assignment statement.
+
+        """
+        self._attribute_assignments.append((class_key, attribute, line_start, line_end))
+
+    def add_method(
+        self, code_key: tuple[int, str], class_key: tuple[int, str], self_name: str
+    ):
+        """Add method of a class.
+
+        Args:
+            code_key: First line number and name of the method.
+            class_key: First line number and name of the class.
+            self_name: Name of the first argument of the method.
+
+        """
+        self._methods[code_key] = (class_key, self_name)
+
     def get_types_by_line(self) -> list[dict[str, str]]:
         """Get type annotations line-by-line.
 
@@ -297,10 +686,91 @@ class ModuleTypesIntermediateStore:
             Line-by-line type annotations.
 
         """
-        return self._bottom_scope.get_types_by_line_list()
+        types = self.get_types_index()
+        types_by_line = [None] * (self._bottom_scope.line_end + 1)
+        for line in range(1, self._bottom_scope.line_end + 1):
+            types_by_line[line] = dict(types.visible_at(line))
+        return types_by_line
+
+    def get_types_index(self) -> TypesIndex:
+        """Get interval index of type annotations.
+
+        Returns:
+            Index of type annotations visible on each line.
+
+        """
+        segments = self._bottom_scope.get_segments()
+        return TypesIndex(
+            segment_starts=[line for line, _ in segments],
+            segment_types=[types for _, types in segments],
+            line_end=self._bottom_scope.line_end,
+        )
+
+    def get_module_types(self) -> ModuleTypes:
+        """Get all type annotations of the module.
+
+        Only assignments to variables with a type annotation on the line of the
+            assignment, and assignments to attributes of self annotated in the class
+            of the method are included.
+
+        Returns:
+            Type annotations for each line, function arguments and assignments.
+
+        """
+        types = self.get_types_index()
+        assignments: dict[int, AssignmentSite] = {}
+        for varname, line_start, line_end in self._assignments:
+            if types.lookup(line_start, varname) is None:
+                continue
+            site = assignments.setdefault(line_start, AssignmentSite(line_end, ()))
+            site.line_end = max(site.line_end, line_end)
+            if varname not in site.varnames:
+                site.varnames += (varname,)
+        for class_key, attribute, line_start, line_end in self._attribute_assignments:
+            if attribute not in self._attributes.get(class_key, {}):
+                continue
+            site = assignments.setdefault(line_start, AssignmentSite(line_end, ()))
+            site.line_end = max(site.line_end, line_end)
+            if attribute not in site.attributes:
+                site.attributes += (attribute,)
+        return ModuleTypes(
+            types=types,
+            arguments=self._bottom_scope.get_arguments(),
+            assignments=assignments,
+            returns=self._returns,
+            attributes=self._attributes,
+            methods=self._methods,
+        )
+
+
+def _unparse_annotation(annotation: ast.AST) -> str:
+    """Get source of a type annotation, the string of forward references."""
+    if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+        return annotation.value
+    return ast.unparse(annotation)
+
+
+def _get_self_name(node: ast.FunctionDef) -> Optional[str]:
+    """Get name of the first argument of a function unless it is a static method.
+
+    The first argument of class methods is not treated as self either.
+
+    """
+    for decorator in node.decorator_list:
+        if isinstance(decorator, ast.Name) and decorator.id in (
+            "staticmethod",
+            "classmethod",
+        ):
+            return None
+    arguments = node.args.posonlyargs + node.args.args
+    return arguments[0].arg if arguments else None
 
 
 if __name__ == "__main__":
     types = parse_module(__file__)
-    for line, type_dict in enumerate(types):
-        print(line, type_dict)
+    with open(__file__) as f:
+        line_count = len(f.readlines())
+    for line in range(1, line_count + 1):
+        print(line, dict(types.types.visible_at(line)), types.assignments.get(line))
+    for code_key, arguments in types.arguments.items():
+        print(code_key, arguments)
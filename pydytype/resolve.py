@@ -0,0 +1,155 @@
+"""Module for resolving type annotation strings to type objects."""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import types
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class ResolveStats:
+    """Counts annotation resolution cache hits and misses.
+
+    Each miss compiles or evaluates the annotation string, each hit reuses the type
+        object resolved before.
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+
+class AnnotationResolver:
+    """Resolves type annotation strings to type objects and caches them.
+
+    The cache is keyed by module path, scope name and annotation string, and holds
+        the compiled code of the annotation and the resolved type object. Together
+        with the type object, the resolver remembers the objects bound to the names
+        the annotation uses (e.g. "dict", "str" and "MyClass" for
+        "dict[str, MyClass]"). A cached type object is reused only while all these
+        names are still bound to the same objects, so rebinding a global (or local)
+        name invalidates the cached resolution.
+
+    Attributes:
+        stats: Cache hit and miss counters.
+
+    """
+
+    def __init__(self):
+        """Initialize empty cache."""
+        self.stats = ResolveStats()
+        self._cache: dict[tuple[str, str, str], _Resolution] = {}
+
+    def resolve(
+        self,
+        module_path: str,
+        scope: str,
+        vartype_str: str,
+        f_globals: dict[str, Any],
+        f_locals: Optional[dict[str, Any]] = None,
+    ) -> Any:
+        """Resolve a type annotation string to a type object.
+
+        Args:
+            module_path: Path of the module with the annotation.
+            scope: Name of the scope (e.g. function) with the annotation.
+            vartype_str: Type annotation as a string.
+            f_globals: Global variables of the scope.
+            f_locals: Local variables of the scope.
+
+        Returns:
+            Resolved type annotation.
+
+        """
+        key = (module_path, scope, vartype_str)
+        resolution = self._cache.get(key)
+        if resolution is not None and resolution.is_valid(f_globals, f_locals):
+            self.stats.hits += 1
+            return resolution.vartype
+
+        self.stats.misses += 1
+        if resolution is None:
+            code = compile(vartype_str, module_path, "eval")
+            names = _get_loaded_names(vartype_str)
+        else:
+            code = resolution.code
+            names = tuple(name for name, _ in resolution.dependencies)
+        vartype = eval(code, f_globals, f_locals)
+        dependencies = tuple(
+            (name, _lookup_name(name, f_globals, f_locals)) for name in names
+        )
+        self._cache[key] = _Resolution(code, vartype, dependencies)
+        return vartype
+
+    def clear(self):
+        """Clear the cache."""
+        self._cache.clear()
+
+
+class _Resolution:
+    """Cached resolution of one type annotation string."""
+
+    __slots__ = ("code", "vartype", "dependencies")
+
+    def __init__(
+        self,
+        code: types.CodeType,
+        vartype: Any,
+        dependencies: tuple[tuple[str, Any], ...],
+    ):
+        """Initialize.
+
+        Args:
+            code: Compiled annotation string.
+            vartype: Resolved type annotation.
+            dependencies: Names used by the annotation and the objects bound to them
+                at the time of the resolution.
+
+        """
+        self.code = code
+        self.vartype = vartype
+        self.dependencies = dependencies
+
+    def is_valid(
+        self, f_globals: dict[str, Any], f_locals: Optional[dict[str, Any]]
+    ) -> bool:
+        """Check whether all names used by the annotation are still bound the same."""
+        for name, obj in self.dependencies:
+            if _lookup_name(name, f_globals, f_locals) is not obj:
+                return False
+        return True
+
+
+_MISSING = object()
+
+
+def _lookup_name(
+    name: str, f_globals: dict[str, Any], f_locals: Optional[dict[str, Any]]
+) -> Any:
+    """Look up a name the same way eval does: in locals, globals and builtins."""
+    if f_locals is not None:
+        obj = f_locals.get(name, _MISSING)
+        if obj is not _MISSING:
+            return obj
+    obj = f_globals.get(name, _MISSING)
+    if obj is not _MISSING:
+        return obj
+    f_builtins = f_globals.get("__builtins__", builtins)
+    if isinstance(f_builtins, types.ModuleType):
+        f_builtins = f_builtins.__dict__
+    return f_builtins.get(name, _MISSING)
+
+
+def _get_loaded_names(vartype_str: str) -> tuple[str, ...]:
+    """Get names (not attributes) loaded by a type annotation string."""
+    node = ast.parse(vartype_str, mode="eval")
+    names = {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)
+    }
+    return tuple(sorted(names))
@@ -0,0 +1,373 @@
+"""Module for storing type check results."""
+
+from __future__ import annotations
+
+import random
+import reprlib
+import threading
+import time
+import weakref
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class Result:
+    """Holds variable type check results.
+
+    The thread_id is the threading.get_ident() of the thread which made the check,
+        the task_name is the name of the asyncio task which made it, if any.
+
+    """
+
+    module_path: str
+    line: int
+    varname: str
+    varvalue: Any
+    vartype_str: str
+    vartype: Any
+    type_is_correct: bool
+    sampled: bool = False
+    thread_id: Optional[int] = None
+    task_name: Optional[str] = None
+
+
+class FailureSample:
+    """Sample of a failed type check which does not keep the value alive.
+
+    Attributes:
+        varvalue_repr: Truncated repr of the value.
+        varvalue_ref: Weak reference to the value, or None if the value does not
+            support weak references.
+        timestamp: Time of the check.
+        thread_id: Identifier of the thread which made the check, or None.
+        task_name: Name of the asyncio task which made the check, or None.
+
+    """
+
+    __slots__ = ("varvalue_repr", "varvalue_ref", "timestamp", "thread_id", "task_name")
+
+    def __init__(
+        self,
+        varvalue_repr: str,
+        varvalue_ref: Optional[weakref.ref],
+        timestamp: float,
+        thread_id: Optional[int] = None,
+        task_name: Optional[str] = None,
+    ):
+        """Initialize."""
+        self.varvalue_repr = varvalue_repr
+        self.varvalue_ref = varvalue_ref
+        self.timestamp = timestamp
+        self.thread_id = thread_id
+        self.task_name = task_name
+
+    def __reduce__(self) -> tuple:
+        # the weak reference cannot be pickled, e.g. to be sent to another process
+        return FailureSample, (
+            self.varvalue_repr,
+            None,
+            self.timestamp,
+            self.thread_id,
+            self.task_name,
+        )
+
+    def __repr__(self) -> str:
+        task = f", task={self.task_name}" if self.task_name is not None else ""
+        return f"FailureSample({self.varvalue_repr}, timestamp={self.timestamp}{task})"
+
+
+class ResultAggregate:
+    """Aggregated results of all type checks of one variable on one line.
+
+    Attributes:
+        module_path: Path of the module.
+        line: Line number of the checks.
+        varname: Name of the variable.
+        vartype_str: Type annotation of the variable as a string.
+        passed: Number of checks where the type was correct.
+        failed: Number of checks where the type was not correct.
+        sampled: Number of checks with a sampled (not exhaustive) verdict.
+        first_seen: Time of the first check.
+        last_seen: Time of the last check.
+        samples: Reservoir sample of failed checks.
+        thread_ids: Identifiers of the threads which made the checks.
+
+    """
+
+    __slots__ = (
+        "module_path",
+        "line",
+        "varname",
+        "vartype_str",
+        "passed",
+        "failed",
+        "sampled",
+        "first_seen",
+        "last_seen",
+        "samples",
+        "thread_ids",
+    )
+
+    def __init__(
+        self,
+        module_path: str,
+        line: int,
+        varname: str,
+        vartype_str: str,
+        timestamp: float,
+    ):
+        """Initialize with no checks."""
+        self.module_path = module_path
+        self.line = line
+        self.varname = varname
+        self.vartype_str = vartype_str
+        self.passed = 0
+        self.failed = 0
+        self.sampled = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.samples: list[FailureSample] = []
+        self.thread_ids: set[Optional[int]] = set()
+
+    @property
+    def key(self) -> tuple[str, int, str, str]:
+        """Module path, line, variable name and type annotation string."""
+        return self.module_path, self.line, self.varname, self.vartype_str
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultAggregate({self.module_path}:{self.line}, {self.varname}: "
+            f"{self.vartype_str}, passed={self.passed}, failed={self.failed}, "
+            f"samples={self.samples})"
+        )
+
+
+class ResultStore:
+    """Compact store of aggregated type check results.
+
+    Results are aggregated by module path, line, variable name and type annotation
+        string. Only counters, timestamps and a bounded reservoir of failure samples
+        are kept, so the memory used does not grow with the number of checks and no
+        checked value is kept alive.
+
+    Each thread adds results to its own buffer of aggregates, so threads do not
+        contend for a lock or race on shared counters. When a thread ends, its buffer
+        is folded into a shared buffer of finished threads, so the number of buffers
+        does not grow with the number of threads. The buffers are merged when the
+        results are read, and the merged aggregates are snapshots.
+
+    Iterating the store yields ResultAggregate objects.
+
+    """
+
+    def __init__(self, max_samples: int = 5, max_repr_length: int = 200):
+        """Initialize empty store.
+
+        Args:
+            max_samples: Maximum number of failure samples kept for each aggregate.
+            max_repr_length: Maximum length of the repr of sampled values.
+
+        """
+        self.max_samples = max_samples
+        self.max_repr_length = max_repr_length
+        # buffers of live threads keyed by their id, and the buffer of ended threads
+        self._buffers: dict[int, dict[tuple[str, int, str, str], ResultAggregate]] = {}
+        self._retired: dict[tuple[str, int, str, str], ResultAggregate] = {}
+        self._buffers_lock = threading.Lock()
+        self._local = threading.local()
+        self._rng = random.Random()
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = max_repr_length
+        self._repr.maxother = max_repr_length
+
+    def add(self, result: Result):
+        """Add a type check result to the buffer of the current thread."""
+        try:
+            aggregates = self._local.aggregates
+        except AttributeError:
+            aggregates = self._add_buffer()
+        key = (result.module_path, result.line, result.varname, result.vartype_str)
+        timestamp = time.time()
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = ResultAggregate(*key, timestamp)
+            aggregate.thread_ids.add(result.thread_id)
+            aggregates[key] = aggregate
+        aggregate.last_seen = timestamp
+        if result.sampled:
+            aggregate.sampled += 1
+        if result.type_is_correct:
+            aggregate.passed += 1
+            return
+
+        aggregate.failed += 1
+        # reservoir sampling keeps each failure with the same probability
+        if len(aggregate.samples) < self.max_samples:
+            aggregate.samples.append(self._make_sample(result, timestamp))
+        else:
+            index = self._rng.randrange(aggregate.failed)
+            if index < self.max_samples:
+                aggregate.samples[index] = self._make_sample(result, timestamp)
+
+    def add_aggregate(self, aggregate: ResultAggregate):
+        """Add aggregated results, e.g. of another process, to the current thread."""
+        try:
+            aggregates = self._local.aggregates
+        except AttributeError:
+            aggregates = self._add_buffer()
+        aggregates[aggregate.key] = self._merge(
+            aggregates.get(aggregate.key), aggregate
+        )
+
+    def get(
+        self, module_path: str, line: int, varname: str, vartype_str: str
+    ) -> Optional[ResultAggregate]:
+        """Get aggregated results of a variable on a line, or None if not checked."""
+        key = (module_path, line, varname, vartype_str)
+        merged = None
+        for aggregates in self._get_buffers():
+            aggregate = aggregates.get(key)
+            if aggregate is not None:
+                merged = self._merge(merged, aggregate)
+        return merged
+
+    def failures(self) -> Iterator[ResultAggregate]:
+        """Iterate aggregates with at least one failed check."""
+        return (aggregate for aggregate in self if aggregate.failed)
+
+    def clear(self):
+        """Remove all results."""
+        with self._buffers_lock:
+            for aggregates in [*self._buffers.values(), self._retired]:
+                aggregates.clear()
+
+    def __iter__(self) -> Iterator[ResultAggregate]:
+        merged: dict[tuple[str, int, str, str], ResultAggregate] = {}
+        for aggregates in self._get_buffers():
+            for key, aggregate in list(aggregates.items()):
+                merged[key] = self._merge(merged.get(key), aggregate)
+        return iter(merged.values())
+
+    def __len__(self) -> int:
+        keys = set()
+        for aggregates in self._get_buffers():
+            keys.update(list(aggregates))
+        return len(keys)
+
+    def _add_buffer(self) -> dict[tuple[str, int, str, str], ResultAggregate]:
+        """Create buffer of the current thread, retired when the thread ends.
+
+        The thread-local owner of the buffer is deleted when the thread ends, which
+            triggers the retirement.
+
+        """
+        aggregates: dict[tuple[str, int, str, str], ResultAggregate] = {}
+        owner = _BufferOwner()
+        self._local.aggregates = aggregates
+        self._local.owner = owner
+        with self._buffers_lock:
+            self._buffers[id(aggregates)] = aggregates
+        weakref.finalize(owner, _retire_buffer, weakref.ref(self), aggregates)
+        return aggregates
+
+    def _retire_buffer(
+        self, aggregates: dict[tuple[str, int, str, str], ResultAggregate]
+    ):
+        """Fold the buffer of an ended thread into the buffer of ended threads."""
+        with self._buffers_lock:
+            self._buffers.pop(id(aggregates), None)
+            retired = self._retired
+            for key, aggregate in aggregates.items():
+                retired[key] = self._merge(retired.get(key), aggregate)
+
+    def _get_buffers(self) -> list[dict[tuple[str, int, str, str], ResultAggregate]]:
+        """Get buffers of all live threads and the buffer of ended threads."""
+        with self._buffers_lock:
+            return [*self._buffers.values(), self._retired]
+
+    def _merge(
+        self, merged: Optional[ResultAggregate], aggregate: ResultAggregate
+    ) -> ResultAggregate:
+        """Merge aggregate of one thread into a copy with the aggregates merged so far.
+
+        If there are more failure samples than max_samples, the kept samples are a
+            uniform sample of the failures of both aggregates: each sample is drawn
+            from an aggregate with probability proportional to its failures not
+            drawn yet.
+
+        """
+        if merged is None:
+            merged = ResultAggregate(*aggregate.key, aggregate.first_seen)
+        if len(merged.samples) + len(aggregate.samples) > self.max_samples:
+            merged.samples = self._merge_samples(
+                merged.samples, merged.failed, aggregate.samples, aggregate.failed
+            )
+        else:
+            merged.samples = merged.samples + aggregate.samples
+        merged.passed += aggregate.passed
+        merged.failed += aggregate.failed
+        merged.sampled += aggregate.sampled
+        merged.first_seen = min(merged.first_seen, aggregate.first_seen)
+        merged.last_seen = max(merged.last_seen, aggregate.last_seen)
+        merged.thread_ids |= aggregate.thread_ids
+        return merged
+
+    def _merge_samples(
+        self,
+        left: list[FailureSample],
+        left_failed: int,
+        right: list[FailureSample],
+        right_failed: int,
+    ) -> list[FailureSample]:
+        """Draw max_samples samples from the reservoirs of two sets of failures.
+
+        Each reservoir is a uniform sample of its failures, so taking its samples in
+            random order draws its failures without replacement.
+
+        """
+        left = self._rng.sample(left, len(left))
+        right = self._rng.sample(right, len(right))
+        left_failed = max(left_failed, len(left))
+        right_failed = max(right_failed, len(right))
+        samples = []
+        while len(samples) < self.max_samples and (left or right):
+            if not right or (
+                left and self._rng.randrange(left_failed + right_failed) < left_failed
+            ):
+                samples.append(left.pop())
+                left_failed -= 1
+            else:
+                samples.append(right.pop())
+                right_failed -= 1
+        return samples
+
+    def _make_sample(self, result: Result, timestamp: float) -> FailureSample:
+        """Make a failure sample with a truncated repr and a weak reference."""
+        varvalue = result.varvalue
+        varvalue_repr = self._repr.repr(varvalue)[: self.max_repr_length]
+        try:
+            varvalue_ref = weakref.ref(varvalue)
+        except TypeError:
+            varvalue_ref = None
+        return FailureSample(
+            varvalue_repr, varvalue_ref, timestamp, result.thread_id, result.task_name
+        )
+
+
+class _BufferOwner:
+    """Thread-local object whose deletion signals that a thread ended."""
+
+    __slots__ = ("__weakref__",)
+
+
+def _retire_buffer(
+    store_ref: weakref.ref,
+    aggregates: dict[tuple[str, int, str, str], ResultAggregate],
+):
+    """Retire the buffer of an ended thread, unless the store was deleted."""
+    store = store_ref()
+    if store is not None:
+        store._retire_buffer(aggregates)
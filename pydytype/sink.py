@@ -0,0 +1,269 @@
+"""Module for streaming type check results to files and sockets."""
+
+from __future__ import annotations
+
+import json
+import queue
+import reprlib
+import socket
+import struct
+import threading
+import time
+
+from collections.abc import Iterator
+from typing import IO, Any, Optional, Union
+
+from pydytype.results import Result
+
+# line, timestamp, thread id, type is correct, sampled
+_BINARY_HEADER = struct.Struct("<IdQ??")
+_BINARY_LENGTH = struct.Struct("<I")
+_BINARY_STRING_LENGTH = struct.Struct("<H")
+_BINARY_STRINGS = ("module_path", "varname", "vartype_str", "task_name", "varvalue")
+_RECORD_FIELDS = (
+    "module_path",
+    "line",
+    "varname",
+    "vartype_str",
+    "type_is_correct",
+    "sampled",
+    "thread_id",
+    "task_name",
+    "timestamp",
+    "varvalue",
+)
+_CLOSE = object()
+
+
+class ResultSink:
+    """Streams type check results to a file or socket from a background thread.
+
+    Results are converted to small records in the checking thread and put into a
+        bounded queue. A background thread takes the records from the queue, encodes
+        them and writes them, so the checking thread never waits for I/O. If the queue
+        is full, the checking thread either waits for free space ("block") or the
+        record is dropped and counted ("drop").
+
+    Formats:
+        jsonl: One JSON object per line.
+        binary: Records prefixed with their length, see iter_binary_records.
+
+    Records contain the repr of the checked value only for failed checks.
+
+    Attributes:
+        format: Format of the records, either "jsonl" or "binary".
+        on_full: What to do when the queue is full, either "block" or "drop".
+        failures_only: If True, only failed checks are streamed.
+        written: Number of records written.
+        dropped: Number of records dropped because the queue was full or writing
+            failed.
+        error: Error which stopped writing, or None. Records queued after an error
+            are dropped.
+
+    """
+
+    def __init__(
+        self,
+        target: Union[str, IO[bytes], socket.socket],
+        format: str = "jsonl",
+        max_queue_size: int = 10000,
+        on_full: str = "drop",
+        failures_only: bool = False,
+        max_repr_length: int = 200,
+    ):
+        """Initialize and start the writer thread.
+
+        Args:
+            target: Path of a file to append to, a binary file object or a connected
+                socket.
+            format: Format of the records, either "jsonl" or "binary".
+            max_queue_size: Maximum number of records waiting to be written.
+            on_full: What to do when the queue is full, either "block" to wait for
+                the writer thread or "drop" to drop the record.
+            failures_only: If True, only failed checks are streamed.
+            max_repr_length: Maximum length of the repr of failed values.
+
+        Raises:
+            ValueError: If the format or on_full is unknown.
+
+        """
+        if format not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown format: {format}.")
+        if on_full not in ("block", "drop"):
+            raise ValueError(f"Unknown on_full: {on_full}.")
+
+        self.format = format
+        self.on_full = on_full
+        self.failures_only = failures_only
+        self.written = 0
+        self.dropped = 0
+        self.error: Optional[OSError] = None
+
+        self._owns_stream = isinstance(target, (str, socket.socket))
+        if isinstance(target, str):
+            self._stream: IO[bytes] = open(target, "ab")
+        elif isinstance(target, socket.socket):
+            self._stream = target.makefile("wb")
+        else:
+            self._stream = target
+        self._encode = _encode_json if format == "jsonl" else _encode_binary
+        self._queue: queue.Queue = queue.Queue(max_queue_size)
+        self._dropped_lock = threading.Lock()
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = max_repr_length
+        self._repr.maxother = max_repr_length
+        self._max_repr_length = max_repr_length
+        self._thread = threading.Thread(
+            target=self._write_records, name="pydytype-sink", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, result: Result):
+        """Queue a type check result for writing."""
+        if self.failures_only and result.type_is_correct:
+            return
+        varvalue = None
+        if not result.type_is_correct:
+            varvalue = self._repr.repr(result.varvalue)[: self._max_repr_length]
+        record = (
+            result.module_path,
+            result.line,
+            result.varname,
+            result.vartype_str,
+            result.type_is_correct,
+            result.sampled,
+            result.thread_id,
+            result.task_name,
+            time.time(),
+            varvalue,
+        )
+        if self.on_full == "block":
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Wait until all queued records are written and flush the stream."""
+        self._queue.join()
+
+    def close(self):
+        """Write all queued records, stop the writer thread and close the stream.
+
+        A stream passed as a file object is flushed but not closed, a socket is
+            not closed either.
+
+        """
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self._owns_stream:
+            self._stream.close()
+
+    def __enter__(self) -> ResultSink:
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
+
+    def _write_records(self):
+        """Write queued records until the sink is closed."""
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _CLOSE:
+                    if self.error is None:
+                        self._stream.flush()
+                    return
+                if self.error is not None:
+                    with self._dropped_lock:
+                        self.dropped += 1
+                    continue
+                self._stream.write(self._encode(record))
+                self.written += 1
+                if self._queue.empty():
+                    self._stream.flush()
+            except OSError as e:
+                self.error = e
+            finally:
+                self._queue.task_done()
+
+
+def _encode_json(record: tuple) -> bytes:
+    """Encode record as a line of JSON."""
+    return json.dumps(dict(zip(_RECORD_FIELDS, record))).encode() + b"\n"
+
+
+def _encode_binary(record: tuple) -> bytes:
+    """Encode record in the binary format."""
+    (
+        module_path,
+        line,
+        varname,
+        vartype_str,
+        type_is_correct,
+        sampled,
+        thread_id,
+        task_name,
+        timestamp,
+        varvalue,
+    ) = record
+    parts = [
+        _BINARY_HEADER.pack(line, timestamp, thread_id or 0, type_is_correct, sampled)
+    ]
+    for string in (module_path, varname, vartype_str, task_name, varvalue):
+        data = string.encode(errors="replace")[:0xFFFE] if string is not None else b""
+        # length 0xFFFF marks None, so that it differs from an empty string
+        length = len(data) if string is not None else 0xFFFF
+        parts.append(_BINARY_STRING_LENGTH.pack(length))
+        parts.append(data)
+    body = b"".join(parts)
+    return _BINARY_LENGTH.pack(len(body)) + body
+
+
+def iter_binary_records(stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    """Decode records written by ResultSink in the binary format.
+
+    Each record is a 4-byte little-endian length followed by the body. The body
+        starts with the line (uint32), timestamp (float64), thread id (uint64, 0 for
+        none), type_is_correct and sampled (bool). Then module path, variable name,
+        type annotation, task name and value repr follow, each as a 2-byte length and
+        UTF-8 data, with length 0xFFFF for None.
+
+    Args:
+        stream: Binary stream of records.
+
+    Yields:
+        Records as dicts with the same keys as the JSON Lines format.
+
+    """
+    while True:
+        prefix = stream.read(_BINARY_LENGTH.size)
+        if len(prefix) < _BINARY_LENGTH.size:
+            return
+        (length,) = _BINARY_LENGTH.unpack(prefix)
+        body = stream.read(length)
+        line, timestamp, thread_id, type_is_correct, sampled = (
+            _BINARY_HEADER.unpack_from(body)
+        )
+        record: dict[str, Any] = {
+            "line": line,
+            "timestamp": timestamp,
+            "thread_id": thread_id or None,
+            "type_is_correct": type_is_correct,
+            "sampled": sampled,
+        }
+        offset = _BINARY_HEADER.size
+        for key in _BINARY_STRINGS:
+            (string_length,) = _BINARY_STRING_LENGTH.unpack_from(body, offset)
+            offset += _BINARY_STRING_LENGTH.size
+            if string_length == 0xFFFF:
+                record[key] = None
+                continue
+            record[key] = body[offset : offset + string_length].decode(errors="replace")
+            offset += string_length
+        yield record
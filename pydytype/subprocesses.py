@@ -0,0 +1,274 @@
+"""Module for checking types in child processes started with multiprocessing."""
+
+from __future__ import annotations
+
+import multiprocessing.process
+import os
+import signal
+import threading
+
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Optional
+
+from pydytype.results import ResultAggregate, ResultStore
+
+# aggregates are sent in batches, so that a single message stays small
+_BATCH_SIZE = 1000
+_ACK = b"ok"
+
+# tracer of the process which started child processes, inherited by forked children
+_active_tracer: Optional[SubprocessTracer] = None
+_original_start = multiprocessing.process.BaseProcess.start
+
+
+class SubprocessTracer:
+    """Checks types in child processes and merges their results into one store.
+
+    While the tracer is started, every multiprocessing process started with a
+        target, e.g. a worker of multiprocessing.Pool or ProcessPoolExecutor, runs
+        the target under a new checker of the same class and configuration. Both the
+        fork and spawn start methods are supported. When the target returns, or when
+        the child is terminated by SIGTERM (e.g. workers of a Pool used as a context
+        manager), the child sends its aggregated results in batches over a local
+        connection (a Unix socket or named pipe) and waits until the parent has
+        merged them, so the results are complete once the child process is joined.
+
+    Processes which override run() instead of passing a target are not checked,
+        neither are grandchildren.
+
+    Attributes:
+        results: Store into which the results of children are merged.
+        received: Number of children whose results were merged.
+
+    """
+
+    def __init__(
+        self,
+        checker_class: Callable[..., Any],
+        checker_kwargs: dict[str, Any],
+        results: ResultStore,
+        stop_inherited: Optional[Callable[[], None]] = None,
+    ):
+        """Initialize.
+
+        Args:
+            checker_class: Class of the checkers created in children. It must be
+                importable by the children.
+            checker_kwargs: Picklable keyword arguments of the checkers.
+            results: Store into which the results of children are merged.
+            stop_inherited: Function which stops the tracing inherited by forked
+                children from this process, or None.
+
+        """
+        self.results = results
+        self.received = 0
+        self._checker_class = checker_class
+        self._checker_kwargs = checker_kwargs
+        self._stop_inherited = stop_inherited
+        self._listener: Optional[Listener] = None
+        self._thread: Optional[threading.Thread] = None
+        self._authkey = b""
+        self._stopping = False
+
+    def start(self):
+        """Start receiving results and checking types in new child processes.
+
+        Raises:
+            RuntimeError: If another tracer is started.
+
+        """
+        global _active_tracer
+        if _active_tracer is not None:
+            raise RuntimeError("Another SubprocessTracer is started.")
+        self._authkey = os.urandom(32)
+        self._stopping = False
+        self._listener = Listener(authkey=self._authkey)
+        self._thread = threading.Thread(
+            target=self._receive, name="pydytype-subprocesses", daemon=True
+        )
+        self._thread.start()
+        _active_tracer = self
+        multiprocessing.process.BaseProcess.start = _start_process
+
+    def stop(self):
+        """Stop checking types in new child processes and stop receiving results.
+
+        Results of children which finish after the tracer is stopped are lost.
+
+        """
+        global _active_tracer
+        if _active_tracer is not self or self._listener is None:
+            return
+        multiprocessing.process.BaseProcess.start = _original_start
+        _active_tracer = None
+        self._stopping = True
+        # wake up the receiving thread waiting for a connection
+        try:
+            Client(self._listener.address, authkey=self._authkey).close()
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join()
+        self._listener.close()
+        self._listener = None
+        self._thread = None
+
+    def _wrap_target(self, target: Callable[..., Any]) -> _TracedTarget:
+        """Wrap the target of a child process."""
+        assert self._listener is not None
+        return _TracedTarget(
+            target,
+            self._checker_class,
+            self._checker_kwargs,
+            self._listener.address,
+            self._authkey,
+        )
+
+    def _receive(self):
+        """Receive results of children until the tracer is stopped."""
+        assert self._listener is not None
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # e.g. a child failed authentication
+                if self._stopping:
+                    return
+                continue
+            if self._stopping:
+                connection.close()
+                return
+            try:
+                while True:
+                    batch = connection.recv()
+                    if batch is None:
+                        break
+                    for aggregate in batch:
+                        self.results.add_aggregate(aggregate)
+                self.received += 1
+                connection.send_bytes(_ACK)
+            except (OSError, EOFError):
+                pass
+            finally:
+                connection.close()
+
+
+class _TracedTarget:
+    """Picklable wrapper of the target of a child process which checks types."""
+
+    def __init__(
+        self,
+        target: Callable[..., Any],
+        checker_class: Callable[..., Any],
+        checker_kwargs: dict[str, Any],
+        address: Any,
+        authkey: bytes,
+    ):
+        """Initialize."""
+        self.target = target
+        self.checker_class = checker_class
+        self.checker_kwargs = checker_kwargs
+        self.address = address
+        self.authkey = authkey
+        # state of the child: the running checker, whether its results are being
+        # sent, and whether SIGTERM arrived meanwhile
+        self._checker: Any = None
+        self._finishing = False
+        self._terminating = False
+        self._previous_handler: Any = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Pickle only the configuration, not the state of the child."""
+        return {
+            "target": self.target,
+            "checker_class": self.checker_class,
+            "checker_kwargs": self.checker_kwargs,
+            "address": self.address,
+            "authkey": self.authkey,
+        }
+
+    def __setstate__(self, state: dict[str, Any]):
+        """Unpickle the configuration."""
+        self.__init__(**state)  # type: ignore[misc]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Run the target under a new checker and send the results to the parent."""
+        global _active_tracer
+        inherited = _active_tracer
+        if inherited is not None:
+            # forked from a tracing process, whose checker must not check the child
+            _active_tracer = None
+            multiprocessing.process.BaseProcess.start = _original_start
+            if inherited._stop_inherited is not None:
+                inherited._stop_inherited()
+
+        self._checker = self.checker_class(**self.checker_kwargs)
+        is_main_thread = threading.current_thread() is threading.main_thread()
+        if is_main_thread:
+            self._previous_handler = signal.getsignal(signal.SIGTERM)
+            signal.signal(signal.SIGTERM, self._handle_sigterm)
+        self._checker.start_trace()
+        try:
+            return self.target(*args, **kwargs)
+        finally:
+            self._finish()
+            if is_main_thread:
+                self._restore_handler()
+            if self._terminating:
+                signal.raise_signal(signal.SIGTERM)
+
+    def _finish(self):
+        """Stop the checker and send its results, unless they are already sent."""
+        checker = self._checker
+        if checker is None:
+            return
+        self._checker = None
+        self._finishing = True
+        checker.stop_trace()
+        self._send(list(checker.results))
+        self._finishing = False
+
+    def _handle_sigterm(self, signum: int, frame: Any):
+        """Send the results before the child is terminated, then terminate it."""
+        if self._finishing:
+            # the results are being sent, terminate once they are
+            self._terminating = True
+            return
+        self._finish()
+        self._restore_handler()
+        signal.raise_signal(signal.SIGTERM)
+
+    def _restore_handler(self):
+        """Restore the SIGTERM handler of the child."""
+        handler = self._previous_handler
+        signal.signal(
+            signal.SIGTERM, handler if handler is not None else signal.SIG_DFL
+        )
+
+    def _send(self, aggregates: list[ResultAggregate]):
+        """Send aggregates in batches and wait until the parent has merged them."""
+        try:
+            connection = Client(self.address, authkey=self.authkey)
+        except OSError:
+            return
+        try:
+            for i in range(0, len(aggregates), _BATCH_SIZE):
+                connection.send(aggregates[i : i + _BATCH_SIZE])
+            connection.send(None)
+            connection.recv_bytes()
+        except (OSError, EOFError):
+            pass
+        finally:
+            connection.close()
+
+
+def _start_process(process: multiprocessing.process.BaseProcess):
+    """Start a process, checking types in its target if a tracer is started."""
+    target = getattr(process, "_target", None)
+    if (
+        _active_tracer is not None
+        and target is not None
+        and not isinstance(target, _TracedTarget)
+    ):
+        process._target = _active_tracer._wrap_target(target)  # type: ignore
+    _original_start(process)
@@ -0,0 +1,76 @@
+import os
+import runpy
+import sys
+
+import pytest
+
+from pydytype.check import TraceTypeChecker
+from pydytype.hook import ImportHookTypeChecker
+
+_backends = ["settrace"]
+if hasattr(sys, "monitoring"):
+    _backends.append("monitoring")
+
+
+@pytest.fixture(params=_backends)
+def backend(request):
+    """Tracing backend of TraceTypeChecker available in this Python version."""
+    return request.param
+
+
+@pytest.fixture(params=[*_backends, "import_hook"])
+def engine(request):
+    """Tracing backend, or the import hook of ImportHookTypeChecker."""
+    return request.param
+
+
+@pytest.fixture
+def make_module(tmp_path):
+    """Write source code to a module in tmp_path and run it.
+
+    The fixture is a function of the source and the module name, which returns the
+        path of the module and its globals.
+
+    """
+
+    def make(source, name="module"):
+        module_path = str(tmp_path / f"{name}.py")
+        with open(module_path, "w") as f:
+            f.write(source)
+        return module_path, runpy.run_path(module_path)
+
+    return make
+
+
+@pytest.fixture
+def run_example():
+    """Run an example module as __main__ and check its types.
+
+    The fixture is a function of the path of the module and the engine, which
+        returns the results of the checker. The examples directory is the path
+        prefix of the checker.
+
+    """
+
+    def run(path, engine):
+        dirpath = os.path.dirname(path)
+        if engine == "import_hook":
+            checker = ImportHookTypeChecker(path_prefix=dirpath)
+            module_name = os.path.splitext(os.path.basename(path))[0]
+            sys.path.insert(0, dirpath)
+            checker.install()
+            try:
+                runpy.run_module(module_name, run_name="__main__")
+            finally:
+                checker.uninstall()
+                sys.path.remove(dirpath)
+        else:
+            checker = TraceTypeChecker(path_prefix=dirpath, backend=engine)
+            checker.start_trace()
+            try:
+                runpy.run_path(path, run_name="__main__")
+            finally:
+                checker.stop_trace()
+        return checker.results
+
+    return run
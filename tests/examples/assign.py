@@ -0,0 +1,62 @@
+x: int = 1
+y: str = 1  # pydytype: test_assert_fail
+
+
+def pass_assign():
+    a: int = 1
+    b: list[str] = ["a"]
+    a = 2
+    return a, b
+
+
+def fail_assign():
+    a: int = "a"  # pydytype: test_assert_fail
+    return a
+
+
+def fail_reassign():
+    a: int = 1
+    a = "a"  # pydytype: test_assert_fail
+    return a
+
+
+def fail_aug_assign():
+    a: list[int] = [1]
+    a += ["b"]  # pydytype: test_assert_fail
+    return a
+
+
+def pass_multiline_assign():
+    a: dict[str, int] = {
+        "a": 1,
+    }
+    return a
+
+
+def fail_multiline_assign():
+    a: dict[str, int] = {  # pydytype: test_assert_fail
+        "a": "b",
+    }
+    return a
+
+
+def pass_loop_assign(n: int):
+    for i in range(n):
+        a: int = i
+    b: list[int] = [a]
+    return b
+
+
+def fail_last_line_assign():
+    a: set[int] = {"a"}  # pydytype: test_assert_fail
+
+
+if __name__ == "__main__":
+    pass_assign()
+    fail_assign()
+    fail_reassign()
+    fail_aug_assign()
+    pass_multiline_assign()
+    fail_multiline_assign()
+    pass_loop_assign(3)
+    fail_last_line_assign()
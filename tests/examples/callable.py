@@ -0,0 +1,18 @@
+from collections.abc import Callable
+from typing import Optional
+
+
+def pass_callable(a: Callable[[int], str], b: Optional[Callable]):
+    return a, b
+
+
+def fail_callable(a: Callable[..., int]):  # pydytype: test_assert_fail
+    return a
+
+
+if __name__ == "__main__":
+    pass_callable(str, None)
+    pass_callable(lambda a: str(a), len)
+
+    fail_callable(1)
+    fail_callable(None)
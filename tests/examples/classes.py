@@ -0,0 +1,53 @@
+class Point:
+    x: int
+    y: int
+    label: str
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y  # pydytype: test_assert_fail
+
+    def move(self, dx: int) -> "Point":
+        self.x += dx
+        return self
+
+    def rename(self, label):
+        self.label = label  # pydytype: test_assert_fail
+        self.name: str = label  # pydytype: test_assert_fail
+        return self.name
+
+    def norm(self) -> int:
+        return abs(self.x) + abs(self.y)  # pydytype: test_assert_fail
+
+    @staticmethod
+    def origin(x) -> "Point":
+        return x  # pydytype: test_assert_fail
+
+
+def pass_return(a: int) -> int:
+    if a > 0:
+        return a
+    return -a
+
+
+def fail_return(a: int) -> str:
+    return a  # pydytype: test_assert_fail
+
+
+def pass_raise(a: int) -> int:
+    raise ValueError(a)
+
+
+if __name__ == "__main__":
+    point = Point(1, 2.5)
+    point.move(2)
+    point.rename(1)
+    point.norm()
+    Point.origin(1)
+    pass_return(1)
+    pass_return(-1)
+    fail_return(1)
+    try:
+        pass_raise(1)
+    except ValueError:
+        pass
@@ -3,7 +3,7 @@ def pass_list_set(a: list[set[int]]):
 
 
 def fail_list_set(a: list[set[str]]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_list_dict_set(a: list[dict[int, set[str]]]):
@@ -11,7 +11,7 @@ def pass_list_dict_set(a: list[dict[int, set[str]]]):
 
 
 def fail_list_dict_set(a: list[dict[int, set[str]]]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 if __name__ == "__main__":
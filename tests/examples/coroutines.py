@@ -0,0 +1,59 @@
+import asyncio
+
+
+async def get_value(value):
+    await asyncio.sleep(0)
+    return value
+
+
+async def pass_coroutine(a: int, b: list[str]):
+    await asyncio.sleep(0)
+    c: int = await get_value(a)
+    await asyncio.sleep(0)
+    return c, b
+
+
+async def fail_coroutine(a: int):  # pydytype: test_assert_fail
+    await asyncio.sleep(0)
+    return a
+
+
+async def fail_await_assign():
+    await asyncio.sleep(0)
+    a: int = await get_value("a")  # pydytype: test_assert_fail
+    await asyncio.sleep(0)
+    return a
+
+
+async def fail_assign_after_await():
+    a: int = 1
+    await asyncio.sleep(0)
+    a = "a"  # pydytype: test_assert_fail
+    return a
+
+
+async def pass_async_generator(n: int):
+    for i in range(n):
+        a: int = i
+        yield a
+
+
+async def fail_async_generator(n: int):
+    for i in range(n):
+        a: str = i  # pydytype: test_assert_fail
+        yield a
+
+
+async def main():
+    await asyncio.gather(pass_coroutine(1, ["a"]), pass_coroutine(2, []))
+    await fail_coroutine("a")
+    await fail_await_assign()
+    await fail_assign_after_await()
+    async for _ in pass_async_generator(3):
+        await asyncio.sleep(0)
+    async for _ in fail_async_generator(3):
+        pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,7 +3,7 @@ def pass_dict(a: dict[str, int]):
 
 
 def fail_dict(a: dict[str, int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_nested_dict(a: dict[str, dict[int, dict[int, int]]]):
@@ -11,7 +11,7 @@ def pass_nested_dict(a: dict[str, dict[int, dict[int, int]]]):
 
 
 def fail_nested_dict(a: dict[int, dict[int, int]]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_no_args_dict(a: dict):
@@ -19,11 +19,11 @@ def pass_no_args_dict(a: dict):
 
 
 def fail_incorrect_args_dict(a: dict[str]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def fail_slice_args_dict(a: dict[int:int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+from collections.abc import Generator, Iterable, Iterator
+
+
+def pass_iterator(n: int) -> Iterator[int]:
+    for i in range(n):
+        yield i
+
+
+def fail_iterator(n: int) -> Iterator[str]:
+    for i in range(n):
+        yield i  # pydytype: test_assert_fail
+
+
+def pass_iterable(n: int) -> Iterable[str]:
+    for i in range(n):
+        value = str(i)
+        yield value
+
+
+def pass_generator(n: int) -> Generator[int, None, str]:
+    for i in range(n):
+        yield i
+    return "done"
+
+
+def fail_generator_return(n: int) -> Generator[int, None, str]:
+    for i in range(n):
+        yield i
+    return n  # pydytype: test_assert_fail
+
+
+def pass_send() -> Generator[int, int, None]:
+    total = 0
+    while total < 10:
+        received = yield total
+        total += received
+
+
+def pass_closed(n: int) -> Generator[int, None, str]:
+    for i in range(n):
+        yield i
+    return "done"
+
+
+def pass_consume(values: Iterator[int]):
+    a: Iterable[int] = values
+    b: Iterable[int] = [1, 2, 3]
+    return sum(a) + sum(b)
+
+
+def fail_consume(values: Iterable[int]):  # pydytype: test_assert_fail
+    return values
+
+
+if __name__ == "__main__":
+    list(pass_iterator(3))
+    list(fail_iterator(3))
+    list(pass_iterable(3))
+    list(pass_generator(3))
+    list(fail_generator_return(3))
+
+    generator = pass_send()
+    next(generator)
+    for _ in range(2):
+        generator.send(4)
+    generator.close()
+
+    # closing a suspended generator raises GeneratorExit at the yield
+    generator = pass_closed(3)
+    next(generator)
+    generator.close()
+
+    pass_consume(pass_iterator(3))
+    fail_consume(["a"])
@@ -3,7 +3,7 @@ def pass_list(a: list[str]):
 
 
 def fail_list(a: list[int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_nested_list(a: list[list[list[float]]]):
@@ -11,7 +11,7 @@ def pass_nested_list(a: list[list[list[float]]]):
 
 
 def fail_nested_list(a: list[list[int]]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_no_args_list(a: list):
@@ -19,7 +19,7 @@ def pass_no_args_list(a: list):
 
 
 def fail_incorrect_args_list(a: list[int, int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 if __name__ == "__main__":
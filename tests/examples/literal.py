@@ -0,0 +1,32 @@
+from typing import Literal, Optional
+
+
+def pass_literal(a: Literal["r", "w"]):
+    return a
+
+
+def fail_literal(a: Literal["r", "w"]):  # pydytype: test_assert_fail
+    return a
+
+
+def pass_nested_literal(a: list[Literal[1, 2]], b: Optional[Literal[True]]):
+    return a, b
+
+
+def fail_bool_literal(a: Literal[1]):  # pydytype: test_assert_fail
+    return a
+
+
+if __name__ == "__main__":
+    pass_literal("r")
+    pass_literal("w")
+
+    fail_literal("a")
+    fail_literal(1)
+    fail_literal(["r"])
+
+    pass_nested_literal([1, 2, 1], None)
+    pass_nested_literal([], True)
+
+    fail_bool_literal(True)
+    fail_bool_literal(1.0)
@@ -3,7 +3,7 @@ def pass_set(a: set[str]):
 
 
 def fail_set(a: set[int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 def pass_no_args_set(a: set):
@@ -11,7 +11,7 @@ def pass_no_args_set(a: set):
 
 
 def fail_incorrect_args_set(a: set[int, int]):  # pydytype: test_assert_fail
-    return a  # pydytype: test_assert_fail
+    return a
 
 
 if __name__ == "__main__":
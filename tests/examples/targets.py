@@ -0,0 +1,79 @@
+from contextlib import nullcontext
+
+
+def pass_unpack():
+    a: int = 1
+    b: list[str] = []
+    a, b = 2, ["a"]
+    (a, *b), c = [3, "b", "c"], 4
+    return a, b, c
+
+
+def fail_unpack():
+    a: int = 1
+    b: str = "a"
+    a, b = "b", 2  # pydytype: test_assert_fail
+    return a, b
+
+
+def fail_nested_unpack():
+    a: int = 1
+    b: list[str] = []
+    [a, *b], c = [1.0, 2, 3], 4  # pydytype: test_assert_fail
+    return a, b, c
+
+
+def pass_for(items: list[int]):
+    item: int = 0
+    for item in items:
+        item += 1
+    for i, item in enumerate(items):
+        pass
+    return item
+
+
+def fail_for(items: list):
+    item: int = 0
+    for item in items:  # pydytype: test_assert_fail
+        pass
+    return item
+
+
+def pass_with():
+    a: str = ""
+    with nullcontext("a") as a:
+        pass
+    return a
+
+
+def fail_with():
+    a: str = ""
+    with nullcontext(1) as a, nullcontext():  # pydytype: test_assert_fail
+        pass
+    return a
+
+
+def pass_named_expr(items: list[int]):
+    n: int = 0
+    if (n := len(items)) > 1:
+        return n
+    return 0
+
+
+def fail_named_expr(items: list):
+    n: str = ""
+    while n := items.pop():  # pydytype: test_assert_fail
+        pass
+    return n
+
+
+if __name__ == "__main__":
+    pass_unpack()
+    fail_unpack()
+    fail_nested_unpack()
+    pass_for([1, 2])
+    fail_for(["a"])
+    pass_with()
+    fail_with()
+    pass_named_expr([1, 2])
+    fail_named_expr([0, 1])
@@ -0,0 +1,38 @@
+from typing import Optional, Tuple
+
+
+def pass_tuple(a: tuple[int, str], b: Tuple[float, ...], c: tuple[()]):
+    return a, b, c
+
+
+def fail_tuple(a: tuple[int, str]):  # pydytype: test_assert_fail
+    return a
+
+
+def pass_nested_tuple(a: tuple[list[int], Optional[str]]):
+    return a
+
+
+def fail_nested_tuple(a: tuple[list[int], ...]):  # pydytype: test_assert_fail
+    return a
+
+
+def pass_no_args_tuple(a: tuple, b: Tuple):
+    return a, b
+
+
+if __name__ == "__main__":
+    pass_tuple((1, "a"), (), ())
+    pass_tuple((1, "a"), (1.0, 2.0), ())
+
+    fail_tuple((1, 2))
+    fail_tuple((1,))
+    fail_tuple((1, "a", 2))
+    fail_tuple([1, "a"])
+
+    pass_nested_tuple(([1], None))
+    pass_nested_tuple(([], "a"))
+
+    fail_nested_tuple(([1], ["a"]))
+
+    pass_no_args_tuple((), (1, "a"))
@@ -0,0 +1,49 @@
+from typing import Optional, Union
+
+
+def pass_optional(a: Optional[int]):
+    return a
+
+
+def fail_optional(a: Optional[int]):  # pydytype: test_assert_fail
+    return a
+
+
+def pass_union(a: Union[int, str, list[float]]):
+    return a
+
+
+def fail_union(a: Union[int, list[float]]):  # pydytype: test_assert_fail
+    return a
+
+
+def pass_union_operator(a: int | None, b: list[int | str]):
+    c: dict[str, int] | None = None
+    c = {"a": 1}
+    return a, b, c
+
+
+def fail_union_operator(a: list[int | str]):  # pydytype: test_assert_fail
+    b: str | None = None
+    b = 1  # pydytype: test_assert_fail
+    return a, b
+
+
+if __name__ == "__main__":
+    pass_optional(None)
+    pass_optional(1)
+
+    fail_optional("a")
+    fail_optional([1])
+
+    pass_union(1)
+    pass_union("a")
+    pass_union([1.0])
+
+    fail_union("a")
+    fail_union(["a"])
+
+    pass_union_operator(None, [])
+    pass_union_operator(1, [1, "a"])
+
+    fail_union_operator([1.0])
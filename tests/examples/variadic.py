@@ -0,0 +1,18 @@
+def pass_variadic(*args: int, **kwargs: str):
+    return args, kwargs
+
+
+def fail_args(a, *args: str):  # pydytype: test_assert_fail
+    return a, args
+
+
+def fail_kwargs(**kwargs: list[int]):  # pydytype: test_assert_fail
+    return kwargs
+
+
+if __name__ == "__main__":
+    pass_variadic()
+    pass_variadic(1, 2, k="a")
+
+    fail_args(1, 2)
+    fail_kwargs(b=["a"], c=[1.0])
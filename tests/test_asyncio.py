@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+from pydytype.check import TraceTypeChecker
+
+_examples_dirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+_path = os.path.join(_examples_dirpath, "coroutines.py")
+
+
+def test_arguments_checked_once_per_start(engine, run_example):
+    results = run_example(_path, engine)
+    assert results.get(_path, 9, "a", "int").passed == 2
+    assert results.get(_path, 9, "b", "list[str]").passed == 2
+    assert results.get(_path, 11, "c", "int").passed == 2
+    assert results.get(_path, 35, "n", "int").passed == 1
+    assert results.get(_path, 37, "a", "int").passed == 3
+    assert results.get(_path, 43, "a", "str").failed == 3
+
+
+def test_task_attribution(engine, run_example):
+    results = run_example(_path, engine)
+    (sample,) = results.get(_path, 16, "a", "int").samples
+    assert sample.task_name is not None
+    assert sample.task_name.startswith("Task-")
+
+
+def test_no_task_outside_event_loop():
+    checker = TraceTypeChecker()
+    checker._check_value("m.py", 1, "a", "a", "int", "f", {}, None)
+    checker._check_value("m.py", 1, "a", "a", "int", "f", {}, None)
+    asyncio.run(asyncio.sleep(0))
+    (aggregate,) = checker.results
+    assert [sample.task_name for sample in aggregate.samples] == [None, None]
@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+from pydytype.check import TraceTypeChecker
+
+_SOURCE = """\
+def f(a: int) -> int:
+    b: int = a
+    return b
+"""
+
+
+@pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="requires sys.monitoring")
+def test_restart_monitoring(tmp_path, make_module):
+    module_path, functions = make_module(_SOURCE)
+    function = functions["f"]
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), backend="monitoring")
+
+    for _ in range(2):
+        checker.start_trace()
+        try:
+            function(1)
+        finally:
+            checker.stop_trace()
+
+    assert checker.results.get(module_path, 1, "a", "int").passed == 2
+    assert checker.results.get(module_path, 2, "b", "int").passed == 2
+    assert checker.results.get(module_path, 3, "return", "int").passed == 2
+
+
+@pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="requires sys.monitoring")
+def test_debugger_and_coverage_ids_free(tmp_path):
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), backend="monitoring")
+    checker.start_trace()
+    try:
+        monitoring = sys.monitoring
+        for tool_id in (monitoring.DEBUGGER_ID, monitoring.COVERAGE_ID):
+            assert monitoring.get_tool(tool_id) is None
+            monitoring.use_tool_id(tool_id, "other")
+            monitoring.free_tool_id(tool_id)
+    finally:
+        checker.stop_trace()
+
+
+_LOOP_SOURCE = """\
+def f(n):
+    a: int = 0
+    total = 0
+    for i in range(n):
+        total += i
+    a = str(total)
+    return a
+"""
+
+
+@pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="requires sys.monitoring")
+def test_line_events_disabled_outside_assignments(tmp_path, make_module):
+    module_path, functions = make_module(_LOOP_SOURCE)
+    function = functions["f"]
+    checked_lines = []
+
+    class CountingChecker(TraceTypeChecker):
+        def _check_line(self, frame, line):
+            checked_lines.append(line)
+            super()._check_line(frame, line)
+
+    checker = CountingChecker(path_prefix=str(tmp_path), backend="monitoring")
+    checker.start_trace()
+    try:
+        function(100)
+        # lines of the loop neither assign nor follow an assignment of a
+        assert checker._monitor_line(function.__code__, 4) is sys.monitoring.DISABLE
+        assert checker._monitor_line(function.__code__, 5) is sys.monitoring.DISABLE
+    finally:
+        checker.stop_trace()
+
+    assert checked_lines == [2, 3, 6, 7]
+    assert checker.results.get(module_path, 2, "a", "int").passed == 1
+    assert checker.results.get(module_path, 6, "a", "int").failed == 1
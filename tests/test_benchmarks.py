@@ -0,0 +1,31 @@
+import importlib.util
+import os
+
+_path = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "run.py"
+)
+_spec = importlib.util.spec_from_file_location("benchmarks_run", _path)
+run = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run)
+
+
+def test_run_suite():
+    current = run.run_suite(list(run.WORKLOADS), list(run.ENGINES), 500, 1)
+    assert set(current["results"]) == set(run.WORKLOADS)
+    for engines in current["results"].values():
+        assert set(engines) == set(run.ENGINES)
+        for metrics in engines.values():
+            assert metrics["time_s"] > 0
+            assert metrics["peak_memory_bytes"] >= 0
+    assert run.format_results(current, current).count("1.00x") >= len(run.WORKLOADS)
+
+
+def test_compare():
+    baseline = {"results": {"w": {"e": {"time_s": 1.0, "peak_memory_bytes": 100}}}}
+    current = {"results": {"w": {"e": {"time_s": 1.1, "peak_memory_bytes": 200}}}}
+    assert run.compare(baseline, current, 0.2) == [
+        "w/e peak_memory_bytes: 100 -> 200 (+100 %)"
+    ]
+    current["results"]["w"]["e"]["time_s"] = 1.5
+    assert len(run.compare(baseline, current, 0.2)) == 2
+    assert len(run.compare(baseline, current, 0.2, min_time_delta=1)) == 1
@@ -0,0 +1,48 @@
+import array
+import sys
+
+from typing import Any
+
+import pytest
+
+from pydytype.check import check_type
+
+
+class _Spoofed:
+    __class__ = int
+
+
+def test_bulk_list():
+    assert check_type(list(range(10000)), list[int])
+    assert check_type(list(range(10000)) + [True], list[int])
+    assert not check_type(list(range(10000)) + ["a"], list[int])
+    assert check_type(list(range(10000)) + [_Spoofed()], list[int])
+
+
+def test_bulk_set():
+    assert check_type({str(i) for i in range(10000)}, set[str])
+    assert not check_type({str(i) for i in range(10000)} | {1}, set[str])
+
+
+def test_bulk_dict():
+    assert check_type({i: str(i) for i in range(10000)}, dict[int, str])
+    assert not check_type({i: i for i in range(10000)}, dict[int, str])
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="array.array[T] is 3.12+")
+def test_array():
+    assert check_type(array.array("i", range(10)), array.array[int])
+    assert check_type(array.array("d", [1.0]), array.array[float])
+    assert not check_type(array.array("d", [1.0]), array.array[int])
+    assert not check_type([1, 2], array.array[int])
+
+
+def test_ndarray():
+    numpy = pytest.importorskip("numpy")
+    import numpy.typing
+
+    assert check_type(numpy.arange(10), numpy.typing.NDArray[numpy.integer])
+    assert check_type(numpy.arange(10), numpy.typing.NDArray[numpy.int_])
+    assert not check_type(numpy.arange(10), numpy.typing.NDArray[numpy.floating])
+    assert check_type(numpy.zeros(3), numpy.ndarray[Any, numpy.dtype[Any]])
+    assert not check_type([1, 2], numpy.typing.NDArray[numpy.int_])
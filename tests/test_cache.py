@@ -0,0 +1,94 @@
+import os
+import runpy
+
+from pydytype.cache import ModuleTypesCache
+from pydytype.check import TraceTypeChecker
+from pydytype.parse import parse_module
+
+dirname = os.path.dirname(os.path.abspath(__file__))
+
+_SOURCE = """\
+x: int = 1
+
+
+def f(a: str, b):
+    y: list[int] = [a]
+    return y
+"""
+
+
+def _write_module(path, source):
+    with open(path, "w") as f:
+        f.write(source)
+
+
+def test_cache_round_trip(tmp_path):
+    module_path = os.path.join(dirname, "examples", "assign.py")
+    expected = parse_module(module_path)
+    ModuleTypesCache(str(tmp_path)).get_module_types(module_path)
+
+    cache = ModuleTypesCache(str(tmp_path))
+    module_types = cache.get_module_types(module_path)
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 0
+    assert module_types.arguments == expected.arguments
+    assert module_types.assignments == expected.assignments
+    for line in range(1, expected.types.line_end + 1):
+        assert dict(module_types.types.visible_at(line)) == dict(
+            expected.types.visible_at(line)
+        )
+
+
+def test_cache_invalidated_by_change(tmp_path):
+    module_path = str(tmp_path / "module.py")
+    _write_module(module_path, _SOURCE)
+    cache = ModuleTypesCache(str(tmp_path / "cache"))
+    assert cache.get_module_types(module_path).types.lookup(5, "y") == "list[int]"
+
+    _write_module(module_path, _SOURCE.replace("list[int]", "list[str]"))
+    assert cache.get_module_types(module_path).types.lookup(5, "y") == "list[str]"
+    assert cache.stats.misses == 2
+
+
+def test_cache_survives_touch(tmp_path):
+    module_path = str(tmp_path / "module.py")
+    _write_module(module_path, _SOURCE)
+    cache = ModuleTypesCache(str(tmp_path / "cache"))
+    cache.get_module_types(module_path)
+
+    stat = os.stat(module_path)
+    os.utime(module_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.get_module_types(module_path).types.lookup(1, "x") == "int"
+    assert cache.stats.hits == 1
+
+
+def test_cache_corrupted_entry(tmp_path):
+    module_path = str(tmp_path / "module.py")
+    _write_module(module_path, _SOURCE)
+    cache = ModuleTypesCache(str(tmp_path / "cache"))
+    cache.get_module_types(module_path)
+    for filename in os.listdir(cache.directory):
+        with open(os.path.join(cache.directory, filename), "r+b") as f:
+            f.truncate(50)
+
+    assert cache.get_module_types(module_path).arguments == {(4, "f"): {"a": "str"}}
+    assert cache.stats.misses == 2
+    assert cache.get_module_types(module_path).arguments == {(4, "f"): {"a": "str"}}
+    assert cache.stats.hits == 1
+
+
+def test_checker_with_cache(tmp_path):
+    module_path = str(tmp_path / "module.py")
+    _write_module(module_path, _SOURCE + "\nf('a', 1)\n")
+    for _ in range(2):
+        checker = TraceTypeChecker(
+            path_prefix=str(tmp_path), cache_dir=str(tmp_path / "cache")
+        )
+        checker.start_trace()
+        try:
+            runpy.run_path(module_path)
+        finally:
+            checker.stop_trace()
+        assert checker.results.get(module_path, 4, "a", "str").passed == 1
+        assert checker.results.get(module_path, 5, "y", "list[int]").failed == 1
+    assert checker.cache.stats.hits == 1
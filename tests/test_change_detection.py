@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from pydytype.check import TraceTypeChecker
+
+
+def _assign_in_loop(data: list[int], n: int):
+    for i in range(n):
+        a: list[int] = data
+        b: int = 1
+        c: int = i
+        data.append(i)
+    return a, b, c
+
+
+def _run(strict):
+    checker = TraceTypeChecker(path_prefix=os.path.abspath(__file__), strict=strict)
+    checker.start_trace()
+    try:
+        _assign_in_loop([], 5)
+        _assign_in_loop([], 5)
+    finally:
+        checker.stop_trace()
+    return checker.results
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_unchanged_values_skipped(strict):
+    results = _run(strict)
+    counts = {}
+    for aggregate in results:
+        counts[aggregate.varname] = aggregate.passed + aggregate.failed
+    # arguments are checked once per call, the frame cache is cleared on return
+    assert counts["data"] == 2
+    assert counts["n"] == 2
+    assert counts["b"] == 2
+    assert counts["c"] == 10
+    # the list is mutated in the loop, its length changes
+    assert counts["a"] == 10
+
+
+def test_strict_sees_mutations_inside_containers():
+    def mutate_in_loop():
+        data = [1]
+        for i in range(3):
+            a: list[int] = data
+            data[0] = str(i)
+
+    for strict, expected in ((False, 1), (True, 3)):
+        checker = TraceTypeChecker(path_prefix=os.path.abspath(__file__), strict=strict)
+        checker.start_trace()
+        try:
+            mutate_in_loop()
+        finally:
+            checker.stop_trace()
+        (aggregate,) = [r for r in checker.results if r.varname == "a"]
+        assert aggregate.passed + aggregate.failed == expected
@@ -0,0 +1,150 @@
+import asyncio
+import sys
+
+from collections.abc import Iterator, Sequence
+from typing import TypeVar
+
+import pydytype
+
+from pydytype.decorator import DecoratorTypeChecker, get_default_checker
+
+checker = DecoratorTypeChecker()
+
+
+@checker.checked
+def add(a: int, b: "list[int]", *args: int, scale: float = 1.0, **kwargs: str) -> int:
+    return (a + sum(b)) * scale
+
+
+@checker.checked
+async def fetch(value: "Item") -> str:
+    await asyncio.sleep(0)
+    return value.name
+
+
+@checker.checked
+def count(n: int) -> Iterator[int]:
+    yield from range(n)
+
+
+class Item:
+    def __init__(self, name):
+        self.name = name
+
+
+def _get(function, varname, vartype_str):
+    line = function.__code__.co_firstlineno
+    return checker.results.get(__file__, line, varname, vartype_str)
+
+
+def test_checked():
+    checker.results.clear()
+    assert add(1, [2], 3, "4", scale=2, c="x", d=5) == 6
+    assert add(1, b=[2]) == 3.0
+
+    function = add.__wrapped__
+    assert _get(function, "a", "int").passed == 2
+    assert _get(function, "b", "list[int]").passed == 2
+    aggregate = _get(function, "args", "int")
+    assert (aggregate.passed, aggregate.failed) == (1, 1)
+    aggregate = _get(function, "scale", "float")
+    assert (aggregate.passed, aggregate.failed) == (0, 1)
+    aggregate = _get(function, "kwargs", "str")
+    assert (aggregate.passed, aggregate.failed) == (1, 1)
+    aggregate = _get(function, "return", "int")
+    assert (aggregate.passed, aggregate.failed) == (1, 1)
+
+
+def test_checked_coroutine_and_generator():
+    checker.results.clear()
+    assert asyncio.run(fetch(Item("a"))) == "a"
+    assert list(count(3)) == [0, 1, 2]
+
+    assert _get(fetch.__wrapped__, "value", "Item").passed == 1
+    assert _get(fetch.__wrapped__, "return", "str").passed == 1
+    # annotations which are not strings are formatted with their module
+    aggregate = _get(count.__wrapped__, "return", "collections.abc.Iterator[int]")
+    assert aggregate.passed == 1
+
+
+def test_checked_twice_and_unannotated():
+    def unannotated(a):
+        return a
+
+    assert checker.checked(unannotated) is unannotated
+    assert checker.checked(add) is add
+
+
+def test_instrument(tmp_path, monkeypatch):
+    source = (
+        "from __future__ import annotations\n"
+        "from os.path import join\n"
+        "def f(a: int) -> str:\n"
+        "    return str(a)\n"
+        "def g(a):\n"
+        "    return a\n"
+        "class C:\n"
+        "    def method(self, a: int) -> None:\n"
+        "        pass\n"
+        "    @staticmethod\n"
+        "    def static(a: str):\n"
+        "        pass\n"
+        "    @classmethod\n"
+        "    def cls(cls, a: C):\n"
+        "        pass\n"
+    )
+    (tmp_path / "instrumented.py").write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import instrumented
+
+    try:
+        assert pydytype.instrument(instrumented) == 4
+        assert instrumented.join is __import__("os").path.join
+
+        instrumented.f("a")
+        instrumented.C().method(1)
+        instrumented.C.static("a")
+        instrumented.C.cls(instrumented.C())
+    finally:
+        sys.modules.pop("instrumented", None)
+
+    results = get_default_checker().results
+    module_path = instrumented.__file__
+    assert results.get(module_path, 3, "a", "int").failed == 1
+    assert results.get(module_path, 3, "return", "str").passed == 1
+    assert results.get(module_path, 8, "a", "int").passed == 1
+    assert results.get(module_path, 8, "return", "None").passed == 1
+    assert results.get(module_path, 10, "a", "str").passed == 1
+    assert results.get(module_path, 13, "a", "C").passed == 1
+
+
+def test_unsupported_annotations():
+    T = TypeVar("T")
+
+    @checker.checked
+    def ident(x: T, n: int) -> T:
+        return x
+
+    @checker.checked
+    def first(values: Sequence[int]) -> "Missing":  # noqa: F821
+        return values[0]
+
+    checker.results.clear()
+    assert ident("a", 1) == "a"
+    assert ident(1, 2) == 1
+    assert first([1]) == 1
+
+    line = ident.__wrapped__.__code__.co_firstlineno
+    assert checker.results.get(__file__, line, "n", "int").passed == 2
+    assert set(checker.unchecked) >= {
+        (__file__, line, "x", "~T"),
+        (__file__, line, "return", "~T"),
+    }
+    line = first.__wrapped__.__code__.co_firstlineno
+    assert (__file__, line, "values", "collections.abc.Sequence[int]") in (
+        checker.unchecked
+    )
+    assert checker.unchecked[(__file__, line, "return", "Missing")].startswith(
+        "NameError"
+    )
+    assert len(checker.results) == 1
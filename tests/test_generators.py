@@ -0,0 +1,71 @@
+import itertools
+
+from collections.abc import Generator, Iterable, Iterator
+
+from pydytype.check import TraceTypeChecker, check_type
+
+_SOURCE = """\
+from collections.abc import Generator, Iterator
+
+
+def count(start: int) -> Iterator[int]:
+    while True:
+        yield start
+        start += 1
+
+
+def stream(values: Iterator[int]) -> Generator[str, None, int]:
+    n = 0
+    for value in values:
+        n += 1
+        yield str(value) if value % 10 else value
+    return n
+"""
+
+
+def _gen():
+    yield 1
+    yield "a"
+
+
+def test_check_type_does_not_consume():
+    values = _gen()
+    assert check_type(values, Iterator[int])
+    assert check_type(values, Iterable[int])
+    assert check_type(values, Generator[int, None, None])
+    assert next(values) == 1
+    assert not check_type([1, "a"], Iterable[int])
+    assert check_type((1, 2), Iterable[int])
+    assert not check_type(1, Iterable[int])
+    assert not check_type([1], Iterator[int])
+
+
+def test_lazy_checks(tmp_path, backend, make_module):
+    module_path, functions = make_module(_SOURCE)
+
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), backend=backend)
+    checker.start_trace()
+    try:
+        # an infinite stream must not be materialized
+        stream = functions["stream"](functions["count"](1))
+        produced = list(itertools.islice(stream, 25))
+        stream.close()
+        finite = functions["stream"](iter(range(1, 5)))
+        assert list(finite) == ["1", "2", "3", "4"]
+    finally:
+        checker.stop_trace()
+
+    assert len(produced) == 25
+    aggregate = checker.results.get(module_path, 6, "yield", "Iterator[int]")
+    assert (aggregate.passed, aggregate.failed) == (25, 0)
+    aggregate = checker.results.get(
+        module_path, 14, "yield", "Generator[str, None, int]"
+    )
+    assert (aggregate.passed, aggregate.failed) == (27, 2)
+    # the closed stream did not return, the finite one returned 4
+    aggregate = checker.results.get(
+        module_path, 15, "return", "Generator[str, None, int]"
+    )
+    assert (aggregate.passed, aggregate.failed) == (1, 0)
+    aggregate = checker.results.get(module_path, 10, "values", "Iterator[int]")
+    assert (aggregate.passed, aggregate.failed) == (2, 0)
@@ -0,0 +1,47 @@
+import os
+import runpy
+
+from pydytype.check import TraceTypeChecker
+from pydytype.main import main
+from pydytype.overhead import PHASES
+
+_examples_dirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+_path = os.path.join(_examples_dirpath, "assign.py")
+
+
+def test_profiler(backend):
+    checker = TraceTypeChecker(
+        path_prefix=_examples_dirpath, backend=backend, profile=True
+    )
+    checker.start_trace()
+    try:
+        runpy.run_path(_path, run_name="__main__")
+    finally:
+        checker.stop_trace()
+
+    profiles = checker.profiler.report(top=1000)
+    totals = [profile.total_ns for profile in profiles]
+    assert totals == sorted(totals, reverse=True)
+    checks = {}
+    for aggregate in checker.results:
+        checks.setdefault(aggregate.line, 0)
+        checks[aggregate.line] += aggregate.passed + aggregate.failed
+    assert {
+        profile.line: profile.checks for profile in profiles if profile.checks
+    } == checks
+    assert any(
+        profile.line == 0 and profile.times_ns["filter"] > 0 for profile in profiles
+    )
+    assert any(profile.times_ns["lookup"] > 0 for profile in profiles)
+    assert all(set(profile.times_ns) == set(PHASES) for profile in profiles)
+    assert len(checker.profiler.report(top=3)) == 3
+
+
+def test_profile_command(capsys):
+    assert (
+        main(["profile", "--path-prefix", _examples_dirpath, "--top", "3", _path]) == 0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["total", "checks", *PHASES, "site"]
+    assert len(lines) == 4
+    assert all(_path in line for line in lines[1:])
@@ -0,0 +1,101 @@
+import pytest
+
+from pydytype.parse import parse_module
+
+_SOURCE = """\
+x: int = 1
+
+
+def f(a: str):
+    y = a
+    x: str = a
+    return x
+
+
+class C:
+    x: float = 1.0
+
+    def g(self, b: bytes):
+        def h():
+            return b
+
+        b: list = []
+        return h
+
+
+z: str = "a"
+"""
+
+
+@pytest.fixture
+def types(tmp_path):
+    module_path = tmp_path / "module.py"
+    module_path.write_text(_SOURCE)
+    return parse_module(str(module_path)).types
+
+
+@pytest.mark.parametrize(
+    "line, vartype",
+    [
+        (1, "int"),
+        (3, "int"),
+        # the local annotation shadows the global one in the whole function
+        (4, None),
+        (5, None),
+        (6, "str"),
+        (7, "str"),
+        # the lines after a function belong to the enclosing scope again
+        (8, "int"),
+        (11, "float"),
+        (12, "float"),
+        (13, None),
+        (19, "int"),
+        (21, "int"),
+    ],
+)
+def test_lookup_shadowing(types, line, vartype):
+    assert types.lookup(line, "x") == vartype
+
+
+@pytest.mark.parametrize(
+    "line, vartype",
+    [
+        # arguments are annotated from the first line of the function
+        (13, "bytes"),
+        # annotations of enclosing functions are not visible in nested functions
+        (14, None),
+        (15, None),
+        (16, "bytes"),
+        # a new annotation applies from its line to the end of the scope
+        (17, "list"),
+        (18, "list"),
+        (19, None),
+    ],
+)
+def test_lookup_nested_scopes(types, line, vartype):
+    assert types.lookup(line, "b") == vartype
+
+
+def test_lookup_outside_module(types):
+    assert types.lookup(0, "x") is None
+    assert types.lookup(22, "x") is None
+    assert types.lookup(1, "y") is None
+
+
+@pytest.mark.parametrize(
+    "line, visible",
+    [
+        (0, {}),
+        (1, {"x": "int"}),
+        (4, {"a": "str"}),
+        (6, {"a": "str", "x": "str"}),
+        (10, {}),
+        (14, {}),
+        (17, {"b": "list"}),
+        (20, {"x": "int"}),
+        (21, {"x": "int", "z": "str"}),
+        (22, {}),
+    ],
+)
+def test_visible_at(types, line, visible):
+    assert dict(types.visible_at(line)) == visible
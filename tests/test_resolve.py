@@ -0,0 +1,30 @@
+from pydytype.resolve import AnnotationResolver
+
+
+class _A:
+    pass
+
+
+class _B:
+    pass
+
+
+def test_resolve_cached():
+    resolver = AnnotationResolver()
+    f_globals = {"MyClass": _A}
+    for _ in range(10):
+        vartype = resolver.resolve("m.py", "f", "list[MyClass]", f_globals, {})
+        assert vartype == list[_A]
+    assert resolver.stats.misses == 1
+    assert resolver.stats.hits == 9
+
+
+def test_resolve_invalidated_by_rebinding():
+    resolver = AnnotationResolver()
+    f_globals = {"MyClass": _A}
+    assert resolver.resolve("m.py", "f", "MyClass", f_globals) is _A
+    f_globals["MyClass"] = _B
+    assert resolver.resolve("m.py", "f", "MyClass", f_globals) is _B
+    assert resolver.resolve("m.py", "f", "MyClass", f_globals, {"MyClass": _A}) is _A
+    assert resolver.stats.misses == 3
+    assert resolver.stats.hits == 0
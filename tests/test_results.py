@@ -0,0 +1,85 @@
+import gc
+import threading
+import weakref
+
+from pydytype.results import Result, ResultStore
+
+
+class _Value:
+    def __repr__(self):
+        return "x" * 1000
+
+
+def _result(line, varvalue, type_is_correct, sampled=False):
+    return Result("m.py", line, "a", varvalue, "int", int, type_is_correct, sampled)
+
+
+def test_aggregate():
+    store = ResultStore(max_samples=3)
+    for i in range(100):
+        store.add(_result(1, i, i % 10 != 0, sampled=i % 2 == 0))
+    store.add(_result(2, "a", False))
+
+    assert len(store) == 2
+    aggregate = store.get("m.py", 1, "a", "int")
+    assert aggregate.passed == 90
+    assert aggregate.failed == 10
+    assert aggregate.sampled == 50
+    assert aggregate.first_seen <= aggregate.last_seen
+    assert len(aggregate.samples) == 3
+    assert all(int(sample.varvalue_repr) % 10 == 0 for sample in aggregate.samples)
+    assert [a.line for a in store.failures()] == [1, 2]
+
+
+def test_values_not_kept_alive():
+    store = ResultStore(max_repr_length=50)
+    varvalue = _Value()
+    ref = weakref.ref(varvalue)
+    store.add(_result(1, varvalue, False))
+    (sample,) = store.get("m.py", 1, "a", "int").samples
+    assert sample.varvalue_ref() is varvalue
+    assert len(sample.varvalue_repr) == 50
+
+    del varvalue
+    gc.collect()
+    assert ref() is None
+    assert sample.varvalue_ref() is None
+
+
+def test_buffers_of_ended_threads_retired():
+    store = ResultStore()
+
+    def check(i):
+        store.add(_result(i % 3, i, True))
+
+    for i in range(200):
+        thread = threading.Thread(target=check, args=(i,))
+        thread.start()
+        thread.join()
+
+    assert len(store._get_buffers()) <= 2
+    assert len(store) == 3
+    assert sum(store.get("m.py", line, "a", "int").passed for line in range(3)) == 200
+
+
+def test_merged_samples_weighted_by_failures():
+    aggregates = []
+    for varvalue, count in (("few", 10), ("many", 10000)):
+        store = ResultStore(max_samples=5)
+        for _ in range(count):
+            store.add(_result(1, varvalue, False))
+        aggregates.append(store.get("m.py", 1, "a", "int"))
+
+    reprs = []
+    for seed in range(200):
+        store = ResultStore(max_samples=5)
+        store._rng.seed(seed)
+        for aggregate in aggregates:
+            store.add_aggregate(aggregate)
+        merged = store.get("m.py", 1, "a", "int")
+        assert merged.failed == 10010
+        reprs += [sample.varvalue_repr for sample in merged.samples]
+
+    assert len(reprs) == 1000
+    # 1 sample of "few" is expected, merging unweighted gives about 500
+    assert reprs.count("'few'") < 10
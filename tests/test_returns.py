@@ -0,0 +1,50 @@
+from pydytype.check import TraceTypeChecker
+
+_SOURCE = """\
+from collections.abc import Sequence
+
+
+def seq(a: int) -> Sequence[int]:
+    return [a]
+
+
+def outer(a: int):
+    class Local:
+        pass
+
+    def inner() -> Local:
+        return Local() if a else a
+
+    return inner()
+
+
+def missing() -> Missing:
+    return 1
+"""
+
+
+def test_unsupported_and_local_return_annotations(tmp_path, backend, make_module):
+    module_path, functions = make_module(
+        "from __future__ import annotations\n" + _SOURCE
+    )
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), backend=backend)
+    checker.start_trace()
+    try:
+        assert functions["seq"](1) == [1]
+        functions["outer"](1)
+        functions["outer"](0)
+        assert functions["missing"]() == 1
+    finally:
+        checker.stop_trace()
+
+    # annotations referring to enclosing functions are resolved in their scope
+    aggregate = checker.results.get(module_path, 14, "return", "Local")
+    assert (aggregate.passed, aggregate.failed) == (1, 1)
+    assert checker.results.get(module_path, 6, "return", "Sequence[int]") is None
+    assert set(checker.unchecked) == {
+        (module_path, 6, "return", "Sequence[int]"),
+        (module_path, 20, "return", "Missing"),
+    }
+    assert checker.unchecked[(module_path, 20, "return", "Missing")].startswith(
+        "NameError"
+    )
@@ -0,0 +1,54 @@
+from pydytype.check import CheckContext, Sampling, check_type, compile_type_checker
+
+
+def _check(varvalue, vartype, sampling):
+    context = CheckContext(sampling)
+    type_is_correct = compile_type_checker(vartype)(varvalue, context)
+    return type_is_correct, context.sampled
+
+
+def test_full():
+    varvalue = list(range(1000)) + ["a"]
+    assert not check_type(varvalue, list[int])
+    assert _check(varvalue, list[int], Sampling("full")) == (False, False)
+
+
+def test_first():
+    varvalue = list(range(1000)) + ["a"]
+    assert check_type(varvalue, list[int], Sampling("first", k=10))
+    assert _check(varvalue, list[int], Sampling("first", k=10)) == (True, True)
+    assert _check(varvalue[:10], list[int], Sampling("first", k=10)) == (True, False)
+    assert _check({"a": [1, "b"]}, dict[str, list[int]], Sampling("first", k=1)) == (
+        True,
+        True,
+    )
+
+
+def test_random():
+    varvalue = {i: str(i) for i in range(1000)}
+    varvalue[1000] = 1000
+    results = [
+        _check(varvalue, dict[int, str], Sampling("random", k=10, seed=seed))
+        for seed in range(20)
+    ]
+    assert all(sampled for _, sampled in results)
+    assert results == [
+        _check(varvalue, dict[int, str], Sampling("random", k=10, seed=seed))
+        for seed in range(20)
+    ]
+    assert _check(varvalue, dict[int, int], Sampling("random", k=10)) == (
+        False,
+        True,
+    )
+
+
+def test_time():
+    varvalue = [{"a"}] * 100000 + [{1}]
+    assert _check(varvalue, list[set[str]], Sampling("time", time_budget=0)) == (
+        True,
+        True,
+    )
+    assert _check(varvalue, list[set[str]], Sampling("time", time_budget=60)) == (
+        False,
+        False,
+    )
@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import runpy
+import socket
+import threading
+
+import pytest
+
+from pydytype.check import TraceTypeChecker
+from pydytype.results import Result
+from pydytype.sink import ResultSink, iter_binary_records
+
+_examples_dirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+
+
+class _BlockingStream(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+
+    def write(self, data):
+        self.unblocked.wait()
+        return super().write(data)
+
+
+def _result(line, type_is_correct):
+    return Result("m.py", line, "a", "ä" * 3, "int", int, type_is_correct)
+
+
+def test_jsonl_sink():
+    stream = io.BytesIO()
+    sink = ResultSink(stream)
+    checker = TraceTypeChecker(path_prefix=_examples_dirpath, sink=sink)
+    checker.start_trace()
+    try:
+        runpy.run_path(os.path.join(_examples_dirpath, "list.py"), run_name="__main__")
+    finally:
+        checker.stop_trace()
+    sink.close()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) == sink.written
+    assert sink.dropped == 0
+    assert sum(not record["type_is_correct"] for record in records) == sum(
+        aggregate.failed for aggregate in checker.results
+    )
+    assert all(
+        (record["varvalue"] is None) == record["type_is_correct"] for record in records
+    )
+
+
+def test_binary_sink():
+    stream = io.BytesIO()
+    with ResultSink(stream, format="binary") as sink:
+        sink.put(_result(1, True))
+        sink.put(_result(2, False))
+    stream.seek(0)
+    records = list(iter_binary_records(stream))
+    assert [record["line"] for record in records] == [1, 2]
+    assert records[0]["varvalue"] is None
+    assert records[1]["varvalue"] == repr("ä" * 3)
+    assert records[1]["module_path"] == "m.py"
+    assert records[1]["task_name"] is None
+
+
+def test_drop_when_full():
+    stream = _BlockingStream()
+    sink = ResultSink(stream, max_queue_size=2, on_full="drop")
+    for line in range(100):
+        sink.put(_result(line, False))
+    stream.unblocked.set()
+    sink.close()
+    assert sink.written + sink.dropped == 100
+    assert sink.dropped >= 97
+
+
+def test_block_when_full():
+    stream = _BlockingStream()
+    sink = ResultSink(stream, max_queue_size=2, on_full="block")
+    thread = threading.Thread(
+        target=lambda: [sink.put(_result(line, False)) for line in range(100)]
+    )
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    stream.unblocked.set()
+    thread.join()
+    sink.close()
+    assert sink.written == 100
+    assert sink.dropped == 0
+
+
+def test_socket_sink():
+    writer, reader = socket.socketpair()
+    with ResultSink(writer, failures_only=True) as sink:
+        sink.put(_result(1, True))
+        sink.put(_result(2, False))
+    writer.close()
+    with reader.makefile("rb") as f:
+        records = [json.loads(line) for line in f]
+    reader.close()
+    assert [record["line"] for record in records] == [2]
+
+
+def test_invalid_format():
+    with pytest.raises(ValueError):
+        ResultSink(io.BytesIO(), format="xml")
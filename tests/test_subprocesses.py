@@ -0,0 +1,112 @@
+import multiprocessing
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from pydytype.check import TraceTypeChecker
+from pydytype.subprocesses import SubprocessTracer
+
+_SOURCE = """\
+def square(a: int) -> int:
+    b: int = a * a if a % 2 else str(a)
+    return b
+"""
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch, make_module):
+    # the module is imported, so that its functions can be pickled
+    make_module(_SOURCE, "square_module")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import square_module
+
+    yield square_module
+    sys.modules.pop("square_module", None)
+
+
+# the thread receiving results makes Python 3.12+ warn about fork
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_process_pool(tmp_path, module, start_method, backend):
+    checker = TraceTypeChecker(
+        path_prefix=str(tmp_path), backend=backend, trace_subprocesses=True
+    )
+    context = multiprocessing.get_context(start_method)
+    checker.start_trace()
+    try:
+        with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+            list(executor.map(module.square, range(10)))
+    finally:
+        checker.stop_trace()
+
+    module_path = module.__file__
+    aggregate = checker.results.get(module_path, 1, "a", "int")
+    assert aggregate is not None
+    assert aggregate.passed == 10
+    aggregate = checker.results.get(module_path, 2, "b", "int")
+    assert aggregate is not None
+    assert (aggregate.passed, aggregate.failed) == (5, 5)
+    assert len(aggregate.samples) == 5
+    assert all(sample.varvalue_ref is None for sample in aggregate.samples)
+    assert checker.subprocesses.received >= 1
+
+
+def test_pool_and_parent(tmp_path, module):
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), trace_subprocesses=True)
+    checker.start_trace()
+    try:
+        module.square(1)
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            pool.map(module.square, range(4))
+            pool.close()
+            pool.join()
+    finally:
+        checker.stop_trace()
+
+    aggregate = checker.results.get(module.__file__, 1, "a", "int")
+    assert aggregate.passed == 5
+    assert checker.subprocesses.received == 2
+
+
+# workers of a pool used as a context manager are terminated by SIGTERM
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_terminated_pool(tmp_path, module, start_method):
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), trace_subprocesses=True)
+    checker.start_trace()
+    try:
+        with multiprocessing.get_context(start_method).Pool(2) as pool:
+            pool.map(module.square, range(6))
+    finally:
+        checker.stop_trace()
+
+    aggregate = checker.results.get(module.__file__, 1, "a", "int")
+    assert aggregate is not None
+    assert aggregate.passed == 6
+    # a worker terminated before it started its target has nothing to send
+    assert checker.subprocesses.received >= 1
+
+
+def test_not_traced_after_stop(tmp_path, module):
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), trace_subprocesses=True)
+    checker.start_trace()
+    checker.stop_trace()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        executor.submit(module.square, 3).result()
+
+    assert len(checker.results) == 0
+    assert checker.subprocesses.received == 0
+
+
+def test_single_tracer(tmp_path):
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), trace_subprocesses=True)
+    other = SubprocessTracer(TraceTypeChecker, {}, checker.results)
+    checker.start_trace()
+    try:
+        with pytest.raises(RuntimeError):
+            other.start()
+    finally:
+        checker.stop_trace()
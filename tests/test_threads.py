@@ -0,0 +1,56 @@
+import threading
+import time
+
+from pydytype import check
+from pydytype.check import TraceTypeChecker
+
+_SOURCE = """\
+def add(a: int, b: list[int]):
+    c: int = a + len(b)
+    return c
+"""
+
+_THREAD_COUNT = 16
+_CALL_COUNT = 200
+
+
+def test_threads(tmp_path, monkeypatch, backend, make_module):
+    module_path, functions = make_module(_SOURCE)
+    parsed_paths = []
+
+    def parse_module(path):
+        parsed_paths.append(path)
+        time.sleep(0.05)
+        return original_parse_module(path)
+
+    original_parse_module = check.parse_module
+    monkeypatch.setattr(check, "parse_module", parse_module)
+
+    barrier = threading.Barrier(_THREAD_COUNT)
+
+    def run():
+        barrier.wait()
+        for i in range(_CALL_COUNT):
+            functions["add"](i, [1] if i % 2 else ["a"])
+
+    checker = TraceTypeChecker(path_prefix=str(tmp_path), backend=backend)
+    checker.start_trace()
+    try:
+        threads = [threading.Thread(target=run) for _ in range(_THREAD_COUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        checker.stop_trace()
+
+    assert parsed_paths == [module_path]
+    expected_calls = _THREAD_COUNT * _CALL_COUNT
+    aggregate = checker.results.get(module_path, 1, "a", "int")
+    assert aggregate.passed == expected_calls
+    assert aggregate.thread_ids == {thread.ident for thread in threads}
+    aggregate = checker.results.get(module_path, 1, "b", "list[int]")
+    assert aggregate.passed == aggregate.failed == expected_calls // 2
+    assert {sample.thread_id for sample in aggregate.samples} <= aggregate.thread_ids
+    assert checker.results.get(module_path, 2, "c", "int").passed == expected_calls
+    assert len(checker.results) == 3
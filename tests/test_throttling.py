@@ -0,0 +1,97 @@
+import pytest
+
+from pydytype.check import Throttling, TraceTypeChecker
+
+_SOURCE = """\
+def f(a: int):
+    b: int = a
+    return b
+"""
+
+
+def _trace(checker, function, *values):
+    checker.start_trace()
+    try:
+        for value in values:
+            function(value)
+    finally:
+        checker.stop_trace()
+
+
+def test_back_off(tmp_path, backend, make_module):
+    module_path, functions = make_module(_SOURCE)
+    f = functions["f"]
+    checker = TraceTypeChecker(
+        path_prefix=str(tmp_path),
+        backend=backend,
+        throttling=Throttling(passes=10, max_interval=8),
+    )
+    _trace(checker, f, *range(1000))
+
+    stats = checker.line_stats[(f.__code__, 1)]
+    assert stats.checks + stats.skipped == 1000
+    assert stats.interval == 8
+    assert stats.checks < 150
+    assert checker.results.get(module_path, 1, "a", "int").passed == stats.checks
+    stats = checker.line_stats[(f.__code__, 2)]
+    assert checker.results.get(module_path, 2, "b", "int").passed == stats.checks
+    assert stats.cost_ns > 0
+
+
+def test_failure_resets_back_off(tmp_path, backend, make_module):
+    module_path, functions = make_module(_SOURCE)
+    f = functions["f"]
+    checker = TraceTypeChecker(
+        path_prefix=str(tmp_path),
+        backend=backend,
+        throttling=Throttling(passes=10, max_interval=8),
+    )
+    _trace(checker, f, *range(100), *["a"] * 8)
+
+    stats = checker.line_stats[(f.__code__, 1)]
+    assert stats.failures >= 1
+    assert stats.interval == 1
+    assert stats.countdown == 0
+    assert stats.consecutive_passes == 0
+    assert checker.results.get(module_path, 1, "a", "int").failed == stats.failures
+
+
+def test_overhead_cap(tmp_path, backend, make_module):
+    module_path, functions = make_module(_SOURCE)
+    f = functions["f"]
+    checker = TraceTypeChecker(
+        path_prefix=str(tmp_path),
+        backend=backend,
+        throttling=Throttling(max_overhead=1e-9, min_cpu_time=0),
+    )
+    _trace(checker, f, *range(100))
+
+    assert checker.over_budget
+    assert checker.overhead_ns > 0
+    assert checker.results.get(module_path, 1, "a", "int").passed == 1
+
+
+def test_overhead_cap_counts_line_events(tmp_path, backend, make_module):
+    _, functions = make_module(
+        "def loop(n: int):\n"
+        "    total: int = 0\n"
+        "    for i in range(n):\n"
+        "        i += 1\n"
+        "    return total\n"
+    )
+    loop = functions["loop"]
+    checker = TraceTypeChecker(
+        path_prefix=str(tmp_path),
+        backend=backend,
+        throttling=Throttling(max_overhead=0.05, min_cpu_time=0.01),
+    )
+    # the line events of the loop check nothing, but cost most of the time
+    _trace(checker, loop, 300000)
+
+    assert checker.over_budget
+    assert checker.overhead_ns > 0
+
+
+def test_invalid_throttling():
+    with pytest.raises(ValueError):
+        Throttling(max_overhead=2)
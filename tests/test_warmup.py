@@ -0,0 +1,54 @@
+import os
+
+from pydytype.check import TraceTypeChecker
+from pydytype.main import main
+from pydytype.parse import parse_module
+from pydytype.warmup import parse_package
+
+dirname = os.path.dirname(os.path.abspath(__file__))
+examples_dirname = os.path.join(dirname, "examples")
+
+
+def _write_package(root):
+    (root / "package").mkdir()
+    (root / "package" / "good.py").write_text("x: int = 1\n")
+    (root / "package" / "bad.py").write_text("def f(:\n")
+    (root / ".hidden").mkdir()
+    (root / ".hidden" / "skipped.py").write_text("y: int = 1\n")
+
+
+def test_parse_package_in_parallel():
+    report = parse_package(examples_dirname, max_workers=2)
+    assert not report.errors
+    assert set(report.module_types) == set(report.parse_times)
+    path = os.path.join(examples_dirname, "assign.py")
+    assert report.module_types[path].arguments == parse_module(path).arguments
+
+
+def test_parse_package_syntax_error(tmp_path):
+    _write_package(tmp_path)
+    report = parse_package(str(tmp_path), max_workers=1)
+    good_path = str(tmp_path / "package" / "good.py")
+    bad_path = str(tmp_path / "package" / "bad.py")
+    assert list(report.module_types) == [good_path]
+    assert list(report.errors) == [bad_path]
+    assert report.errors[bad_path].startswith("SyntaxError")
+    assert set(report.parse_times) == {good_path, bad_path}
+
+
+def test_warm_up_preloads_checker(tmp_path):
+    _write_package(tmp_path)
+    checker = TraceTypeChecker(path_prefix=str(tmp_path))
+    checker.warm_up(max_workers=2)
+    good_path = str(tmp_path / "package" / "good.py")
+    assert checker._get_type_str(good_path, 1, "x") == "int"
+    assert set(checker._types) == {good_path}
+
+
+def test_warmup_command(tmp_path, capsys):
+    _write_package(tmp_path)
+    assert main(["warmup", str(tmp_path), "--workers", "1"]) == 1
+    output = capsys.readouterr().out
+    assert "good.py  ok" in output
+    assert "bad.py  SyntaxError" in output
+    assert "1 modules parsed, 1 errors" in output